@@ -0,0 +1,98 @@
+"""Micro-benchmark: batch AI HOT scoring vs. the previous per-item keyword_matches loop.
+
+Usage: python benchmarks/bench_aihot_scoring.py [--items 2000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+
+
+def legacy_score(item: dict, profile: dict, ranking_hints: str) -> tuple[float, list[str]]:
+    """The scorer used before the feature extractor: every list rescanned with a regex per keyword."""
+    text = main.aihot_item_text(item)
+    score = float(item.get("score") or 0)
+    match_tags = []
+    category = item.get("category")
+    if category == "ai-products":
+        score += 4
+    elif category == "industry":
+        score += 2
+    elif category == "paper":
+        score -= 3
+    for tag, weight, keywords in main.AIHOT_INTEREST_KEYWORDS:
+        if any(main.keyword_matches(text, keyword) for keyword in keywords):
+            score += weight
+            match_tags.append(tag)
+    for keyword in profile.get("aihot_boost_keywords", []):
+        if main.keyword_matches(text, str(keyword)):
+            score += 8
+            match_tags.append(str(keyword))
+    downrank_keywords = main.AIHOT_DOWNRANK_KEYWORDS + [str(keyword) for keyword in profile.get("deprioritize_topics", [])]
+    agent_focused = any(main.keyword_matches(text, keyword) for keyword in main.AIHOT_AGENT_KEYWORDS)
+    for keyword in downrank_keywords:
+        if agent_focused and keyword in {"从零开始", "教程", "代码实现", "api 参数"}:
+            continue
+        if main.keyword_matches(text, keyword):
+            score -= 16
+    for line in ranking_hints.splitlines():
+        label_text = line.split("：", 1)[-1] if "：" in line else ""
+        for label in (part.strip() for part in label_text.split("、")):
+            if not label or not main.keyword_matches(text, label):
+                continue
+            if "回避" in line:
+                score -= 12
+            elif "偏好" in line:
+                score += 8
+                match_tags.append(label)
+    return score, list(dict.fromkeys(match_tags))
+
+
+def build_items(count: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    vocabulary = list(main.AIHOT_FEATURE_KEYWORD_SET) + ["release notes", "团队", "用户增长", "benchmark", "发布会"] * 20
+    return [{
+        "id": str(i),
+        "title": " ".join(rng.choices(vocabulary, k=8)),
+        "summary": "，".join(rng.choices(vocabulary, k=60)),
+        "source": "Example",
+        "category": rng.choice(["ai-products", "industry", "paper", "tip"]),
+        "score": rng.randint(40, 99),
+        "publishedAt": f"2026-01-{rng.randint(1, 28):02d}",
+    } for i in range(count)]
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=2000)
+    args = parser.parse_args()
+
+    profile = main.json.loads((Path(__file__).resolve().parent.parent / "profile.example.json").read_text())
+    hints = "基于近期一键反馈，额外调整：\n近期偏好：产品策略、Coding Agent、出海\n近期回避：融资、入门教程"
+    items = build_items(args.items)
+
+    start = time.perf_counter()
+    expected = [legacy_score(item, profile, hints) for item in items]
+    legacy = time.perf_counter() - start
+
+    main.aihot_text_features.cache_clear()
+    main.aihot_keyword_hits.cache_clear()
+    start = time.perf_counter()
+    scored = main.score_aihot_items_for_profile(items, profile, hints)
+    batch = time.perf_counter() - start
+    assert [(score, tags) for score, tags, _ in scored] == expected
+
+    print(f"{args.items} AI HOT items")
+    print(f"  {'legacy (regex per keyword)':<32} {legacy * 1000:8.1f} ms total  {legacy / args.items * 1e6:8.1f} µs/item")
+    print(f"  {'batch (feature extractor)':<32} {batch * 1000:8.1f} ms total  {batch / args.items * 1e6:8.1f} µs/item")
+    print(f"  speedup: {legacy / batch:.1f}x")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,122 @@
+"""Micro-benchmark: compiled profile prefilter vs. the previous per-candidate regex loop.
+
+Usage: python benchmarks/bench_prefilter.py [--candidates 5000] [--rules 200]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+
+
+def legacy_prefilter(candidates: list[dict], profile: dict) -> list[dict]:
+    """The prefilter used before the compiled engine: regexes rebuilt per candidate and per channel rule."""
+    preferred_channels = set(profile.get("preferred_channels", []))
+    exclude_patterns = profile.get("exclude_title_patterns", [])
+    exclude_re = re.compile(
+        r"(?i)(" + "|".join(re.escape(p) for p in exclude_patterns) + ")"
+    ) if exclude_patterns else None
+    exclude_content_patterns = profile.get("exclude_content_patterns", [])
+    exclude_content_re = re.compile(
+        r"(?i)(" + "|".join(re.escape(p) for p in exclude_content_patterns) + ")"
+    ) if exclude_content_patterns else None
+    channel_filters = profile.get("channel_filters", {})
+
+    filtered = []
+    for v in candidates:
+        if exclude_re and exclude_re.search(v["title"]):
+            continue
+        if exclude_content_re and exclude_content_re.search(f"{v['title']}\n{v.get('description') or ''}"):
+            continue
+        is_preferred = any(pc.lower() in v["author"].lower() for pc in preferred_channels)
+        if v["view_count"] < 200 and not is_preferred:
+            continue
+        channel_skipped = False
+        for ch_name, ch_rule in channel_filters.items():
+            if ch_name.lower() not in v["author"].lower():
+                continue
+            min_duration = ch_rule.get("min_duration_seconds", 0)
+            if min_duration and v.get("duration_sec", 0) < min_duration:
+                channel_skipped = True
+                break
+            for key, field, reject_on_match in (
+                ("exclude_title_keywords", "title", True),
+                ("exclude_description_keywords", "description", True),
+                ("require_title_keywords", "title", False),
+            ):
+                keywords = ch_rule.get(key, [])
+                if keywords:
+                    kw_re = re.compile(r"(?i)(" + "|".join(re.escape(k) for k in keywords) + ")")
+                    if bool(kw_re.search(v.get(field) or "")) == reject_on_match:
+                        channel_skipped = True
+                        break
+            if channel_skipped:
+                break
+        if not channel_skipped:
+            filtered.append(v)
+    return filtered
+
+
+def build_workload(candidate_count: int, rule_count: int, seed: int = 7) -> tuple[list[dict], dict]:
+    rng = random.Random(seed)
+    words = ["agent", "product", "growth", "pricing", "eval", "workshop", "stock", "keynote", "design", "beginners"]
+    channels = [f"Channel {i:04d}" for i in range(rule_count * 2)]
+    profile = {
+        "preferred_channels": channels[: rule_count // 2],
+        "exclude_title_patterns": ["for beginners", "full course", "入门教程"] + [f"series {i}" for i in range(50)],
+        "exclude_content_patterns": ["stock", "investing"] + [f"ticker{i}" for i in range(50)],
+        "channel_filters": {
+            name: {
+                "min_duration_seconds": rng.choice([0, 600, 1200]),
+                "exclude_title_keywords": rng.sample(words, 3),
+                "exclude_description_keywords": rng.sample(words, 2),
+                "require_title_keywords": rng.sample(words, 2) if rng.random() < 0.3 else [],
+            }
+            for name in channels[:rule_count]
+        },
+    }
+    candidates = [{
+        "title": " ".join(rng.choices(words, k=6)),
+        "author": rng.choice(channels),
+        "description": " ".join(rng.choices(words, k=60)),
+        "view_count": rng.choice([50, 5000]),
+        "duration_sec": rng.choice([300, 1800, 3600]),
+    } for _ in range(candidate_count)]
+    return candidates, profile
+
+
+def bench(label: str, func, candidates: list[dict], profile: dict) -> tuple[float, list[dict]]:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(candidates, profile)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<32} {elapsed * 1000:8.1f} ms total  {elapsed / len(candidates) * 1e6:8.1f} µs/candidate")
+    return elapsed, result
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=5000)
+    parser.add_argument("--rules", type=int, default=200, help="channel_filters entries in the profile")
+    args = parser.parse_args()
+
+    candidates, profile = build_workload(args.candidates, args.rules)
+    print(f"{args.candidates} candidates, {args.rules} channel rules")
+    legacy, expected = bench("legacy (regex per candidate)", legacy_prefilter, candidates, profile)
+    main._compile_profile_filters.cache_clear()
+    cold, result = bench("compiled (first run)", main.prefilter_candidates, candidates, profile)
+    warm, _ = bench("compiled (profile cached)", main.prefilter_candidates, candidates, profile)
+    assert result == expected
+    print(f"  speedup: {legacy / cold:.1f}x cold, {legacy / warm:.1f}x warm")
+
+
+if __name__ == "__main__":
+    main_cli()
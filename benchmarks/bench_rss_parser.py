@@ -0,0 +1,107 @@
+"""Micro-benchmark: streaming bytes RSS parser vs. the previous ElementTree parser.
+
+Usage: python benchmarks/bench_rss_parser.py [--feeds 2000] [--recent 1]
+"""
+
+import argparse
+import sys
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+
+
+ENTRIES_PER_FEED = 15  # YouTube channel feeds always list the latest 15 uploads
+
+
+def legacy_parse_rss_videos(feed_text: str) -> list[dict]:
+    """The parser used before the streaming rewrite: decode, build the full tree, filter every entry."""
+    ns = {
+        "atom": "http://www.w3.org/2005/Atom",
+        "yt": "http://www.youtube.com/xml/schemas/2015",
+        "media": "http://search.yahoo.com/mrss/",
+    }
+    root = ET.fromstring(feed_text)
+    author = root.find("atom:title", ns).text
+    videos = []
+    for entry in root.findall("atom:entry", ns):
+        published_str = entry.find("atom:published", ns).text
+        if not main.is_recent(published_str):
+            continue
+        video_id = entry.find("yt:videoId", ns).text
+        videos.append({
+            "video_id": video_id,
+            "title": entry.find("atom:title", ns).text,
+            "author": author,
+            "published": published_str,
+            "url": f"https://www.youtube.com/watch?v={video_id}",
+        })
+    return videos
+
+
+def build_feed(recent: int) -> bytes:
+    """Build a realistic feed: `recent` uploads inside the window, the rest days older."""
+    now = datetime.now(timezone.utc)
+    entries = []
+    for i in range(ENTRIES_PER_FEED):
+        published = now - (timedelta(hours=i + 1) if i < recent else timedelta(days=i * 3))
+        published_str = published.replace(microsecond=0).isoformat()
+        entries.append(f"""
+ <entry>
+  <id>yt:video:vid{i:08d}</id>
+  <yt:videoId>vid{i:08d}</yt:videoId>
+  <yt:channelId>UCbenchmarkchannel0000000</yt:channelId>
+  <title>Benchmark video {i} — a long interview about AI products</title>
+  <link rel="alternate" href="https://www.youtube.com/watch?v=vid{i:08d}"/>
+  <author><name>Benchmark Channel</name><uri>https://www.youtube.com/channel/UCbenchmark</uri></author>
+  <published>{published_str}</published>
+  <updated>{published_str}</updated>
+  <media:group>
+   <media:title>Benchmark video {i}</media:title>
+   <media:content url="https://www.youtube.com/v/vid{i:08d}" type="application/x-shockwave-flash" width="640" height="390"/>
+   <media:thumbnail url="https://i.ytimg.com/vi/vid{i:08d}/hqdefault.jpg" width="480" height="360"/>
+   <media:description>{"Long description line with links and sponsors. " * 30}</media:description>
+   <media:community><media:starRating count="120" average="5.00" min="1" max="5"/><media:statistics views="12345"/></media:community>
+  </media:group>
+ </entry>""")
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns:media="http://search.yahoo.com/mrss/" xmlns="http://www.w3.org/2005/Atom">
+ <link rel="self" href="http://www.youtube.com/feeds/videos.xml?channel_id=UCbenchmark"/>
+ <id>yt:channel:benchmark</id>
+ <title>Benchmark Channel</title>
+ <published>2015-01-01T00:00:00+00:00</published>{"".join(entries)}
+</feed>
+""".encode("utf-8")
+
+
+def bench(label: str, func, payload, feeds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(feeds):
+        func(payload)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<32} {elapsed * 1000:8.1f} ms total  {elapsed / feeds * 1e6:8.1f} µs/feed")
+    return elapsed
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--feeds", type=int, default=2000)
+    parser.add_argument("--recent", type=int, default=1, help="entries per feed inside the lookback window")
+    args = parser.parse_args()
+
+    feed_bytes = build_feed(args.recent)
+    assert legacy_parse_rss_videos(feed_bytes.decode("utf-8")) == main.parse_rss_videos(feed_bytes)
+
+    backend = "lxml" if main.LXML_ETREE is not None else "stdlib"
+    print(f"{args.feeds} feeds × {ENTRIES_PER_FEED} entries ({args.recent} recent), {len(feed_bytes)} bytes/feed")
+    legacy = bench("legacy (decode + full tree)", lambda data: legacy_parse_rss_videos(data.decode("utf-8")), feed_bytes, args.feeds)
+    streaming = bench(f"streaming bytes ({backend})", main.parse_rss_videos, feed_bytes, args.feeds)
+    print(f"  speedup: {legacy / streaming:.1f}x")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,103 @@
+"""Case-insensitive multi-keyword substring matcher (Aho-Corasick), built once and reused per text."""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+
+
+ASCII_KEYWORD_RE = re.compile(r"[a-z0-9][a-z0-9 ._+/-]*")
+WORD_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789")
+
+
+class KeywordMatcher:
+    """一次扫描文本即可找出命中的所有关键词，语义与 (?i)(kw1|kw2|...) 的子串匹配一致。
+
+    关键词按传入顺序编号，matches() 返回命中的编号集合；空关键词与正则一样匹配任意文本。
+    word_boundary=True 时与 main.keyword_matches 一致：关键词先 strip，空关键词不匹配，
+    纯 ASCII 关键词两侧不能紧挨字母或数字（"geo" 不命中 "geometry"），其余按子串匹配。
+    """
+
+    def __init__(self, keywords, *, word_boundary: bool = False):
+        self.keywords = [str(keyword) for keyword in keywords]
+        self._lengths: list[int] = []
+        self._bounded: list[bool] = []
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        outputs: list[set[int]] = [set()]
+        for index, keyword in enumerate(self.keywords):
+            pattern = keyword.lower()
+            if word_boundary:
+                pattern = pattern.strip()
+            self._lengths.append(len(pattern))
+            self._bounded.append(word_boundary and ASCII_KEYWORD_RE.fullmatch(pattern) is not None)
+            if word_boundary and not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append(set())
+                state = next_state
+            outputs[state].add(index)
+        self._always = frozenset(outputs[0])
+
+        # 广度优先补 fail 链，并把 fail 目标的输出并入当前状态
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                outputs[next_state] |= outputs[self._fail[next_state]]
+        self._output = [frozenset(output) for output in outputs]
+        self._any_bounded = any(self._bounded)
+
+    def __bool__(self) -> bool:
+        return bool(self.keywords)
+
+    def _scan(self, text: str):
+        if self._always:
+            yield self._always
+        text = text.lower()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not output[state]:
+                continue
+            if not self._any_bounded:
+                yield output[state]
+                continue
+            # 纯 ASCII 关键词要求两侧是词边界
+            after = text[end + 1] if end + 1 < len(text) else ""
+            hits = set()
+            for index in output[state]:
+                if self._bounded[index]:
+                    start = end - self._lengths[index] + 1
+                    if after in WORD_CHARS or (start and text[start - 1] in WORD_CHARS):
+                        continue
+                hits.add(index)
+            if hits:
+                yield hits
+
+    def search(self, text: str) -> bool:
+        """是否命中任一关键词（找到第一个就返回）"""
+        return any(True for _ in self._scan(text))
+
+    def matches(self, text: str) -> set[int]:
+        """命中的全部关键词编号"""
+        found: set[int] = set()
+        for output in self._scan(text):
+            found |= output
+        return found
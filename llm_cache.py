@@ -0,0 +1,126 @@
+"""Persistent prompt-hash cache for LLM responses, shared by the digest and preference update."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+
+def _env_int(name: str, default: int, min_value: int = 0) -> int:
+    try:
+        return max(min_value, int(os.environ.get(name) or default))
+    except ValueError:
+        return default
+
+
+LLM_CACHE_FILE = os.environ.get("LLM_CACHE_FILE", "llm_cache.json")
+LLM_CACHE_TTL_HOURS = _env_int("LLM_CACHE_TTL_HOURS", 24, min_value=1)
+LLM_CACHE_MAX_ENTRIES = _env_int("LLM_CACHE_MAX_ENTRIES", 500, min_value=1)
+
+# 只有调用 load() 之后缓存才生效；单元测试和直接 import 时保持原有行为
+_entries: dict[str, dict] | None = None
+_stats: dict[str, dict[str, int]] = {}
+_lock = threading.Lock()
+
+
+def cache_key(model: str, max_tokens: int, prompt: str) -> str:
+    payload = json.dumps([model, int(max_tokens), prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _is_fresh(entry: dict, now: datetime) -> bool:
+    try:
+        created_at = datetime.fromisoformat(str(entry.get("created_at")))
+    except ValueError:
+        return False
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return now - created_at < timedelta(hours=LLM_CACHE_TTL_HOURS) and isinstance(entry.get("response"), str)
+
+
+def _evict(entries: dict[str, dict]) -> None:
+    overflow = len(entries) - LLM_CACHE_MAX_ENTRIES
+    if overflow <= 0:
+        return
+    oldest = sorted(entries, key=lambda key: str(entries[key].get("created_at") or ""))[:overflow]
+    for key in oldest:
+        entries.pop(key, None)
+
+
+def load(path: str | Path | None = None, now: datetime | None = None) -> None:
+    """启用缓存：读取持久化文件并丢弃过期条目"""
+    global _entries
+    now = now or datetime.now(timezone.utc)
+    path = Path(path or LLM_CACHE_FILE)
+    try:
+        data = json.loads(path.read_text()) if path.exists() else {}
+    except (OSError, json.JSONDecodeError):
+        data = {}
+    entries = data.get("entries") if isinstance(data, dict) else None
+    entries = {
+        key: entry for key, entry in (entries or {}).items()
+        if isinstance(entry, dict) and _is_fresh(entry, now)
+    }
+    _evict(entries)
+    with _lock:
+        _entries = entries
+        _stats.clear()
+
+
+def save(path: str | Path | None = None) -> None:
+    with _lock:
+        if _entries is None:
+            return
+        _evict(_entries)
+        payload = {"entries": dict(_entries)}
+    Path(path or LLM_CACHE_FILE).write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n")
+
+
+def disable() -> None:
+    global _entries
+    with _lock:
+        _entries = None
+        _stats.clear()
+
+
+def get(model: str, max_tokens: int, prompt: str, stage: str = "default") -> str | None:
+    with _lock:
+        if _entries is None:
+            return None
+        entry = _entries.get(cache_key(model, max_tokens, prompt))
+        hit = entry is not None and _is_fresh(entry, datetime.now(timezone.utc))
+        counts = _stats.setdefault(stage, {"hits": 0, "misses": 0})
+        counts["hits" if hit else "misses"] += 1
+        return entry["response"] if hit else None
+
+
+def put(model: str, max_tokens: int, prompt: str, response: str | None) -> None:
+    if not response:
+        return
+    with _lock:
+        if _entries is None:
+            return
+        _entries[cache_key(model, max_tokens, prompt)] = {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "response": response,
+        }
+        _evict(_entries)
+
+
+def stats() -> dict[str, dict[str, int]]:
+    with _lock:
+        return {stage: dict(counts) for stage, counts in _stats.items()}
+
+
+def format_stats() -> str:
+    """按阶段汇总命中率，例如：LLM 缓存命中 rank 1/1，summary 2/3"""
+    parts = [
+        f"{stage} {counts['hits']}/{counts['hits'] + counts['misses']}"
+        for stage, counts in stats().items()
+    ]
+    return "LLM 缓存命中 " + "，".join(parts) if parts else ""
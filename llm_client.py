@@ -0,0 +1,427 @@
+"""Shared OpenAI-compatible LLM client: pooled session, rate limits, retries with backoff, usage accounting."""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+import requests
+import requests.adapters
+
+
+def _env_int(name: str, default: int, min_value: int = 0) -> int:
+    try:
+        return max(min_value, int(os.environ.get(name) or default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float, min_value: float = 0.0) -> float:
+    try:
+        return max(min_value, float(os.environ.get(name) or default))
+    except ValueError:
+        return default
+
+
+LLM_REQUESTS_PER_MINUTE = _env_int("LLM_REQUESTS_PER_MINUTE", 60, min_value=1)  # 每个 provider 的请求速率上限
+LLM_TOKENS_PER_MINUTE = _env_int("LLM_TOKENS_PER_MINUTE", 200000, min_value=1000)  # 每个 provider 的 token 速率上限（估算）
+LLM_MAX_CONCURRENCY = _env_int("LLM_MAX_CONCURRENCY", 4, min_value=1)
+LLM_MAX_RETRIES = _env_int("LLM_MAX_RETRIES", 3)
+LLM_BACKOFF_BASE_SECONDS = _env_float("LLM_BACKOFF_BASE_SECONDS", 1.0)
+LLM_BACKOFF_MAX_SECONDS = _env_float("LLM_BACKOFF_MAX_SECONDS", 30.0, min_value=1.0)
+LLM_TIMEOUT_SECONDS = _env_int("LLM_TIMEOUT_SECONDS", 60, min_value=1)
+LLM_USAGE_REPORT_FILE = os.environ.get("LLM_USAGE_REPORT_FILE", "llm_usage_report.json")
+LLM_RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+LLM_NON_TEXT_BLOCK_TYPES = {"thinking", "redacted_thinking"}
+CJK_CHAR_RE = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+
+class TokenBucket:
+    """线程安全的令牌桶：容量 capacity，每秒补充 rate 个；acquire 在令牌不足时阻塞等待。"""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = max(1.0, float(capacity))
+        self.rate = max(1e-9, float(rate))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0):
+        amount = min(float(amount), self.capacity)
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= amount
+            wait_seconds = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_provider_limits: dict[str, tuple[TokenBucket, TokenBucket]] = {}
+_provider_limits_lock = threading.Lock()
+_concurrency = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+_call_records: list[dict] = []
+_fallbacks: dict[str, int] = {}
+_usage_lock = threading.Lock()
+
+
+def http_session() -> requests.Session:
+    """所有 LLM 请求共享的 keep-alive 连接池"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=LLM_MAX_CONCURRENCY)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def provider_limits(api_base: str) -> tuple[TokenBucket, TokenBucket]:
+    """每个 provider（按 API base 区分）共享一组 requests/min 和 tokens/min 令牌桶"""
+    with _provider_limits_lock:
+        limits = _provider_limits.get(api_base)
+        if limits is None:
+            limits = (
+                TokenBucket(LLM_REQUESTS_PER_MINUTE, LLM_REQUESTS_PER_MINUTE / 60),
+                TokenBucket(LLM_TOKENS_PER_MINUTE, LLM_TOKENS_PER_MINUTE / 60),
+            )
+            _provider_limits[api_base] = limits
+        return limits
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：CJK 字符约 1 token/字，其余约 4 字符/token"""
+    text = text or ""
+    cjk = len(CJK_CHAR_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def chat_completions_url(api_base: str) -> str:
+    if api_base.endswith("/chat/completions"):
+        return api_base
+    return f"{api_base}/chat/completions"
+
+
+def retry_after_seconds(response) -> float | None:
+    """解析 Retry-After（秒数或 HTTP 日期）"""
+    headers = getattr(response, "headers", None)
+    raw = headers.get("Retry-After") if hasattr(headers, "get") else None
+    if not isinstance(raw, str) or not raw.strip():
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(raw)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_seconds(attempt: int, retry_after: float | None = None) -> float:
+    """带抖动的指数退避；服务端给了 Retry-After 时至少等那么久"""
+    ceiling = min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    delay = random.uniform(ceiling / 2, ceiling)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, LLM_BACKOFF_MAX_SECONDS * 2))
+    return delay
+
+
+def extract_response_text(data: dict) -> str | None:
+    choices = data.get("choices", [])
+    if isinstance(choices, list):
+        for choice in choices:
+            if not isinstance(choice, dict):
+                continue
+            message = choice.get("message", {})
+            if isinstance(message, dict):
+                text = extract_llm_content_text(message.get("content"))
+                if text:
+                    return text
+            text = choice.get("text")
+            if isinstance(text, str) and text.strip():
+                return text.strip()
+
+    content = data.get("content", [])
+    text = extract_llm_content_text(content)
+    if text:
+        return text
+
+    for key in ("text", "completion"):
+        text = data.get(key)
+        if isinstance(text, str) and text.strip():
+            return text
+    return None
+
+
+def extract_llm_content_text(content) -> str:
+    if isinstance(content, str):
+        return content.strip()
+    if isinstance(content, list):
+        for block in reversed(content):
+            text = extract_llm_text_block(block)
+            if text:
+                return text
+    return ""
+
+
+def extract_llm_text_block(block) -> str:
+    """Return model-visible text only; never stringify reasoning/tool blocks."""
+    if isinstance(block, str):
+        return block.strip()
+    if not isinstance(block, dict):
+        return ""
+
+    block_type = block.get("type")
+    if isinstance(block_type, str) and block_type in LLM_NON_TEXT_BLOCK_TYPES:
+        return ""
+
+    text = block.get("text")
+    if isinstance(text, str):
+        return text.strip()
+    return ""
+
+
+def prompt_cache_tokens(usage) -> tuple[int, int] | None:
+    """从 usage 解析 provider 前缀缓存的 (命中, 未命中) prompt tokens；没有缓存字段时返回 None"""
+    if not isinstance(usage, dict):
+        return None
+    hit = usage.get("prompt_cache_hit_tokens")
+    miss = usage.get("prompt_cache_miss_tokens")
+    if isinstance(hit, int) and isinstance(miss, int):
+        return hit, miss
+    details = usage.get("prompt_tokens_details")
+    prompt_tokens = usage.get("prompt_tokens")
+    if isinstance(details, dict) and isinstance(details.get("cached_tokens"), int) and isinstance(prompt_tokens, int):
+        return details["cached_tokens"], max(0, prompt_tokens - details["cached_tokens"])
+    return None
+
+
+def record_call(
+    stage: str,
+    outcome: str,
+    *,
+    usage=None,
+    prompt: str = "",
+    latency_ms: float = 0.0,
+    retries: int = 0,
+) -> None:
+    """记录一次 LLM 调用：outcome 为 ok/empty/error/http_error/failed/response_cache"""
+    usage = usage if isinstance(usage, dict) else {}
+    cache_tokens = prompt_cache_tokens(usage)
+    prompt_tokens = usage.get("prompt_tokens")
+    completion_tokens = usage.get("completion_tokens")
+    record = {
+        "stage": stage,
+        "outcome": outcome,
+        "prompt_tokens": prompt_tokens if isinstance(prompt_tokens, int) else 0,
+        "completion_tokens": completion_tokens if isinstance(completion_tokens, int) else 0,
+        "cached_tokens": cache_tokens[0] if cache_tokens else 0,
+        "cache_hit_tokens": cache_tokens[0] if cache_tokens else None,
+        "cache_miss_tokens": cache_tokens[1] if cache_tokens else None,
+        "estimated_prompt_tokens": estimate_tokens(prompt) if prompt else 0,
+        "latency_ms": round(latency_ms, 1),
+        "retries": retries,
+    }
+    with _usage_lock:
+        _call_records.append(record)
+
+
+def record_fallback(stage: str) -> None:
+    """调用方放弃 LLM 结果、改走本地兜底时记一次（如排序回退到播放量）"""
+    with _usage_lock:
+        _fallbacks[stage] = _fallbacks.get(stage, 0) + 1
+
+
+def call_records() -> list[dict]:
+    with _usage_lock:
+        return [dict(record) for record in _call_records]
+
+
+def cache_usage_stats() -> dict[str, dict[str, int]]:
+    stats: dict[str, dict[str, int]] = {}
+    for record in call_records():
+        if record["cache_hit_tokens"] is None:
+            continue
+        counts = stats.setdefault(record["stage"], {"hit_tokens": 0, "miss_tokens": 0})
+        counts["hit_tokens"] += record["cache_hit_tokens"]
+        counts["miss_tokens"] += record["cache_miss_tokens"]
+    return stats
+
+
+def format_cache_usage() -> str:
+    """按阶段汇总前缀缓存命中，例如：前缀缓存命中 rank 3072/4100 tokens（75%）"""
+    parts = []
+    for stage, counts in cache_usage_stats().items():
+        total = counts["hit_tokens"] + counts["miss_tokens"]
+        if total:
+            parts.append(f"{stage} {counts['hit_tokens']}/{total} tokens（{counts['hit_tokens'] / total:.0%}）")
+    return "前缀缓存命中 " + "，".join(parts) if parts else ""
+
+
+def usage_summary() -> dict[str, dict]:
+    """按阶段聚合调用次数、tokens、耗时、重试和兜底次数"""
+    with _usage_lock:
+        fallbacks = dict(_fallbacks)
+    summary: dict[str, dict] = {}
+    for record in call_records():
+        stage = summary.setdefault(record["stage"], {
+            "calls": 0, "response_cache_hits": 0, "failures": 0, "retries": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0,
+            "total_latency_ms": 0.0, "max_latency_ms": 0.0, "fallbacks": 0,
+        })
+        stage["calls"] += 1
+        if record["outcome"] == "response_cache":
+            stage["response_cache_hits"] += 1
+        elif record["outcome"] != "ok":
+            stage["failures"] += 1
+        stage["retries"] += record["retries"]
+        for key in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+            stage[key] += record[key]
+        stage["total_latency_ms"] = round(stage["total_latency_ms"] + record["latency_ms"], 1)
+        stage["max_latency_ms"] = max(stage["max_latency_ms"], record["latency_ms"])
+    for stage_name, count in fallbacks.items():
+        summary.setdefault(stage_name, {
+            "calls": 0, "response_cache_hits": 0, "failures": 0, "retries": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0,
+            "total_latency_ms": 0.0, "max_latency_ms": 0.0, "fallbacks": 0,
+        })["fallbacks"] = count
+    return summary
+
+
+def format_usage_table() -> str:
+    summary = usage_summary()
+    if not summary:
+        return ""
+    header = f"{'stage':<14}{'calls':>6}{'cache':>6}{'fail':>5}{'retry':>6}{'prompt':>9}{'compl':>8}{'cached':>8}{'avg_s':>7}{'max_s':>7}{'fallbk':>7}"
+    lines = [header]
+    for stage, row in sorted(summary.items()):
+        requests_made = row["calls"] - row["response_cache_hits"]
+        average = row["total_latency_ms"] / requests_made / 1000 if requests_made else 0.0
+        lines.append(
+            f"{stage:<14}{row['calls']:>6}{row['response_cache_hits']:>6}{row['failures']:>5}{row['retries']:>6}"
+            f"{row['prompt_tokens']:>9}{row['completion_tokens']:>8}{row['cached_tokens']:>8}"
+            f"{average:>7.1f}{row['max_latency_ms'] / 1000:>7.1f}{row['fallbacks']:>7}"
+        )
+    return "\n".join(lines)
+
+
+def write_usage_report(path: str | Path, run: str) -> None:
+    """把本次运行的用量写入 JSON 报告的 runs[run]，同一文件可容纳多个入口的报告"""
+    path = Path(path)
+    try:
+        report = json.loads(path.read_text()) if path.exists() else {}
+    except (OSError, json.JSONDecodeError):
+        report = {}
+    if not isinstance(report.get("runs"), dict):
+        report = {"runs": {}}
+    report["runs"][run] = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "stages": usage_summary(),
+        "calls": call_records(),
+    }
+    try:
+        path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n")
+    except OSError as e:
+        print(f"  ⚠️ LLM 用量报告写入失败: {e}")
+
+
+def chat_completion(
+    prompt: str,
+    *,
+    api_base: str,
+    api_key: str,
+    model: str,
+    max_tokens: int = 1024,
+    timeout: float = LLM_TIMEOUT_SECONDS,
+    stage: str = "default",
+) -> str | None:
+    """发送单轮 chat completion；429/5xx/超时按退避重试，其余错误直接返回 None。每次调用都记录用量和耗时"""
+    started_at = time.monotonic()
+    text, outcome, usage, retries = _chat_completion_attempts(prompt, api_base, api_key, model, max_tokens, timeout)
+    record_call(
+        stage,
+        outcome,
+        usage=usage,
+        prompt=prompt,
+        latency_ms=(time.monotonic() - started_at) * 1000,
+        retries=retries,
+    )
+    return text
+
+
+def _chat_completion_attempts(
+    prompt: str,
+    api_base: str,
+    api_key: str,
+    model: str,
+    max_tokens: int,
+    timeout: float,
+) -> tuple[str | None, str, dict | None, int]:
+    """返回 (文本, outcome, usage, 重试次数)"""
+    request_limit, token_limit = provider_limits(api_base)
+    attempts = LLM_MAX_RETRIES + 1
+    for attempt in range(attempts):
+        request_limit.acquire()
+        token_limit.acquire(estimate_tokens(prompt) + max_tokens)
+        retry_after = None
+        try:
+            with _concurrency:
+                resp = http_session().post(
+                    chat_completions_url(api_base),
+                    headers={
+                        "Authorization": f"Bearer {api_key}",
+                        "Content-Type": "application/json",
+                    },
+                    json={
+                        "model": model,
+                        "max_tokens": max_tokens,
+                        "messages": [{"role": "user", "content": prompt}],
+                    },
+                    timeout=timeout,
+                )
+            status_code = getattr(resp, "status_code", 200)
+            if not isinstance(status_code, int):
+                status_code = 200
+            if status_code in LLM_RETRYABLE_STATUS_CODES:
+                retry_after = retry_after_seconds(resp)
+                reason = f"HTTP {status_code}"
+            else:
+                data = resp.json()
+                if data.get("error"):
+                    error = data.get("error", {})
+                    print(f"  ⚠️ LLM error: {error.get('message', str(error))}")
+                    return None, "error", None, attempt
+                if status_code >= 400:
+                    print(f"  ⚠️ LLM HTTP error: {status_code}")
+                    return None, "http_error", None, attempt
+                text = extract_response_text(data)
+                return text, "ok" if text else "empty", data.get("usage"), attempt
+        except (requests.Timeout, requests.ConnectionError) as e:
+            reason = type(e).__name__
+        except Exception as e:
+            print(f"  ⚠️ LLM call failed: {e}")
+            return None, "error", None, attempt
+
+        if attempt + 1 >= attempts:
+            print(f"  ⚠️ LLM call failed after {attempts} attempts: {reason}")
+            return None, "failed", None, attempt
+        delay = backoff_seconds(attempt, retry_after)
+        print(f"  ⏳ LLM {reason}，{delay:.1f}s 后重试（{attempt + 1}/{LLM_MAX_RETRIES}）")
+        time.sleep(delay)
+    return None, "failed", None, LLM_MAX_RETRIES
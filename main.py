@@ -8,13 +8,37 @@ YouTube 订阅长视频摘要 → 飞书推送
 import os
 import re
 import json
-import time
+import math
+import asyncio
+import gzip
 import hashlib
+import threading
 import requests
+import requests.adapters
 import xml.etree.ElementTree as ET
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
+from typing import Callable
+from urllib.parse import urlparse
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import llm_cache
+import llm_client
+from keyword_matcher import KeywordMatcher
+from transcript_processing import (
+    compact_caption_events,
+    compression_ratio,
+    fit_transcript_to_budget,
+    format_chapter_transcript,
+    split_into_chunks,
+)
+
+try:
+    from lxml import etree as LXML_ETREE  # 可选：安装后用于加速 RSS 解析
+except ImportError:
+    LXML_ETREE = None
 
 
 def env_bool(name: str, default: bool = False) -> bool:
@@ -55,11 +79,28 @@ MIN_DURATION_MINUTES = env_int("MIN_DURATION_MINUTES", 3, min_value=1)  # 过滤
 TOP_N = env_int("TOP_N", 3, min_value=1)  # 每日推送 Top N 视频
 SUMMARY_MAX_TOKENS = env_int("SUMMARY_MAX_TOKENS", 700, min_value=100)
 SUMMARY_MAX_CHARS = env_int("SUMMARY_MAX_CHARS", 700, min_value=100)
+RANK_PRERANK_TOP_K = env_int("RANK_PRERANK_TOP_K", 25, min_value=1)  # BM25 预排序后送入 LLM 排序的候选数
+# 淘汰赛默认不触发：预排序只送 RANK_PRERANK_TOP_K(25) 个候选，小于分组大小；调大 RANK_PRERANK_TOP_K 或调小 RANK_GROUP_SIZE 才启用
+RANK_GROUP_SIZE = env_int("RANK_GROUP_SIZE", 30, min_value=2)  # 候选超过该数量时改为分组淘汰赛排序
+RANK_PARALLELISM = env_int("RANK_PARALLELISM", 4, min_value=1)
+SUMMARY_BATCH_ENABLED = env_bool("SUMMARY_BATCH_ENABLED", False)  # 描述/短字幕的摘要合并成一次请求
+SUMMARY_BATCH_SIZE = env_int("SUMMARY_BATCH_SIZE", 5, min_value=2)
+SUMMARY_BATCH_MAX_CONTENT_TOKENS = env_int("SUMMARY_BATCH_MAX_CONTENT_TOKENS", 1500, min_value=100)  # 字幕不超过该长度才参与批量摘要
+SUMMARY_TRANSCRIPT_TOKEN_BUDGET = env_int("SUMMARY_TRANSCRIPT_TOKEN_BUDGET", 6000, min_value=500)  # 单次摘要送入的字幕 token 上限
+SUMMARY_MAP_REDUCE_MIN_TOKENS = env_int("SUMMARY_MAP_REDUCE_MIN_TOKENS", 12000, min_value=1000)  # 超过该长度的字幕走 map-reduce
+SUMMARY_MAP_CHUNK_TOKENS = env_int("SUMMARY_MAP_CHUNK_TOKENS", 6000, min_value=500)
+SUMMARY_MAP_MAX_CHUNKS = env_int("SUMMARY_MAP_MAX_CHUNKS", 12, min_value=2)
+SUMMARY_MAP_MAX_TOKENS = env_int("SUMMARY_MAP_MAX_TOKENS", 400, min_value=100)
+SUMMARY_MAP_MAX_FAILED_PERCENT = env_int("SUMMARY_MAP_MAX_FAILED_PERCENT", 25, min_value=0, max_value=100)  # 分段失败超过该比例时改走单次摘要
+MAP_REDUCE_WORKERS = env_int("MAP_REDUCE_WORKERS", 3, min_value=1)
+TRANSCRIPT_WORKERS = env_int("TRANSCRIPT_WORKERS", 2, min_value=1)  # 并发 yt-dlp 字幕抓取数
+SUMMARY_WORKERS = env_int("SUMMARY_WORKERS", 3, min_value=1)  # 并发摘要 LLM 调用数
 LOOKBACK_HOURS = env_int("LOOKBACK_HOURS", 24, min_value=1)
 AIHOT_ENABLED = env_bool("AIHOT_ENABLED", True)
 AIHOT_API_BASE = (os.environ.get("AIHOT_API_BASE") or "https://aihot.virxact.com").rstrip("/")
 AIHOT_TAKE = env_int("AIHOT_TAKE", 3, min_value=0, max_value=20)
-AIHOT_CANDIDATE_TAKE = env_int("AIHOT_CANDIDATE_TAKE", max(30, AIHOT_TAKE * 6), min_value=1, max_value=100)
+AIHOT_CANDIDATE_TAKE = env_int("AIHOT_CANDIDATE_TAKE", max(30, AIHOT_TAKE * 6), min_value=1, max_value=1000)
+AIHOT_API_SAFE_TAKE = 100  # 已确认 API 接受的 take 上限；更大的请求失败时退回该值
 AIHOT_MIN_SCORE = env_int("AIHOT_MIN_SCORE", 0, min_value=0, max_value=100)
 AIHOT_USER_AGENT = os.environ.get("AIHOT_USER_AGENT") or (
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -70,10 +111,50 @@ CHANNELS_FILE = os.environ.get("CHANNELS_FILE", "channels.json")
 PROFILE_FILE = os.environ.get("PROFILE_FILE", "profile.json")
 HISTORY_FILE = os.environ.get("HISTORY_FILE", "history.json")
 HISTORY_MAX_DAYS = env_int("HISTORY_MAX_DAYS", 30, min_value=1)
+RSS_CACHE_FILE = os.environ.get("RSS_CACHE_FILE", "rss_cache.json")
+UPLOAD_PLAYLISTS_FILE = os.environ.get("UPLOAD_PLAYLISTS_FILE", "upload_playlists.json")
+UPLOAD_PLAYLIST_TTL_DAYS = env_int("UPLOAD_PLAYLIST_TTL_DAYS", 90, min_value=1)  # uploads playlist 几乎不变，长 TTL 复核
+CHANNEL_CADENCE_FILE = os.environ.get("CHANNEL_CADENCE_FILE", "channel_cadence.json")
+ADAPTIVE_POLLING_ENABLED = env_bool("ADAPTIVE_POLLING_ENABLED")
+CHANNEL_MAX_STALENESS_HOURS = env_int("CHANNEL_MAX_STALENESS_HOURS", 12, min_value=1)  # 低频频道最长多久必须轮询一次
+CADENCE_MIN_OBSERVATION_DAYS = 7  # 观察满 7 天才开始延后轮询
+CADENCE_POLL_FRACTION = 0.25  # 轮询间隔 = 预计发布间隔 × 0.25
+CADENCE_MAX_UPLOADS = 20
+CADENCE_MAX_RUNS = 10
 YOUTUBE_UPLOADS_PAGE_SIZE = env_int("YOUTUBE_UPLOADS_PAGE_SIZE", 5, min_value=1, max_value=50)
 RSS_RETRY_ATTEMPTS = env_int("RSS_RETRY_ATTEMPTS", 2, min_value=1)
 RSS_RETRY_DELAY_SECONDS = float(os.environ.get("RSS_RETRY_DELAY_SECONDS", "1"))
+RSS_HEDGE_DELAY_SECONDS = float(os.environ.get("RSS_HEDGE_DELAY_SECONDS") or "0")  # >0 时开启对冲请求
+RSS_MAX_CONNECTIONS = env_int("RSS_MAX_CONNECTIONS", 20, min_value=1)  # RSS 连接池大小
+RSS_MAX_PER_HOST = env_int("RSS_MAX_PER_HOST", 10, min_value=1)  # 单个 host 的并发请求上限
+VIDEO_DETAILS_BATCH_SIZE = 50  # videos.list 单次最多 50 个 id
+VIDEO_DETAILS_FULL_PART = "contentDetails,snippet,statistics"
+VIDEO_DETAILS_CACHE_FILE = os.environ.get("VIDEO_DETAILS_CACHE_FILE", "video_details_cache.json")
+TRANSCRIPT_CACHE_DIR = os.environ.get("TRANSCRIPT_CACHE_DIR", "transcript_cache")  # 为空则不缓存字幕
+TRANSCRIPT_CACHE_MAX_MB = env_int("TRANSCRIPT_CACHE_MAX_MB", 10, min_value=1)  # 缓存随 data 分支每次运行拉取和推送，默认保持较小
+TRANSCRIPT_CACHE_INDEX = "index.json"  # 记录每个条目的最近使用时间；CI 从 data 分支恢复时 mtime 会被重置，不能用来做 LRU
+TRANSCRIPT_LANG = "en"
+VIDEO_VIEWS_TTL_HOURS = env_int("VIDEO_VIEWS_TTL_HOURS", 6, min_value=0)  # 播放量缓存有效期；时长和描述不过期
+VIDEO_DETAILS_WORKERS = env_int("VIDEO_DETAILS_WORKERS", 4, min_value=1)
 LOCAL_TIMEZONE = timezone(timedelta(hours=8))
+YOUTUBE_QUOTA_FILE = os.environ.get("YOUTUBE_QUOTA_FILE", "youtube_quota.json")
+YOUTUBE_DAILY_QUOTA_UNITS = env_int("YOUTUBE_DAILY_QUOTA_UNITS", 10000, min_value=1)
+YOUTUBE_QUOTA_RESERVE_UNITS = env_int("YOUTUBE_QUOTA_RESERVE_UNITS", 500, min_value=0)  # 留给同日后续运行
+YOUTUBE_API_UNIT_COSTS = {  # https://developers.google.com/youtube/v3/determine_quota_cost
+    "videos.list": 1,
+    "channels.list": 1,
+    "playlistItems.list": 1,
+}
+try:
+    YOUTUBE_QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")  # YouTube quota 按太平洋时间午夜重置
+except ZoneInfoNotFoundError:
+    YOUTUBE_QUOTA_TIMEZONE = timezone(timedelta(hours=-8))
+RSS_PARSE_CHUNK_SIZE = 16 * 1024
+RSS_PARSE_ERRORS = (ET.ParseError,) + ((LXML_ETREE.XMLSyntaxError,) if LXML_ETREE is not None else ())
+ATOM_ENTRY_TAG = "{http://www.w3.org/2005/Atom}entry"
+ATOM_TITLE_TAG = "{http://www.w3.org/2005/Atom}title"
+ATOM_PUBLISHED_TAG = "{http://www.w3.org/2005/Atom}published"
+YT_VIDEO_ID_TAG = "{http://www.youtube.com/xml/schemas/2015}videoId"
 RSS_HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; youtube-digest/1.0; +https://github.com/Suda202/youtube-digest)",
     "Accept": "application/atom+xml, application/xml;q=0.9, text/xml;q=0.8, */*;q=0.5",
@@ -92,7 +173,6 @@ SUMMARY_PROMPT_LEAK_MARKERS = [
     "max_tokens",
     "messages",
 ]
-LLM_NON_TEXT_BLOCK_TYPES = {"thinking", "redacted_thinking"}
 
 
 def digest_date_label() -> str:
@@ -334,6 +414,42 @@ AIHOT_GENERIC_MODEL_RELEASE_KEYWORDS = [
     "参数", "榜单", "sota", "盲评", "胜率",
 ]
 
+AIHOT_GENERIC_TUTORIAL_KEYWORDS = [
+    "从零开始", "getting started", "beginner tutorial", "安装教程",
+    "api 参数", "向量数据库教程", "rag 调参",
+]
+
+AIHOT_FINANCE_REJECT_KEYWORDS = ["股票", "股价", "估值", "投资机会"]
+
+AIHOT_EXPLORATION_KEYWORDS = ["ai", "llm", "大模型"]
+
+AIHOT_CATEGORY_WEIGHTS = {"ai-products": 4, "industry": 2, "paper": -3}
+AIHOT_BOOST_WEIGHT = 8
+AIHOT_DOWNRANK_WEIGHT = -16
+AIHOT_HINT_PREFER_WEIGHT = 8
+AIHOT_HINT_AVOID_WEIGHT = -12
+# Agent 内容本身常带教程/代码，这几个降权词对 Agent 内容不生效
+AIHOT_AGENT_EXEMPT_DOWNRANK_KEYWORDS = {"从零开始", "教程", "代码实现", "api 参数"}
+AIHOT_LANES = ("agent", "frontier", "business", "exploration")
+
+# 所有静态关键词表，按名称汇总后编译成一个自动机，每条内容只扫描一次
+AIHOT_FEATURE_KEYWORDS = {
+    **{f"interest:{tag}": keywords for tag, _, keywords in AIHOT_INTEREST_KEYWORDS},
+    "downrank": AIHOT_DOWNRANK_KEYWORDS,
+    "hard_reject": AIHOT_HARD_REJECT_KEYWORDS,
+    "agent": AIHOT_AGENT_KEYWORDS,
+    "business": AIHOT_BUSINESS_KEYWORDS,
+    "frontier": AIHOT_FRONTIER_KEYWORDS,
+    "low_value_vertical": AIHOT_LOW_VALUE_VERTICAL_KEYWORDS,
+    "generic_model_release": AIHOT_GENERIC_MODEL_RELEASE_KEYWORDS,
+    "generic_tutorial": AIHOT_GENERIC_TUTORIAL_KEYWORDS,
+    "finance_reject": AIHOT_FINANCE_REJECT_KEYWORDS,
+    "exploration": AIHOT_EXPLORATION_KEYWORDS,
+}
+AIHOT_FEATURE_KEYWORD_SET = tuple(dict.fromkeys(
+    keyword for keywords in AIHOT_FEATURE_KEYWORDS.values() for keyword in keywords
+))
+
 
 def utc_iso_z(dt: datetime) -> str:
     return dt.astimezone(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
@@ -359,18 +475,28 @@ def fetch_aihot_items(
     request_limit = item_limit
     if profile:
         request_limit = max(item_limit, AIHOT_CANDIDATE_TAKE)
-    try:
-        resp = requests.get(
-            f"{AIHOT_API_BASE}/api/public/items",
-            headers={"User-Agent": AIHOT_USER_AGENT},
-            params={"mode": "selected", "since": since, "take": request_limit},
-            timeout=15,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-    except Exception as e:
-        print(f"  ⚠️ AI HOT 拉取失败: {e}")
-        return []
+    # 超过已确认上限的候选池可能被 API 拒绝：失败时退回安全值，降级而不是丢掉整个 AI HOT 板块
+    request_limits = [request_limit]
+    if request_limit > AIHOT_API_SAFE_TAKE:
+        request_limits.append(max(item_limit, AIHOT_API_SAFE_TAKE))
+    data = None
+    for take_limit in request_limits:
+        try:
+            resp = requests.get(
+                f"{AIHOT_API_BASE}/api/public/items",
+                headers={"User-Agent": AIHOT_USER_AGENT},
+                params={"mode": "selected", "since": since, "take": take_limit},
+                timeout=15,
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            break
+        except Exception as e:
+            if take_limit != request_limits[-1]:
+                print(f"  ⚠️ AI HOT 拉取 {take_limit} 条候选失败，退回 {request_limits[-1]} 条: {e}")
+                continue
+            print(f"  ⚠️ AI HOT 拉取失败: {e}")
+            return []
 
     items = []
     for raw_item in data.get("items", []):
@@ -426,126 +552,187 @@ def aihot_item_text(item: dict) -> str:
     ).lower()
 
 
-def is_agent_focused_aihot_item(item: dict) -> bool:
-    text = aihot_item_text(item)
-    return any(keyword_matches(text, keyword) for keyword in AIHOT_AGENT_KEYWORDS)
+@lru_cache(maxsize=64)
+def aihot_keyword_matcher(keywords: tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords, word_boundary=True)
 
 
-def is_business_focused_aihot_item(item: dict) -> bool:
-    text = aihot_item_text(item)
-    return any(keyword_matches(text, keyword) for keyword in AIHOT_BUSINESS_KEYWORDS)
+@lru_cache(maxsize=4096)
+def aihot_keyword_hits(text: str, keywords: tuple[str, ...]) -> frozenset[str]:
+    """text 中命中的关键词（与 keyword_matches 语义一致），同一文本和关键词表只扫描一次"""
+    return frozenset(keywords[i] for i in aihot_keyword_matcher(keywords).matches(text))
 
 
-def score_aihot_item_for_profile(
-    item: dict,
-    profile: dict | None = None,
-    ranking_hints: str = "",
-) -> tuple[float, list[str]]:
-    text = aihot_item_text(item)
-    score = float(item.get("score") or 0)
-    match_tags = []
+@lru_cache(maxsize=4096)
+def aihot_text_features(text: str) -> dict[str, frozenset[str]]:
+    """一次自动机扫描得到每个静态关键词表的命中集合"""
+    hits = aihot_keyword_hits(text, AIHOT_FEATURE_KEYWORD_SET)
+    return {
+        name: frozenset(keyword for keyword in keywords if keyword in hits)
+        for name, keywords in AIHOT_FEATURE_KEYWORDS.items()
+    }
 
-    category = item.get("category")
-    if category == "ai-products":
-        score += 4
-    elif category == "industry":
-        score += 2
-    elif category == "paper":
-        score -= 3
 
-    for tag, weight, keywords in AIHOT_INTEREST_KEYWORDS:
-        if any(keyword_matches(text, keyword) for keyword in keywords):
-            score += weight
-            match_tags.append(tag)
+def aihot_item_features(item: dict) -> dict[str, frozenset[str]]:
+    return aihot_text_features(aihot_item_text(item))
 
-    profile = profile or {}
-    for keyword in profile.get("aihot_boost_keywords", []):
-        if keyword_matches(text, str(keyword)):
-            score += 8
-            match_tags.append(str(keyword))
 
-    downrank_keywords = AIHOT_DOWNRANK_KEYWORDS + [
-        str(keyword) for keyword in profile.get("deprioritize_topics", [])
-    ]
-    agent_focused = is_agent_focused_aihot_item(item)
-    for keyword in downrank_keywords:
-        if agent_focused and keyword in {"从零开始", "教程", "代码实现", "api 参数"}:
-            continue
-        if keyword_matches(text, keyword):
-            score -= 16
+def aihot_profile_hits(text: str, keywords) -> frozenset[str]:
+    return aihot_keyword_hits(text, tuple(str(keyword) for keyword in keywords))
 
+
+def is_agent_focused_aihot_item(item: dict) -> bool:
+    return bool(aihot_item_features(item)["agent"])
+
+
+def is_business_focused_aihot_item(item: dict) -> bool:
+    return bool(aihot_item_features(item)["business"])
+
+
+def aihot_score_columns(profile: dict | None, ranking_hints: str) -> list[tuple[str, str, int, str | None]]:
+    """打分特征列 (类型, 关键词, 权重, 命中时的标签)，顺序即原先逐项累加分数的顺序"""
+    profile = profile or {}
+    columns = [("interest", tag, weight, tag) for tag, weight, _ in AIHOT_INTEREST_KEYWORDS]
+    columns += [
+        ("profile", str(keyword), AIHOT_BOOST_WEIGHT, str(keyword))
+        for keyword in profile.get("aihot_boost_keywords", [])
+    ]
+    columns += [("downrank", keyword, AIHOT_DOWNRANK_WEIGHT, None) for keyword in AIHOT_DOWNRANK_KEYWORDS]
+    columns += [
+        ("profile_downrank", str(keyword), AIHOT_DOWNRANK_WEIGHT, None)
+        for keyword in profile.get("deprioritize_topics", [])
+    ]
     for line in ranking_hints.splitlines():
         label_text = line.split("：", 1)[-1] if "：" in line else ""
         for label in (part.strip() for part in label_text.split("、")):
-            if not label or not keyword_matches(text, label):
+            if not label:
                 continue
             if "回避" in line:
-                score -= 12
+                columns.append(("profile", label, AIHOT_HINT_AVOID_WEIGHT, None))
             elif "偏好" in line:
-                score += 8
-                match_tags.append(label)
-
-    return score, list(dict.fromkeys(match_tags))
+                columns.append(("profile", label, AIHOT_HINT_PREFER_WEIGHT, label))
+    return columns
+
+
+def aihot_hit_columns(text: str, columns: list, profile_keywords: tuple[str, ...]) -> list[int]:
+    """一条内容命中的特征列编号（升序）"""
+    features = aihot_text_features(text)
+    profile_hits = aihot_keyword_hits(text, profile_keywords)
+    agent_focused = bool(features["agent"])
+    hits = []
+    for index, (kind, keyword, _, _) in enumerate(columns):
+        if kind == "interest":
+            hit = bool(features[f"interest:{keyword}"])
+        elif kind == "downrank":
+            hit = keyword in features["downrank"]
+        else:
+            hit = keyword in profile_hits
+        if hit and kind.endswith("downrank") and agent_focused and keyword in AIHOT_AGENT_EXEMPT_DOWNRANK_KEYWORDS:
+            hit = False
+        if hit:
+            hits.append(index)
+    return hits
 
 
-def rank_aihot_items_for_profile(
+def score_aihot_items_for_profile(
     items: list[dict],
     profile: dict | None = None,
     ranking_hints: str = "",
-) -> list[dict]:
-    ranked = []
+) -> list[tuple[float, list[str], str | None]]:
+    """批量打分：特征列和权重只按画像与动态偏好建一次，每条内容只扫描一次文本，再按命中列算出偏好分和分栏。
+
+    分数 = 原始分 + 分类加减分 + 按特征列顺序累加的权重，累加顺序与逐条打分一致，浮点结果完全相同。
+    """
+    columns = aihot_score_columns(profile, ranking_hints)
+    profile_keywords = tuple(dict.fromkeys(keyword for kind, keyword, _, _ in columns if kind.startswith("profile")))
+    weights = [weight for _, _, weight, _ in columns]
+    results = []
     for item in items:
-        preference_score, match_tags = score_aihot_item_for_profile(item, profile, ranking_hints)
-        ranked_item = {**item, "preference_score": preference_score, "match_tags": match_tags}
-        ranked.append(ranked_item)
+        text = aihot_item_text(item)
+        features = aihot_text_features(text)
+        category = item.get("category")
+        base = float(item.get("score") or 0)
+        score = base + (AIHOT_CATEGORY_WEIGHTS.get(category, 0) if isinstance(category, str) else 0)
+        hit_columns = aihot_hit_columns(text, columns, profile_keywords)
+        for index in hit_columns:
+            score += weights[index]
+        lane_flags = [bool(features[name]) for name in AIHOT_LANES]
+        lane_flags[3] = lane_flags[3] and base >= 85
+        lane = AIHOT_LANES[lane_flags.index(True)] if any(lane_flags) else None
+        match_tags = [columns[index][3] for index in hit_columns if columns[index][3] is not None]
+        results.append((score, list(dict.fromkeys(match_tags)), lane))
+    return results
+
+
+def score_aihot_item_for_profile(
+    item: dict,
+    profile: dict | None = None,
+    ranking_hints: str = "",
+) -> tuple[float, list[str]]:
+    score, match_tags, _ = score_aihot_items_for_profile([item], profile, ranking_hints)[0]
+    return score, match_tags
 
+
+def rank_aihot_items_with_lanes(
+    items: list[dict],
+    profile: dict | None = None,
+    ranking_hints: str = "",
+) -> list[tuple[dict, str | None]]:
+    scored = score_aihot_items_for_profile(items, profile, ranking_hints)
+    ranked = [
+        ({**item, "preference_score": preference_score, "match_tags": match_tags}, lane)
+        for item, (preference_score, match_tags, lane) in zip(items, scored)
+    ]
     return sorted(
         ranked,
-        key=lambda item: (item.get("preference_score", 0), item.get("publishedAt") or ""),
+        key=lambda entry: (entry[0].get("preference_score", 0), entry[0].get("publishedAt") or ""),
         reverse=True,
     )
 
 
+def rank_aihot_items_for_profile(
+    items: list[dict],
+    profile: dict | None = None,
+    ranking_hints: str = "",
+) -> list[dict]:
+    return [item for item, _ in rank_aihot_items_with_lanes(items, profile, ranking_hints)]
+
+
 def aihot_item_lane(item: dict) -> str | None:
-    text = aihot_item_text(item)
-    if any(keyword_matches(text, keyword) for keyword in AIHOT_AGENT_KEYWORDS):
+    features = aihot_item_features(item)
+    if features["agent"]:
         return "agent"
-    if any(keyword_matches(text, keyword) for keyword in AIHOT_FRONTIER_KEYWORDS):
+    if features["frontier"]:
         return "frontier"
-    if any(keyword_matches(text, keyword) for keyword in AIHOT_BUSINESS_KEYWORDS):
+    if features["business"]:
         return "business"
     score = float(item.get("score") or 0)
-    if score >= 85 and any(keyword_matches(text, keyword) for keyword in ("ai", "llm", "大模型")):
+    if score >= 85 and features["exploration"]:
         return "exploration"
     return None
 
 
 def passes_aihot_quality_gate(item: dict, profile: dict | None = None) -> bool:
     text = aihot_item_text(item)
-    if any(keyword_matches(text, keyword) for keyword in AIHOT_HARD_REJECT_KEYWORDS):
+    features = aihot_text_features(text)
+    if features["hard_reject"]:
         return False
 
-    agent_focused = is_agent_focused_aihot_item(item)
-    business_focused = is_business_focused_aihot_item(item)
-    if any(keyword_matches(text, keyword) for keyword in AIHOT_LOW_VALUE_VERTICAL_KEYWORDS):
+    agent_focused = bool(features["agent"])
+    business_focused = bool(features["business"])
+    if features["low_value_vertical"]:
         return False
     if not agent_focused and not business_focused:
-        if any(keyword_matches(text, keyword) for keyword in AIHOT_GENERIC_MODEL_RELEASE_KEYWORDS):
+        if features["generic_model_release"]:
             return False
 
-    generic_tutorial = any(keyword_matches(text, keyword) for keyword in (
-        "从零开始", "getting started", "beginner tutorial", "安装教程",
-        "api 参数", "向量数据库教程", "rag 调参",
-    ))
-    if generic_tutorial and not agent_focused:
+    if features["generic_tutorial"] and not agent_focused:
         return False
 
     profile = profile or {}
-    if not agent_focused:
-        for keyword in profile.get("deprioritize_topics", []):
-            if keyword_matches(text, str(keyword)):
-                return False
-    if any(keyword_matches(text, keyword) for keyword in ("股票", "股价", "估值", "投资机会")):
+    if not agent_focused and aihot_profile_hits(text, profile.get("deprioritize_topics", [])):
+        return False
+    if features["finance_reject"]:
         return False
     return aihot_item_lane(item) is not None
 
@@ -578,13 +765,12 @@ def select_aihot_items_for_profile(
 ) -> list[dict]:
     """Select only genuinely useful AI HOT items; returning zero is valid."""
     item_limit = AIHOT_TAKE if take is None else max(0, take)
-    ranked = rank_aihot_items_for_profile(items, profile, ranking_hints)
-    candidates = [item for item in ranked if passes_aihot_quality_gate(item, profile)]
+    ranked = rank_aihot_items_with_lanes(items, profile, ranking_hints)
+    candidates = [(item, lane) for item, lane in ranked if passes_aihot_quality_gate(item, profile)]
 
     exploration_count = 0
     deterministic = []
-    for item in candidates:
-        lane = aihot_item_lane(item)
+    for item, lane in candidates:
         if lane == "exploration":
             if exploration_count >= 2:
                 continue
@@ -603,16 +789,18 @@ def select_aihot_items_for_profile(
     prompt = f"""从 AI HOT 候选中选出真正值得给该用户看的内容。宁缺毋滥，可以返回空数组。
 优先：Agent/Agentic Engineering/Loop Engineering、硅谷正在流行的前沿趋势、有实际产品或商业价值的深度内容。
 保留 Agent 实战教程；排除普通 API/安装教程、节日营销、软广、转售拼接新闻和低信息量内容。
-用户画像：{json.dumps(profile or {}, ensure_ascii=False)}
+只返回 JSON：{{"selected_ids":["id"]}}
+用户画像：{json.dumps(profile or {}, ensure_ascii=False, sort_keys=True)}
 动态偏好：{ranking_hints}
 候选：{json.dumps(prompt_items, ensure_ascii=False)}
-只返回 JSON：{{"selected_ids":["id"]}}
 """
+    candidate_ids = {str(item.get("id") or "") for item in deterministic}
     selected_ids = parse_aihot_selection_response(
-        call_llm(prompt),
-        {str(item.get("id") or "") for item in deterministic},
+        call_llm(prompt, stage="aihot", validate=lambda raw: parse_aihot_selection_response(raw, candidate_ids) is not None),
+        candidate_ids,
     )
     if selected_ids is None:
+        llm_client.record_fallback("aihot")
         return deterministic
     by_id = {str(item.get("id") or ""): item for item in deterministic}
     return [by_id[item_id] for item_id in selected_ids][:item_limit]
@@ -681,6 +869,114 @@ def build_aihot_card_elements(aihot_items: list[dict], enable_feedback: bool = F
     return elements
 
 
+# ============ YouTube API quota ============
+_quota_lock = threading.Lock()
+
+
+def youtube_quota_day(now: datetime | None = None) -> str:
+    return (now or datetime.now(timezone.utc)).astimezone(YOUTUBE_QUOTA_TIMEZONE).strftime("%Y-%m-%d")
+
+
+def new_quota_ledger(now: datetime | None = None) -> dict:
+    return {"day": youtube_quota_day(now), "units": {}, "calls": {}}
+
+
+def load_quota_ledger(now: datetime | None = None) -> dict:
+    """加载当日 YouTube quota 账本；跨过太平洋时间午夜后自动清零。"""
+    path = Path(YOUTUBE_QUOTA_FILE)
+    ledger = None
+    if path.exists():
+        try:
+            ledger = json.loads(path.read_text())
+        except (OSError, json.JSONDecodeError):
+            ledger = None
+    if not isinstance(ledger, dict) or ledger.get("day") != youtube_quota_day(now):
+        return new_quota_ledger(now)
+    ledger.setdefault("units", {})
+    ledger.setdefault("calls", {})
+    return ledger
+
+
+def save_quota_ledger(ledger: dict):
+    Path(YOUTUBE_QUOTA_FILE).write_text(json.dumps(ledger, ensure_ascii=False))
+
+
+def record_quota_usage(ledger: dict | None, endpoint: str, calls: int = 1):
+    """按接口单价记账；请求失败同样计入，YouTube 对无效请求也会扣 quota。"""
+    if ledger is None or calls <= 0:
+        return
+    with _quota_lock:
+        ledger["calls"][endpoint] = ledger["calls"].get(endpoint, 0) + calls
+        ledger["units"][endpoint] = ledger["units"].get(endpoint, 0) + calls * YOUTUBE_API_UNIT_COSTS[endpoint]
+
+
+def quota_units_used(ledger: dict) -> int:
+    return sum(ledger.get("units", {}).values())
+
+
+def quota_units_remaining(ledger: dict) -> int:
+    return max(0, YOUTUBE_DAILY_QUOTA_UNITS - YOUTUBE_QUOTA_RESERVE_UNITS - quota_units_used(ledger))
+
+
+def fallback_quota_cost(channel_count: int) -> int:
+    """RSS 兜底 n 个频道的最坏成本：channels.list 分页 + 每频道一次 playlistItems + 新视频的详情页。"""
+    if channel_count <= 0:
+        return 0
+    channel_pages = -(-channel_count // 50)
+    details_pages = -(-(channel_count * YOUTUBE_UPLOADS_PAGE_SIZE) // VIDEO_DETAILS_BATCH_SIZE)
+    return (
+        channel_pages * YOUTUBE_API_UNIT_COSTS["channels.list"]
+        + channel_count * YOUTUBE_API_UNIT_COSTS["playlistItems.list"]
+        + details_pages * YOUTUBE_API_UNIT_COSTS["videos.list"]
+    )
+
+
+def uncached_video_ids(video_ids, cache: dict) -> list[str]:
+    """视频详情缓存里没有的 id（保持原顺序），只有这些需要完整的 videos.list 查询"""
+    return [vid for vid in dict.fromkeys(video_ids) if vid not in cache]
+
+
+def stale_view_ids(video_ids, cache: dict, now: datetime | None = None) -> list[str]:
+    """缓存命中但播放量超过 VIDEO_VIEWS_TTL_HOURS 的 id（保持原顺序），需要 statistics 请求刷新"""
+    now = now or datetime.now(timezone.utc)
+    views_cutoff = (now - timedelta(hours=VIDEO_VIEWS_TTL_HOURS)).isoformat()
+    return [
+        vid for vid in dict.fromkeys(video_ids)
+        if vid in cache and cache[vid].get("views_fetched_at", "") <= views_cutoff
+    ]
+
+
+def plan_youtube_quota(
+    ledger: dict,
+    details_video_count: int,
+    fallback_channel_count: int = 0,
+    views_refresh_count: int = 0,
+) -> dict:
+    """按剩余 quota 决定本次能做多少调用：先保证 RSS 已发现视频的详情，再刷新缓存里过期的播放量，最后分配 RSS 兜底频道。
+
+    details_video_count 只计视频详情缓存未命中的视频（见 uncached_video_ids），缓存命中不预留 quota；
+    views_refresh_count 是需要刷新播放量的缓存命中视频（见 stale_view_ids），额度不够时沿用缓存播放量。
+    RSS 本身不耗 quota，所以不受预算限制。返回可查询详情的视频数、可刷新播放量的视频数和可兜底的频道数。
+    """
+    remaining = quota_units_remaining(ledger)
+    details_cost = YOUTUBE_API_UNIT_COSTS["videos.list"]
+    details_pages = min(-(-details_video_count // VIDEO_DETAILS_BATCH_SIZE), remaining // details_cost)
+    remaining -= details_pages * details_cost
+    views_pages = min(-(-views_refresh_count // VIDEO_DETAILS_BATCH_SIZE), remaining // details_cost)
+    remaining -= views_pages * details_cost
+
+    fallback_channels = fallback_channel_count
+    while fallback_channels and fallback_quota_cost(fallback_channels) > remaining:
+        fallback_channels -= 1
+
+    return {
+        "details_videos": min(details_video_count, details_pages * VIDEO_DETAILS_BATCH_SIZE),
+        "views_refresh_videos": min(views_refresh_count, views_pages * VIDEO_DETAILS_BATCH_SIZE),
+        "fallback_channels": fallback_channels,
+        "remaining_units": remaining - fallback_quota_cost(fallback_channels),
+    }
+
+
 # ============ YouTube RSS ============
 def uploads_playlist_id_from_channel_id(channel_id: str) -> str:
     """YouTube uploads playlist id is usually UU + channel id without the UC prefix."""
@@ -697,62 +993,377 @@ def rss_urls_for_channel(channel_id: str) -> list[tuple[str, str]]:
     return urls
 
 
-def parse_rss_videos(feed_text: str) -> list[dict]:
-    ns = {
-        "atom": "http://www.w3.org/2005/Atom",
-        "yt": "http://www.youtube.com/xml/schemas/2015",
-        "media": "http://search.yahoo.com/mrss/",
-    }
-    root = ET.fromstring(feed_text)
-    author = root.find("atom:title", ns).text
+def parse_rss_videos(feed: bytes | str) -> list[dict]:
+    """流式解析 YouTube Atom feed，返回最近 LOOKBACK_HOURS 内的视频。
+
+    直接解析响应字节，逐条读取 entry；YouTube feed 按发布时间倒序排列，
+    遇到第一条窗口外的 entry 即停止，后面的内容不再解析。
+    """
+    if isinstance(feed, str):
+        feed = feed.encode("utf-8")
+    parser = (LXML_ETREE or ET).XMLPullParser(events=("start", "end"))
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=LOOKBACK_HOURS)
+    author = None
+    in_entry = False
     videos = []
 
-    for entry in root.findall("atom:entry", ns):
-        published_str = entry.find("atom:published", ns).text
-        if not is_recent(published_str):
-            continue
+    for offset in range(0, len(feed), RSS_PARSE_CHUNK_SIZE):
+        parser.feed(feed[offset:offset + RSS_PARSE_CHUNK_SIZE])
+        for event, elem in parser.read_events():
+            if event == "start":
+                if elem.tag == ATOM_ENTRY_TAG:
+                    in_entry = True
+                continue
+            if elem.tag == ATOM_TITLE_TAG and not in_entry:
+                author = elem.text
+            elif elem.tag == ATOM_ENTRY_TAG:
+                in_entry = False
+                published_str = elem.findtext(ATOM_PUBLISHED_TAG)
+                if datetime.fromisoformat(published_str.replace("Z", "+00:00")) < cutoff:
+                    return videos
+
+                video_id = elem.findtext(YT_VIDEO_ID_TAG)
+                videos.append({
+                    "video_id": video_id,
+                    "title": elem.findtext(ATOM_TITLE_TAG),
+                    "author": author,
+                    "published": published_str,
+                    "url": f"https://www.youtube.com/watch?v={video_id}",
+                })
+                elem.clear()
+
+    parser.close()
+    return videos
 
-        video_id = entry.find("yt:videoId", ns).text
-        title = entry.find("atom:title", ns).text
 
-        videos.append({
-            "video_id": video_id,
-            "title": title,
-            "author": author,
-            "published": published_str,
-            "url": f"https://www.youtube.com/watch?v={video_id}",
-        })
+class RssHttpClient:
+    """RSS 引擎的异步 HTTP 客户端：共享 keep-alive 连接池，并按 host 限制并发。
+
+    requests 是阻塞库，实际请求在事件循环的线程池里执行；连接复用交给共享 Session。
+    阻塞请求无法中途取消：调用方被取消时（如对冲输家被放弃），host 名额一直占到线程真正返回，
+    保证同一 host 的实际并发不超过上限。
+    """
+
+    def __init__(self, session: requests.Session | None = None, max_per_host: int | None = None):
+        self.session = session
+        self.max_per_host = max(1, max_per_host or RSS_MAX_PER_HOST)
+        self.not_modified = 0
+        self.hedged = 0
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+
+    async def get(self, url: str, **kwargs):
+        host = urlparse(url).netloc
+        limit = self._host_limits.setdefault(host, asyncio.Semaphore(self.max_per_host))
+        getter = self.session.get if self.session is not None else requests.get
+        async with limit:
+            request = asyncio.ensure_future(asyncio.to_thread(getter, url, **kwargs))
+            try:
+                return await asyncio.shield(request)
+            except asyncio.CancelledError:
+                await asyncio.wait({request})
+                raise
+
+
+def build_rss_session() -> requests.Session:
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=RSS_MAX_CONNECTIONS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
+
+def load_rss_cache() -> dict:
+    """加载 RSS 条件请求缓存：feed URL → ETag/Last-Modified + 上次解析出的近期视频"""
+    path = Path(RSS_CACHE_FILE)
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_rss_cache(cache: dict):
+    """保存 RSS 缓存，清理超过 HISTORY_MAX_DAYS 未再请求的 feed"""
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=HISTORY_MAX_DAYS)).isoformat()
+    cleaned = {url: entry for url, entry in cache.items() if entry.get("checked_at", "") > cutoff}
+    Path(RSS_CACHE_FILE).write_text(json.dumps(cleaned, ensure_ascii=False))
+
+
+def rss_conditional_headers(cache_entry: dict | None) -> dict:
+    headers = dict(RSS_HEADERS)
+    if cache_entry:
+        if cache_entry.get("etag"):
+            headers["If-None-Match"] = cache_entry["etag"]
+        if cache_entry.get("last_modified"):
+            headers["If-Modified-Since"] = cache_entry["last_modified"]
+    return headers
+
+
+async def fetch_rss_feed(url: str, client: RssHttpClient, cache: dict | None = None) -> list[dict]:
+    """请求单个 feed；命中 304 时复用缓存条目并重新按 is_recent 过滤。"""
+    cache_entry = cache.get(url) if cache is not None else None
+    resp = await client.get(url, headers=rss_conditional_headers(cache_entry), timeout=15)
+    now_iso = datetime.now(timezone.utc).isoformat()
+
+    if resp.status_code == 304 and cache_entry is not None:
+        client.not_modified += 1
+        cache_entry["checked_at"] = now_iso
+        return [dict(video) for video in cache_entry.get("videos", []) if is_recent(video["published"])]
+
+    resp.raise_for_status()
+    videos = parse_rss_videos(resp.content)
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    if cache is not None and (etag or last_modified):
+        # 只需缓存当前窗口内的条目：更早的视频之后也不会重新变成"近期"
+        cache[url] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "videos": [dict(video) for video in videos],
+            "checked_at": now_iso,
+        }
+    elif cache is not None:
+        cache.pop(url, None)
     return videos
 
 
-def fetch_rss_videos(channel_id: str) -> tuple[list[dict], bool]:
-    """从 YouTube RSS 获取频道最新视频，返回 (videos, rss_ok)。"""
+async def fetch_rss_source(
+    source: str,
+    url: str,
+    client: RssHttpClient,
+    cache: dict | None = None,
+) -> tuple[list[dict] | None, str]:
+    """带重试地请求一个 RSS 源，返回 (videos, last_error)；全部尝试失败时 videos 为 None。"""
     max_attempts = max(1, RSS_RETRY_ATTEMPTS)
     last_error = ""
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return await fetch_rss_feed(url, client, cache), ""
+        except RSS_PARSE_ERRORS as e:
+            last_error = f"{source} parse error: {e}"
+        except Exception as e:
+            last_error = f"{source} fetch error: {e}"
+
+        if attempt < max_attempts:
+            await asyncio.sleep(RSS_RETRY_DELAY_SECONDS)
+    return None, last_error
+
+
+async def fetch_rss_hedged(
+    channel_id: str,
+    sources: list[tuple[str, str]],
+    client: RssHttpClient,
+    cache: dict | None = None,
+) -> tuple[list[dict] | None, str]:
+    """对冲请求：channel 源超过 RSS_HEDGE_DELAY_SECONDS 仍无响应时，并行请求 uploads playlist 源。
+
+    取第一个成功的结果并放弃另一个：阻塞中的请求无法中断，会继续占用线程、带宽和 host 名额直到返回，
+    结果直接丢弃；channel 源在延迟内直接失败时，与顺序模式一样改用 uploads playlist。
+    """
+    (primary_source, primary_url), (backup_source, backup_url) = sources[:2]
+    primary = asyncio.create_task(fetch_rss_source(primary_source, primary_url, client, cache))
+    done, _ = await asyncio.wait({primary}, timeout=RSS_HEDGE_DELAY_SECONDS)
+    if done:
+        videos, last_error = primary.result()
+        if videos is not None:
+            return videos, ""
+        print(f"  ⚠️ RSS channel feed failed for {channel_id}, trying uploads playlist RSS")
+        return await fetch_rss_source(backup_source, backup_url, client, cache)
+
+    client.hedged += 1
+    backup = asyncio.create_task(fetch_rss_source(backup_source, backup_url, client, cache))
+    pending = {primary, backup}
+    last_error = ""
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            videos, error = task.result()
+            if videos is not None:
+                for other in pending:
+                    other.cancel()  # 只是不再等待结果；底层请求仍会跑完
+                return videos, ""
+            last_error = error or last_error
+    return None, last_error
+
+
+async def fetch_rss_videos_async(
+    channel_id: str,
+    client: RssHttpClient,
+    cache: dict | None = None,
+) -> tuple[list[dict], bool]:
+    """异步拉取单个频道 RSS，channel 源失败后改用 uploads playlist 源，返回 (videos, rss_ok)。"""
+    sources = rss_urls_for_channel(channel_id)
+    last_error = ""
 
-    for source, url in rss_urls_for_channel(channel_id):
-        for attempt in range(1, max_attempts + 1):
-            try:
-                resp = requests.get(url, headers=RSS_HEADERS, timeout=15)
-                resp.raise_for_status()
-                return parse_rss_videos(resp.text), True
-            except ET.ParseError as e:
-                last_error = f"{source} parse error: {e}"
-            except Exception as e:
-                last_error = f"{source} fetch error: {e}"
-
-            if attempt < max_attempts:
-                time.sleep(RSS_RETRY_DELAY_SECONDS)
-
-        if source == "channel":
-            print(f"  ⚠️ RSS channel feed failed for {channel_id}, trying uploads playlist RSS")
+    if RSS_HEDGE_DELAY_SECONDS > 0 and len(sources) > 1:
+        videos, last_error = await fetch_rss_hedged(channel_id, sources, client, cache)
+        if videos is not None:
+            return videos, True
+    else:
+        for source, url in sources:
+            videos, last_error = await fetch_rss_source(source, url, client, cache)
+            if videos is not None:
+                return videos, True
+            if source == "channel":
+                print(f"  ⚠️ RSS channel feed failed for {channel_id}, trying uploads playlist RSS")
 
     print(f"  ⚠️ RSS fetch failed for {channel_id}: {last_error}")
     return [], False
 
 
-def fetch_channel_upload_playlists(channel_ids: list[str]) -> dict[str, str]:
+def fetch_rss_videos(channel_id: str) -> tuple[list[dict], bool]:
+    """从 YouTube RSS 获取频道最新视频，返回 (videos, rss_ok)。"""
+    return asyncio.run(fetch_rss_videos_async(channel_id, RssHttpClient()))
+
+
+def fetch_all_rss_videos(
+    channel_ids: list[str],
+    cache: dict | None = None,
+) -> dict[str, tuple[list[dict], bool]]:
+    """阶段一 RSS 引擎：在一个事件循环里并发拉取所有频道，复用同一个连接池。
+
+    传入 cache 时使用 ETag/Last-Modified 条件请求，未变化的 feed 直接复用上次解析结果。
+    """
+    async def fetch_one(client: RssHttpClient, channel_id: str) -> tuple[list[dict], bool]:
+        try:
+            return await fetch_rss_videos_async(channel_id, client, cache)
+        except Exception as e:
+            print(f"  ⚠️ {channel_id}: {e}")
+            return [], False
+
+    async def run() -> dict[str, tuple[list[dict], bool]]:
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=RSS_MAX_CONNECTIONS, thread_name_prefix="rss")
+        )
+        with build_rss_session() as session:
+            client = RssHttpClient(session)
+            results = await asyncio.gather(*(fetch_one(client, cid) for cid in channel_ids))
+        if client.not_modified:
+            print(f"   ♻️ {client.not_modified} 个 feed 未变化（304），复用缓存条目")
+        if client.hedged:
+            print(f"   🏁 {client.hedged} 个频道 channel RSS 响应过慢，已并行请求 uploads playlist RSS")
+        return dict(zip(channel_ids, results))
+
+    channel_ids = list(dict.fromkeys(channel_ids))
+    if not channel_ids:
+        return {}
+    return asyncio.run(run())
+
+
+# ============ 频道更新频率（自适应轮询） ============
+def parse_utc_timestamp(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def load_channel_cadence() -> dict:
+    """加载频道更新频率模型：每个频道观察到的发布时间 + 上次成功轮询时间"""
+    path = Path(CHANNEL_CADENCE_FILE)
+    data = {}
+    if path.exists():
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, json.JSONDecodeError):
+            data = {}
+    if not isinstance(data, dict):
+        data = {}
+    channels = data.get("channels") if isinstance(data.get("channels"), dict) else {}
+    runs = data.get("runs") if isinstance(data.get("runs"), list) else []
+    return {"channels": channels, "runs": runs}
+
+
+def save_channel_cadence(cadence: dict):
+    Path(CHANNEL_CADENCE_FILE).write_text(json.dumps(cadence, ensure_ascii=False))
+
+
+def expected_run_gap_hours(cadence: dict, now: datetime) -> float:
+    """按最近几次运行的最大间隔估计下一次运行何时到来（保守取最大值）。"""
+    runs = sorted(filter(None, (parse_utc_timestamp(ts) for ts in cadence.get("runs", []))))
+    runs.append(now)
+    gaps = [(later - earlier).total_seconds() / 3600 for earlier, later in zip(runs, runs[1:])]
+    gaps = [gap for gap in gaps if gap > 0]
+    return max(gaps) if gaps else float(LOOKBACK_HOURS)
+
+
+def channel_poll_interval_hours(record: dict | None, now: datetime) -> float:
+    """根据观察到的发布间隔估计该频道可以隔多久轮询一次；0 表示每次运行都要拉取。
+
+    间隔不会超过 CHANNEL_MAX_STALENESS_HOURS，也不会超过 LOOKBACK_HOURS，
+    保证延后轮询的频道不会有视频掉出时间窗口。
+    """
+    if not record:
+        return 0.0
+    first_seen = parse_utc_timestamp(record.get("first_seen"))
+    if not first_seen or now - first_seen < timedelta(days=CADENCE_MIN_OBSERVATION_DAYS):
+        return 0.0
+
+    uploads = sorted(filter(None, (parse_utc_timestamp(ts) for ts in record.get("uploads", []))))
+    silence_hours = (now - (uploads[-1] if uploads else first_seen)).total_seconds() / 3600
+    expected_gap_hours = silence_hours
+    if len(uploads) >= 2:
+        mean_gap_hours = (uploads[-1] - uploads[0]).total_seconds() / 3600 / (len(uploads) - 1)
+        expected_gap_hours = max(mean_gap_hours, silence_hours)
+
+    max_staleness = min(CHANNEL_MAX_STALENESS_HOURS, LOOKBACK_HOURS)
+    return max(0.0, min(max_staleness, expected_gap_hours * CADENCE_POLL_FRACTION))
+
+
+def plan_channel_polls(channels: list[dict], cadence: dict, now: datetime) -> tuple[list[dict], list[dict]]:
+    """决定本次运行需要拉取的频道，返回 (due, deferred)。
+
+    只有在"距上次轮询 + 预计下次运行间隔"仍不超过该频道轮询间隔时才延后，
+    因此任何频道的未轮询时长都不会超过 CHANNEL_MAX_STALENESS_HOURS。
+    """
+    run_gap_hours = expected_run_gap_hours(cadence, now)
+    records = cadence.get("channels", {})
+    due, deferred = [], []
+    for ch in channels:
+        record = records.get(ch["channel_id"])
+        interval_hours = channel_poll_interval_hours(record, now)
+        last_polled = parse_utc_timestamp((record or {}).get("last_polled"))
+        if interval_hours <= 0 or not last_polled:
+            due.append(ch)
+            continue
+        age_hours = (now - last_polled).total_seconds() / 3600
+        if age_hours + run_gap_hours <= interval_hours:
+            deferred.append(ch)
+        else:
+            due.append(ch)
+    return due, deferred
+
+
+def record_channel_polls(cadence: dict, rss_results: dict[str, tuple[list[dict], bool]], now: datetime):
+    """把本次 RSS 成功拉取的频道和观察到的发布时间写回更新频率模型。"""
+    now_iso = now.isoformat()
+    records = cadence.setdefault("channels", {})
+    for channel_id, (videos, rss_ok) in rss_results.items():
+        if not rss_ok:
+            continue
+        record = records.setdefault(channel_id, {"first_seen": now_iso, "uploads": []})
+        uploads = {
+            parsed.isoformat()
+            for parsed in (parse_utc_timestamp(ts) for ts in record.get("uploads", []))
+            if parsed
+        }
+        for video in videos:
+            published = parse_utc_timestamp(video.get("published"))
+            if published:
+                uploads.add(published.isoformat())
+        record["uploads"] = sorted(uploads)[-CADENCE_MAX_UPLOADS:]
+        record["last_polled"] = now_iso
+    cadence["runs"] = (cadence.get("runs", []) + [now_iso])[-CADENCE_MAX_RUNS:]
+
+
+def fetch_channel_upload_playlists(channel_ids: list[str], ledger: dict | None = None) -> dict[str, str]:
     """通过 YouTube Data API 获取频道 uploads playlist，作为 RSS 失败兜底。"""
     if not YOUTUBE_API_KEY:
         return {}
@@ -760,6 +1371,7 @@ def fetch_channel_upload_playlists(channel_ids: list[str]) -> dict[str, str]:
     playlists = {}
     url = "https://www.googleapis.com/youtube/v3/channels"
     for batch in chunked(channel_ids, 50):
+        record_quota_usage(ledger, "channels.list")
         try:
             resp = requests.get(
                 url,
@@ -789,13 +1401,67 @@ def fetch_channel_upload_playlists(channel_ids: list[str]) -> dict[str, str]:
     return playlists
 
 
-def fetch_upload_playlist_videos(channel_id: str, playlist_id: str) -> list[dict]:
+def load_upload_playlist_cache() -> dict:
+    """加载 channel_id → uploads playlist 缓存（含 API 确认时间）"""
+    path = Path(UPLOAD_PLAYLISTS_FILE)
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_upload_playlist_cache(cache: dict):
+    Path(UPLOAD_PLAYLISTS_FILE).write_text(json.dumps(cache, ensure_ascii=False))
+
+
+def resolve_upload_playlists(channel_ids: list[str], cache: dict, ledger: dict | None = None) -> dict[str, str]:
+    """RSS 兜底用的 uploads playlist：优先用缓存，未确认或超过 TTL 的再查 channels.list。
+
+    新频道先用 uploads_playlist_id_from_channel_id 推导值做种子；API 确认后记录 verified_at，
+    UPLOAD_PLAYLIST_TTL_DAYS 内不再重复查询。API 不可用时退回推导值。
+    """
+    now = datetime.now(timezone.utc)
+    ttl = timedelta(days=UPLOAD_PLAYLIST_TTL_DAYS)
+    playlists = {}
+    to_verify = []
+    for channel_id in channel_ids:
+        entry = cache.get(channel_id) or {}
+        verified_at = parse_utc_timestamp(entry.get("verified_at"))
+        if entry.get("playlist_id") and verified_at and now - verified_at < ttl:
+            playlists[channel_id] = entry["playlist_id"]
+            continue
+        seeded = entry.get("playlist_id") or uploads_playlist_id_from_channel_id(channel_id)
+        if seeded and not entry:
+            cache[channel_id] = {"playlist_id": seeded, "verified_at": None}
+        to_verify.append(channel_id)
+
+    if playlists:
+        print(f"   ♻️ uploads playlist 缓存命中 {len(playlists)} 个频道")
+    if not to_verify:
+        return playlists
+
+    confirmed = fetch_channel_upload_playlists(to_verify, ledger)
+    now_iso = now.isoformat()
+    for channel_id in to_verify:
+        if channel_id in confirmed:
+            cache[channel_id] = {"playlist_id": confirmed[channel_id], "verified_at": now_iso}
+            playlists[channel_id] = confirmed[channel_id]
+        elif (cache.get(channel_id) or {}).get("playlist_id"):
+            playlists[channel_id] = cache[channel_id]["playlist_id"]
+    return playlists
+
+
+def fetch_upload_playlist_videos(channel_id: str, playlist_id: str, ledger: dict | None = None) -> list[dict]:
     """从 uploads playlist 获取最近视频，只作为 RSS 请求失败时的稳定兜底。"""
     if not YOUTUBE_API_KEY:
         return []
 
     max_results = max(1, min(50, YOUTUBE_UPLOADS_PAGE_SIZE))
     url = "https://www.googleapis.com/youtube/v3/playlistItems"
+    record_quota_usage(ledger, "playlistItems.list")
     try:
         resp = requests.get(
             url,
@@ -855,26 +1521,132 @@ def parse_duration(iso_duration: str) -> int:
 
 def get_video_details(video_id: str) -> dict:
     """通过 YouTube Data API 获取视频时长、描述、播放量"""
-    if not YOUTUBE_API_KEY:
-        print("  ⚠️ No YOUTUBE_API_KEY, skipping details fetch")
-        return {"duration": 9999, "description": "", "view_count": 0}
+    return get_videos_details([video_id])[video_id]
+
+
+def fetch_video_details_page(video_ids: list[str], part: str = VIDEO_DETAILS_FULL_PART) -> dict[str, dict] | None:
+    """单次 videos.list 请求最多查询 50 个视频；请求失败时返回 None，成功但未返回的 id 视为已删除或私享。
+
+    part 只含 statistics 时只返回 view_count，用于刷新缓存里过期的播放量。
+    """
     url = "https://www.googleapis.com/youtube/v3/videos"
-    params = {"part": "contentDetails,snippet,statistics", "id": video_id, "key": YOUTUBE_API_KEY}
+    params = {
+        "part": part,
+        "id": ",".join(video_ids),
+        "key": YOUTUBE_API_KEY,
+    }
     try:
         resp = requests.get(url, params=params, timeout=10)
         data = resp.json()
-        item = data["items"][0]
-        duration_str = item["contentDetails"]["duration"]
-        description = item["snippet"].get("description", "")
-        view_count = int(item["statistics"].get("viewCount", 0))
-        return {
-            "duration": parse_duration(duration_str),
-            "description": description,
-            "view_count": view_count,
-        }
+        if data.get("error"):
+            message = data.get("error", {}).get("message", data)
+            print(f"  ⚠️ Details fetch failed: {message}")
+            return None
     except Exception as e:
         print(f"  ⚠️ Details fetch failed: {e}")
-        return {"duration": 0, "description": "", "view_count": 0}
+        return None
+
+    details = {}
+    for item in data.get("items", []):
+        try:
+            record = {}
+            if "contentDetails" in part:
+                record["duration"] = parse_duration(item["contentDetails"]["duration"])
+            if "snippet" in part:
+                record["description"] = item["snippet"].get("description", "")
+            if "statistics" in part:
+                record["view_count"] = int(item.get("statistics", {}).get("viewCount", 0))
+            details[item["id"]] = record
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"  ⚠️ Details parse failed for {item.get('id')}: {e}")
+    return details
+
+
+def load_video_details_cache() -> dict:
+    """加载跨运行的视频详情缓存：video_id → 时长/描述/播放量 + 获取时间"""
+    path = Path(VIDEO_DETAILS_CACHE_FILE)
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_video_details_cache(cache: dict):
+    """保存视频详情缓存，清理超过 HISTORY_MAX_DAYS 未被使用的条目。
+
+    淘汰只看最近使用时间 used_at（旧条目没有时退回 fetched_at）：仍在 RSS 窗口里反复出现的视频不会被清掉重查；
+    fetched_at 是最近一次完整查询详情的时间，views_fetched_at 决定播放量是否按 VIDEO_VIEWS_TTL_HOURS 刷新。
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=HISTORY_MAX_DAYS)).isoformat()
+    cleaned = {
+        vid: entry for vid, entry in cache.items()
+        if (entry.get("used_at") or entry.get("fetched_at", "")) > cutoff
+    }
+    Path(VIDEO_DETAILS_CACHE_FILE).write_text(json.dumps(cleaned, ensure_ascii=False))
+
+
+def get_videos_details(
+    video_ids: list[str],
+    ledger: dict | None = None,
+    cache: dict | None = None,
+    max_views_refresh: int | None = None,
+) -> dict[str, dict]:
+    """批量获取视频详情：按 50 个 id 分页，并发请求各页，返回 video_id → details。
+
+    传入 cache 时，时长和描述视为不可变，直接复用；播放量超过 VIDEO_VIEWS_TTL_HOURS
+    才用只含 statistics 的请求刷新，最多刷新 max_views_refresh 个（quota 预算），其余沿用缓存播放量。请求成功但未返回的视频（已删除、私享）duration 记为 0；
+    所在页请求失败的视频同样 duration 为 0，但带 lookup_failed=True，调用方不应把它们记入 history，
+    下次运行重试。播放量刷新页失败时沿用缓存里的播放量。
+    """
+    video_ids = list(dict.fromkeys(video_ids))
+    if not YOUTUBE_API_KEY:
+        print("  ⚠️ No YOUTUBE_API_KEY, skipping details fetch")
+        return {vid: {"duration": 9999, "description": "", "view_count": 0} for vid in video_ids}
+
+    now = datetime.now(timezone.utc)
+    now_iso = now.isoformat()
+    details = {}
+    failed_ids = set()
+    full_ids = []
+    for vid in video_ids:
+        entry = (cache or {}).get(vid)
+        if not entry:
+            full_ids.append(vid)
+            continue
+        entry["used_at"] = now_iso
+        details[vid] = {key: entry[key] for key in ("duration", "description", "view_count")}
+    views_ids = stale_view_ids(details, cache or {}, now)[:max_views_refresh]
+
+    if details:
+        print(f"   ♻️ 视频详情缓存命中 {len(details)} 个（{len(views_ids)} 个需刷新播放量）")
+
+    pages = [(page, VIDEO_DETAILS_FULL_PART) for page in chunked(full_ids, VIDEO_DETAILS_BATCH_SIZE)]
+    pages += [(page, "statistics") for page in chunked(views_ids, VIDEO_DETAILS_BATCH_SIZE)]
+    record_quota_usage(ledger, "videos.list", len(pages))
+    with ThreadPoolExecutor(max_workers=max(1, min(VIDEO_DETAILS_WORKERS, len(pages) or 1))) as executor:
+        results = executor.map(lambda page: fetch_video_details_page(*page), pages)
+        for (page, part), page_details in zip(pages, results):
+            if page_details is None:
+                if part == VIDEO_DETAILS_FULL_PART:
+                    failed_ids.update(page)
+                continue
+            for vid, fields in page_details.items():
+                details[vid] = {**details.get(vid, {}), **fields}
+                if cache is None:
+                    continue
+                if part == VIDEO_DETAILS_FULL_PART:
+                    cache[vid] = {**details[vid], "fetched_at": now_iso, "views_fetched_at": now_iso, "used_at": now_iso}
+                elif vid in cache:
+                    cache[vid].update(view_count=fields["view_count"], views_fetched_at=now_iso)
+
+    missing = {"duration": 0, "description": "", "view_count": 0}
+    return {
+        vid: details.get(vid) or ({**missing, "lookup_failed": True} if vid in failed_ids else dict(missing))
+        for vid in video_ids
+    }
 
 
 def format_duration(seconds: int) -> str:
@@ -888,182 +1660,678 @@ def format_duration(seconds: int) -> str:
 _yt_cookies_file = os.environ.get("YT_COOKIES_FILE", "")
 
 
-def get_transcript(video_id: str) -> str | None:
-    """通过 yt-dlp 获取视频字幕文本（优先手动字幕，其次自动生成）"""
+_transcript_cache_lock = threading.Lock()
+
+
+def transcript_cache_path(video_id: str, lang: str = TRANSCRIPT_LANG) -> Path:
+    """字幕缓存按 (video_id, lang) 内容寻址，文件为 gzip 压缩的 JSON"""
+    digest = hashlib.sha256(f"{video_id}:{lang}".encode("utf-8")).hexdigest()
+    return Path(TRANSCRIPT_CACHE_DIR) / f"{digest}.json.gz"
+
+
+def _read_transcript_cache_index() -> dict[str, str]:
     try:
-        import yt_dlp
-        ydl_opts = {
-            'skip_download': True,
-            'writesubtitles': True,
-            'writeautomaticsub': True,
-            'subtitleslangs': ['en'],
-            'quiet': True,
-            'no_warnings': True,
-            'ignore_no_formats_error': True,
-            'remote_components': {'ejs': 'github'},
-        }
-        # 支持 cookies：环境变量指定文件路径，或本地自动读 Chrome
-        if _yt_cookies_file and os.path.exists(_yt_cookies_file):
-            ydl_opts['cookiefile'] = _yt_cookies_file
-        else:
-            ydl_opts['cookiesfrombrowser'] = ('chrome',)
+        index = json.loads((Path(TRANSCRIPT_CACHE_DIR) / TRANSCRIPT_CACHE_INDEX).read_text())
+    except (OSError, ValueError):
+        return {}
+    return {name: str(used_at) for name, used_at in index.items()} if isinstance(index, dict) else {}
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(
-                f'https://www.youtube.com/watch?v={video_id}', download=False
-            )
-            subs = info.get('subtitles', {})
-            auto_subs = info.get('automatic_captions', {})
-            en_subs = subs.get('en') or auto_subs.get('en')
-            if not en_subs:
-                return None
-            for fmt in en_subs:
-                if fmt.get('ext') == 'json3':
-                    resp = requests.get(fmt['url'], timeout=15)
-                    data = resp.json()
-                    texts = []
-                    for e in data.get('events', []):
-                        for s in e.get('segs', []):
-                            t = s.get('utf8', '').strip()
-                            if t and t != '\n':
-                                texts.append(t)
-                    text = ' '.join(texts)
-                    if len(text) > 80000:
-                        text = text[:80000] + ' ...[truncated]'
-                    return text if len(text) > 100 else None
+
+def _write_transcript_cache_index(index: dict[str, str]):
+    path = Path(TRANSCRIPT_CACHE_DIR) / TRANSCRIPT_CACHE_INDEX
+    tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    tmp_path.write_text(json.dumps(index, sort_keys=True, separators=(",", ":")))
+    os.replace(tmp_path, path)
+
+
+def touch_transcript_cache(path: Path):
+    """在索引里记录条目的最近使用时间，供 LRU 淘汰使用"""
+    with _transcript_cache_lock:
+        index = _read_transcript_cache_index()
+        index[path.name] = datetime.now(timezone.utc).isoformat()
+        try:
+            _write_transcript_cache_index(index)
+        except OSError as e:
+            print(f"      ⚠️ 字幕缓存索引写入失败: {e}")
+
+
+def load_cached_transcript(video_id: str, lang: str = TRANSCRIPT_LANG) -> dict | None:
+    """读取字幕缓存；命中时在索引里刷新最近使用时间"""
+    if not TRANSCRIPT_CACHE_DIR:
+        return None
+    path = transcript_cache_path(video_id, lang)
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
         return None
+    if record.get("video_id") != video_id or record.get("lang") != lang:
+        return None
+    touch_transcript_cache(path)
+    return record
+
+
+def save_cached_transcript(record: dict):
+    if not TRANSCRIPT_CACHE_DIR:
+        return
+    path = transcript_cache_path(record["video_id"], record["lang"])
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"      ⚠️ 字幕缓存写入失败: {e}")
+        return
+    touch_transcript_cache(path)
+    evict_transcript_cache()
+
+
+def evict_transcript_cache(max_bytes: int | None = None):
+    """超过 TRANSCRIPT_CACHE_MAX_MB 时按索引里的最近使用时间从最久未用的开始删除；不在索引里的条目最先删除"""
+    if max_bytes is None:
+        max_bytes = TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024
+    with _transcript_cache_lock:
+        index = _read_transcript_cache_index()
+        entries = []
+        for path in Path(TRANSCRIPT_CACHE_DIR).glob("*.json.gz"):
+            try:
+                size = path.stat().st_size
+            except OSError:
+                continue
+            entries.append((index.get(path.name, ""), size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+        live = {path.name for _, _, path in entries if path.exists()}
+        if set(index) - live:
+            try:
+                _write_transcript_cache_index({name: used_at for name, used_at in index.items() if name in live})
+            except OSError as e:
+                print(f"      ⚠️ 字幕缓存索引写入失败: {e}")
+
+
+def transcript_text(record: dict) -> str:
+    return ' '.join(text for _, text in record.get("events", []))
+
+
+def fetch_transcript_record(video_id: str, lang: str = TRANSCRIPT_LANG) -> dict | None:
+    """通过 yt-dlp 获取字幕事件（优先手动字幕，其次自动生成），返回可缓存的记录"""
+    import yt_dlp
+    ydl_opts = {
+        'skip_download': True,
+        'writesubtitles': True,
+        'writeautomaticsub': True,
+        'subtitleslangs': [lang],
+        'quiet': True,
+        'no_warnings': True,
+        'ignore_no_formats_error': True,
+        'remote_components': {'ejs': 'github'},
+    }
+    # 支持 cookies：环境变量指定文件路径，或本地自动读 Chrome
+    if _yt_cookies_file and os.path.exists(_yt_cookies_file):
+        ydl_opts['cookiefile'] = _yt_cookies_file
+    else:
+        ydl_opts['cookiesfrombrowser'] = ('chrome',)
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(
+            f'https://www.youtube.com/watch?v={video_id}', download=False
+        )
+    subs = (info.get('subtitles') or {}).get(lang)
+    source = "subtitles"
+    if not subs:
+        subs = (info.get('automatic_captions') or {}).get(lang)
+        source = "automatic_captions"
+    if not subs:
+        return None
+    for fmt in subs:
+        if fmt.get('ext') == 'json3':
+            resp = requests.get(fmt['url'], timeout=15)
+            data = resp.json()
+            events = []
+            for e in data.get('events', []):
+                texts = []
+                for seg in e.get('segs', []):
+                    t = seg.get('utf8', '').strip()
+                    if t and t != '\n':
+                        texts.append(t)
+                if texts:
+                    events.append([int(e.get('tStartMs') or 0), ' '.join(texts)])
+            chapters = [
+                {"start_ms": int(float(chapter.get('start_time') or 0) * 1000), "title": str(chapter.get('title') or "").strip()}
+                for chapter in info.get('chapters') or []
+                if isinstance(chapter, dict)
+            ]
+            return {
+                "video_id": video_id,
+                "lang": lang,
+                "source": source,
+                "events": events,
+                "chapters": chapters,
+                "fetched_at": datetime.now(timezone.utc).isoformat(),
+            }
+    return None
+
+
+def get_transcript(video_id: str) -> str | None:
+    """获取视频字幕文本：先查本地压缩缓存，未命中再走 yt-dlp"""
+    try:
+        record = load_cached_transcript(video_id)
+        if record is None:
+            record = fetch_transcript_record(video_id)
+            if record is None:
+                return None
+            save_cached_transcript(record)
+        else:
+            print(f"      💾 字幕缓存命中（{record.get('source')}）")
+        raw_text = transcript_text(record)
+        events = compact_caption_events(record.get("events", []))
+        text = ' '.join(text for _, text in events)
+        if raw_text:
+            print(f"      🗜️ 字幕压缩 {len(raw_text)} → {len(text)} 字符（-{compression_ratio(raw_text, text):.0%}）")
+        chapters = record.get("chapters") or []
+        if len(chapters) >= 2:
+            # 有章节时输出带小标题的结构化文本，摘要预算按章节分配
+            text = format_chapter_transcript(events, chapters)
+        return text if len(text) > 100 else None
     except Exception as e:
         print(f"      ⚠️ 字幕获取失败: {e}")
         return None
 
 
 # ============ 摘要 LLM ============
+def summarize_transcript_chunk(title: str, author: str, chunk: str, index: int, total: int) -> str | None:
+    prompt = f"""用中文提炼文末这段视频字幕的要点，之后会和其他段合并成全片摘要。
+
+要求：
+- 最多 5 条，每条一行，以"- "开头，每条不超过 60 个中文字符
+- 保留具体观点、案例和数据，略过寒暄、广告和重复内容
+- 只输出要点，不要前言或总结
+
+视频：《{title}》（频道：{author}），字幕的第 {index}/{total} 段：
+{chunk}"""
+    return call_llm(prompt, max_tokens=SUMMARY_MAP_MAX_TOKENS, stage="summary_map")
+
+
+def map_transcript_chunks(title: str, author: str, transcript: str) -> str | None:
+    """map 阶段：长字幕分段并发提炼要点，返回按时间顺序拼接的分段笔记。
+
+    失败的分段逐条打日志；失败超过 SUMMARY_MAP_MAX_FAILED_PERCENT 时返回 None，
+    由调用方改走单次摘要，避免摘要悄悄漏掉整段内容。
+    """
+    chunks = split_into_chunks(transcript, SUMMARY_MAP_CHUNK_TOKENS, SUMMARY_MAP_MAX_CHUNKS)
+    print(f"      🧩 长字幕分 {len(chunks)} 段并发提炼")
+    with ThreadPoolExecutor(max_workers=MAP_REDUCE_WORKERS, thread_name_prefix="summary-map") as pool:
+        notes = list(pool.map(
+            lambda item: summarize_transcript_chunk(title, author, item[1], item[0], len(chunks)),
+            enumerate(chunks, 1),
+        ))
+    sections = []
+    for i, note in enumerate(notes, 1):
+        if note and note.strip():
+            sections.append(f"【第 {i}/{len(chunks)} 段】\n{note.strip()}")
+        else:
+            print(f"      ⚠️ 第 {i}/{len(chunks)} 段提炼失败，已跳过")
+    failed = len(chunks) - len(sections)
+    if failed * 100 > len(chunks) * SUMMARY_MAP_MAX_FAILED_PERCENT:
+        print(f"      ⚠️ {failed}/{len(chunks)} 段提炼失败，超过 {SUMMARY_MAP_MAX_FAILED_PERCENT}%，改用抽样字幕")
+        return None
+    return "\n\n".join(sections)
+
+
+SUMMARY_FORMAT_RULES = """格式要求（纯文本，不要 markdown）：
+- 第一行用"结论："开头，用一句话说明这条视频最值得看的观点
+- 用（1）（2）（3）编号列出最多 3 个要点，每条不超过 45 个中文字符
+- 优先提炼产品策略、用户洞察、商业化、AI 应用趋势、创意/广告智能体相关内容
+- 不展开融资、估值、股票、基金、代码实现、模型架构、API 参数等细节；如果无法避开，只用一句话带过
+- 最后一行用"适合："开头，说明适合什么场景下观看
+- 全文控制在 350 个中文字符以内，不要出现"一句话总结"、"关键要点"、"总结"等格式标签"""
+
+
 def summarize_with_llm(title: str, author: str, content: str, content_type: str = "字幕") -> dict:
     """基于字幕或描述生成结构化摘要"""
     if not DEEPSEEK_API_KEY:
         return {"summary": "⚠️ 未配置 DEEPSEEK_API_KEY，跳过摘要"}
 
-    if len(content) > 80000:
-        content = content[:80000] + "\n...[truncated]"
+    content_tokens = llm_client.estimate_tokens(content)
+    if content_type == "字幕" and content_tokens > SUMMARY_MAP_REDUCE_MIN_TOKENS:
+        notes = map_transcript_chunks(title, author, content)
+        if notes:
+            content, content_type = notes, "分段笔记"
+            content_tokens = llm_client.estimate_tokens(content)
+        else:
+            llm_client.record_fallback("summary_map")
+    if content_tokens > SUMMARY_TRANSCRIPT_TOKEN_BUDGET:
+        content = fit_transcript_to_budget(content, SUMMARY_TRANSCRIPT_TOKEN_BUDGET)
+        print(f"      ✂️ {content_type}约 {content_tokens} tokens，均匀抽样到 {llm_client.estimate_tokens(content)} tokens")
 
-    prompt = f"""根据以下视频{content_type}，生成一份便于快速判断是否值得观看的中文短摘要。
+    chapter_note = "（按章节分段，【章节 时间｜标题】标明所属章节，摘要要兼顾各章节）" if "【章节 " in content else ""
+    prompt = f"""根据以下视频的字幕、描述或分段笔记（见文末），生成一份便于快速判断是否值得观看的中文短摘要。
+
+{SUMMARY_FORMAT_RULES}
 
 视频标题：{title}
 频道：{author}
 
-视频{content_type}：
-{content}
-
-格式要求（纯文本，不要 markdown）：
-- 第一行用"结论："开头，用一句话说明这条视频最值得看的观点
-- 用（1）（2）（3）编号列出最多 3 个要点，每条不超过 45 个中文字符
-- 优先提炼产品策略、用户洞察、商业化、AI 应用趋势、创意/广告智能体相关内容
-- 不展开融资、估值、股票、基金、代码实现、模型架构、API 参数等细节；如果无法避开，只用一句话带过
-- 最后一行用"适合："开头，说明适合什么场景下观看
-- 全文控制在 350 个中文字符以内，不要出现"一句话总结"、"关键要点"、"总结"等格式标签"""
+视频{content_type}：{chapter_note}
+{content}"""
 
-    result = call_llm(prompt, max_tokens=SUMMARY_MAX_TOKENS)
+    result = call_llm(
+        prompt,
+        max_tokens=SUMMARY_MAX_TOKENS,
+        stage="summary",
+        validate=lambda raw: sanitize_summary_text(raw) not in ("", SUMMARY_PROMPT_LEAK_FALLBACK),
+    )
     if result:
         summary = sanitize_summary_text(result)
         if summary == SUMMARY_PROMPT_LEAK_FALLBACK:
             print("  ⚠️ LLM 摘要疑似泄露提示词，已隐藏")
         return {"summary": summary}
+    llm_client.record_fallback("summary")
     return {"summary": "摘要生成失败"}
 
 
+def summarize_video(video: dict, transcript: str | None) -> str:
+    """摘要优先用字幕（内容最完整），fallback 到 description"""
+    if transcript:
+        return summarize_with_llm(video["title"], video["author"], transcript, "字幕")["summary"]
+    if video["description"] and len(video["description"]) > 50:
+        print(f"      ⚠️ 无字幕，使用 description: {video['title']}")
+        return summarize_with_llm(video["title"], video["author"], video["description"], "描述")["summary"]
+    return "⚠️ 无字幕且描述信息不足，请直接观看"
+
+
+def summary_batch_content(video: dict, transcript: str | None) -> tuple[str, str] | None:
+    """适合批量摘要的廉价情况：只有描述，或字幕很短；返回 (内容, 内容类型)"""
+    if transcript:
+        if llm_client.estimate_tokens(transcript) <= SUMMARY_BATCH_MAX_CONTENT_TOKENS:
+            return transcript, "字幕"
+        return None
+    if video["description"] and len(video["description"]) > 50:
+        return video["description"], "描述"
+    return None
+
+
+def parse_summary_batch_response(raw: str | None, video_ids: set[str]) -> dict[str, str] | None:
+    if not raw:
+        return None
+    text = str(raw).strip()
+    fenced = re.fullmatch(r"```(?:json)?\s*(.*?)\s*```", text, flags=re.DOTALL | re.IGNORECASE)
+    if fenced:
+        text = fenced.group(1)
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(payload, dict) or not isinstance(payload.get("summaries"), dict):
+        return None
+    return {
+        str(video_id): summary.strip()
+        for video_id, summary in payload["summaries"].items()
+        if str(video_id) in video_ids and isinstance(summary, str) and summary.strip()
+    }
+
+
+def summarize_video_batch(entries: list[tuple[dict, str | None]]) -> list[str]:
+    """把多条廉价摘要合并成一次 LLM 调用（JSON 按 video_id 返回）；解析失败或缺失的视频逐条兜底"""
+    if len(entries) == 1 or not DEEPSEEK_API_KEY:
+        return [summarize_video(video, transcript) for video, transcript in entries]
+
+    blocks = []
+    for video, transcript in entries:
+        content, content_type = summary_batch_content(video, transcript)
+        blocks.append(f"""视频 ID：{video['video_id']}
+视频标题：{video['title']}
+频道：{video['author']}
+视频{content_type}：
+{content}""")
+    separator = "\n\n---\n\n"
+    prompt = f"""根据以下多个视频的字幕或描述（见文末），分别生成便于快速判断是否值得观看的中文短摘要。
+
+每条摘要都遵守以下要求：
+{SUMMARY_FORMAT_RULES}
+
+只返回 JSON，键为视频 ID，值为该视频的摘要纯文本（换行用 \\n）：{{"summaries":{{"视频 ID":"摘要"}}}}
+
+以下是 {len(entries)} 个视频：
+
+{separator.join(blocks)}"""
+
+    print(f"   📦 批量摘要 {len(entries)} 个视频")
+    video_ids = {video["video_id"] for video, _ in entries}
+    parsed = parse_summary_batch_response(
+        call_llm(
+            prompt,
+            max_tokens=SUMMARY_MAX_TOKENS * len(entries),
+            stage="summary_batch",
+            validate=lambda raw: parse_summary_batch_response(raw, video_ids) is not None,
+        ),
+        video_ids,
+    )
+    if parsed is None:
+        print("      ⚠️ 批量摘要解析失败，改为逐条摘要")
+        parsed = {}
+
+    summaries = []
+    for video, transcript in entries:
+        summary = sanitize_summary_text(parsed.get(video["video_id"], ""))
+        if not summary or summary == SUMMARY_PROMPT_LEAK_FALLBACK:
+            llm_client.record_fallback("summary_batch")
+            summary = summarize_video(video, transcript)
+        summaries.append(summary)
+    return summaries
+
+
+def summarize_top_videos(top_videos: list[dict]) -> list[dict]:
+    """阶段三流水线：字幕抓取与 LLM 摘要分别在两个有界线程池里并发执行。
+
+    每条字幕一就绪就提交摘要，不必等其他视频；结果按 top_videos 的排名顺序返回。
+    """
+    summaries = ["摘要生成失败"] * len(top_videos)
+    with ThreadPoolExecutor(max_workers=TRANSCRIPT_WORKERS, thread_name_prefix="transcript") as transcript_pool, \
+         ThreadPoolExecutor(max_workers=SUMMARY_WORKERS, thread_name_prefix="summary") as summary_pool:
+        transcript_futures = {}
+        for i, video in enumerate(top_videos):
+            print(f"   📝 生成摘要: {video['title']}")
+            transcript_futures[transcript_pool.submit(get_transcript, video["video_id"])] = i
+
+        summary_futures = {}
+        batch_entries = []
+        for future in as_completed(transcript_futures):
+            i = transcript_futures[future]
+            try:
+                transcript = future.result()
+            except Exception as e:
+                print(f"      ⚠️ 字幕获取失败: {e}")
+                transcript = None
+            if SUMMARY_BATCH_ENABLED and summary_batch_content(top_videos[i], transcript):
+                batch_entries.append((i, transcript))
+                continue
+            summary_futures[summary_pool.submit(summarize_video, top_videos[i], transcript)] = [i]
+
+        # 描述/短字幕攒齐后按排名顺序分批提交，一次请求摘要多个视频；顺序固定，prompt 才能命中缓存
+        batch_entries.sort(key=lambda entry: entry[0])
+        for start in range(0, len(batch_entries), SUMMARY_BATCH_SIZE):
+            batch = batch_entries[start:start + SUMMARY_BATCH_SIZE]
+            future = summary_pool.submit(summarize_video_batch, [(top_videos[i], transcript) for i, transcript in batch])
+            summary_futures[future] = [i for i, _ in batch]
+
+        for future, indexes in summary_futures.items():
+            try:
+                result = future.result()
+                for i, summary in zip(indexes, result if isinstance(result, list) else [result]):
+                    summaries[i] = summary
+            except Exception as e:
+                print(f"      ⚠️ 摘要生成异常: {e}")
+
+    return [{"video": video, "summary": summary} for video, summary in zip(top_videos, summaries)]
+
+
 def llm_chat_completions_url() -> str:
-    if DEEPSEEK_API_BASE.endswith("/chat/completions"):
-        return DEEPSEEK_API_BASE
-    return f"{DEEPSEEK_API_BASE}/chat/completions"
+    return llm_client.chat_completions_url(DEEPSEEK_API_BASE)
 
 
-def call_llm(prompt: str, max_tokens: int = 1024) -> str | None:
-    """调用 OpenAI 兼容摘要 LLM，返回文本结果"""
+def call_llm(
+    prompt: str,
+    max_tokens: int = 1024,
+    stage: str = "default",
+    validate: Callable[[str], bool] | None = None,
+) -> str | None:
+    """调用 OpenAI 兼容摘要 LLM，返回文本结果；相同 model/max_tokens/prompt 命中响应缓存时不发请求。
+
+    各阶段的 prompt 都把固定指令和画像放在前面、当次的候选或视频内容放在文末，
+    前缀保持字节稳定才能命中 provider 的前缀缓存。
+    validate 是调用方的校验函数：返回 False 的响应照常返回给调用方，但不写入缓存，重跑时会重新请求。
+    """
     if not DEEPSEEK_API_KEY:
         return None
-    try:
-        resp = requests.post(
-            llm_chat_completions_url(),
-            headers={
-                "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": DEEPSEEK_MODEL,
-                "max_tokens": max_tokens,
-                "messages": [{"role": "user", "content": prompt}],
-            },
-            timeout=60,
+    cached = llm_cache.get(DEEPSEEK_MODEL, max_tokens, prompt, stage)
+    if cached is not None:
+        llm_client.record_call(stage, "response_cache", prompt=prompt)
+        return cached
+    result = llm_client.chat_completion(
+        prompt,
+        api_base=DEEPSEEK_API_BASE,
+        api_key=DEEPSEEK_API_KEY,
+        model=DEEPSEEK_MODEL,
+        max_tokens=max_tokens,
+        stage=stage,
+    )
+    if result and (validate is None or validate(result)):
+        llm_cache.put(DEEPSEEK_MODEL, max_tokens, prompt, result)
+    return result
+
+
+# ============ 候选预过滤（硬规则） ============
+PREFILTER_PROFILE_KEYS = ("preferred_channels", "exclude_title_patterns", "exclude_content_patterns", "channel_filters")
+
+
+@lru_cache(maxsize=8)
+def _compile_profile_filters(profile_key: str) -> dict:
+    rules = json.loads(profile_key)
+    channel_filters = rules.get("channel_filters") or {}
+    return {
+        "exclude_title": KeywordMatcher(rules.get("exclude_title_patterns") or []),
+        "exclude_content": KeywordMatcher(rules.get("exclude_content_patterns") or []),
+        "preferred": KeywordMatcher(set(rules.get("preferred_channels") or [])),
+        "channel_names": KeywordMatcher(channel_filters),
+        "channel_rules": [{
+            "name": ch_name,
+            "min_duration": ch_rule.get("min_duration_seconds", 0),
+            "exclude_title": KeywordMatcher(ch_rule.get("exclude_title_keywords", [])),
+            "exclude_description": KeywordMatcher(ch_rule.get("exclude_description_keywords", [])),
+            "require_title": KeywordMatcher(ch_rule.get("require_title_keywords", [])),
+        } for ch_name, ch_rule in channel_filters.items()],
+        "authors": {},
+    }
+
+
+def compile_profile_filters(profile: dict) -> dict:
+    """把画像里的预过滤规则编译成关键词自动机；同一份规则（按内容）只编译一次"""
+    rules = {key: profile.get(key) for key in PREFILTER_PROFILE_KEYS}
+    # 不排序键：channel_filters 的顺序决定多条规则命中同一作者时先用哪条
+    return _compile_profile_filters(json.dumps(rules, ensure_ascii=False))
+
+
+def author_filter_rules(engine: dict, author: str) -> tuple[bool, list[dict]]:
+    """返回 (是否常看频道, 按画像顺序命中的频道规则)，同一作者只匹配一次"""
+    cached = engine["authors"].get(author)
+    if cached is None:
+        cached = (
+            engine["preferred"].search(author),
+            [engine["channel_rules"][i] for i in sorted(engine["channel_names"].matches(author))],
         )
-        data = resp.json()
-        if data.get("error"):
-            error = data.get("error", {})
-            print(f"  ⚠️ LLM error: {error.get('message', str(error))}")
-            return None
-        status_code = getattr(resp, "status_code", 200)
-        if isinstance(status_code, int) and status_code >= 400:
-            print(f"  ⚠️ LLM HTTP error: {status_code}")
-            return None
+        engine["authors"][author] = cached
+    return cached
+
+
+def channel_rule_rejection(rule: dict, video: dict) -> str | None:
+    ch_name = rule["name"]
+    duration_value = video.get("duration_sec", video.get("duration_seconds", 0))
+    if rule["min_duration"] and duration_value < rule["min_duration"]:
+        return f"{ch_name} 时长过短"
+    if rule["exclude_title"].search(video["title"]):
+        return f"{ch_name} 排除主题"
+    if rule["exclude_description"].search(video.get("description") or ""):
+        return f"{ch_name} 描述排除主题"
+    if rule["require_title"] and not rule["require_title"].search(video["title"]):
+        return f"{ch_name} 非目标内容"
+    return None
 
-        choices = data.get("choices", [])
-        if isinstance(choices, list):
-            for choice in choices:
-                if not isinstance(choice, dict):
-                    continue
-                message = choice.get("message", {})
-                if isinstance(message, dict):
-                    text = extract_llm_content_text(message.get("content"))
-                    if text:
-                        return text
-                text = choice.get("text")
-                if isinstance(text, str) and text.strip():
-                    return text.strip()
-
-        content = data.get("content", [])
-        text = extract_llm_content_text(content)
-        if text:
-            return text
-
-        for key in ("text", "completion"):
-            text = data.get(key)
-            if isinstance(text, str) and text.strip():
-                return text
-        return None
-    except Exception as e:
-        print(f"  ⚠️ LLM call failed: {e}")
-        return None
+
+def prefilter_candidates(candidates: list[dict], profile: dict) -> list[dict]:
+    """硬规则预过滤：剔除明显不符合画像的候选，并打印每条的剔除原因"""
+    engine = compile_profile_filters(profile)
+    filtered = []
+    for v in candidates:
+        # 排除教程、投资金融、纯技术实现等明确不感兴趣的标题
+        if engine["exclude_title"].search(v["title"]):
+            print(f"   ⛔ 预过滤（标题排除）: {v['title']}")
+            continue
+        # 排除标题/描述中明显偏投资或偏纯技术的内容
+        content_text = f"{v['title']}\n{v.get('description') or ''}"
+        if engine["exclude_content"].search(content_text):
+            print(f"   ⛔ 预过滤（不感兴趣主题）: {v['title']}")
+            continue
+        # 播放量极低且不是常看频道 → 排除
+        is_preferred, channel_rules = author_filter_rules(engine, v["author"])
+        if v["view_count"] < 200 and not is_preferred:
+            print(f"   ⛔ 预过滤（低播放量非常看频道）: {v['title']} ({format_view_count(v['view_count'])} views)")
+            continue
+        # 频道专属过滤规则
+        rejection = next(filter(None, (channel_rule_rejection(rule, v) for rule in channel_rules)), None)
+        if rejection:
+            print(f"   ⛔ 预过滤（{rejection}）: {v['title']}")
+            continue
+        filtered.append(v)
+    return filtered
 
 
-def extract_llm_content_text(content) -> str:
-    if isinstance(content, str):
-        return content.strip()
-    if isinstance(content, list):
-        for block in reversed(content):
-            text = extract_llm_text_block(block)
-            if text:
-                return text
-    return ""
+# ============ 候选排序（BM25 预排序 + LLM） ============
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u3400-\u9fff]+")
+BM25_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "the", "this", "to", "we", "what", "with", "you", "your",
+}
 
 
-def extract_llm_text_block(block) -> str:
-    """Return model-visible text only; never stringify reasoning/tool blocks."""
-    if isinstance(block, str):
-        return block.strip()
-    if not isinstance(block, dict):
-        return ""
+def tokenize_for_bm25(text: str) -> list[str]:
+    """英文按单词切分，中文按相邻两字（bigram）切分"""
+    tokens = []
+    for match in BM25_TOKEN_RE.findall((text or "").lower()):
+        if match[0].isascii():
+            if match not in BM25_STOPWORDS and (len(match) > 1 or match.isdigit()):
+                tokens.append(match)
+        elif len(match) == 1:
+            tokens.append(match)
+        else:
+            tokens.extend(match[i:i + 2] for i in range(len(match) - 1))
+    return tokens
 
-    block_type = block.get("type")
-    if isinstance(block_type, str) and block_type in LLM_NON_TEXT_BLOCK_TYPES:
-        return ""
 
-    text = block.get("text")
-    if isinstance(text, str):
-        return text.strip()
-    return ""
+def build_prerank_query(profile: dict, ranking_hints: str = "") -> tuple[list[str], list[str]]:
+    """从画像和动态偏好构造查询词，返回 (偏好词, 回避词)"""
+    parts = [
+        str(profile.get("description") or ""),
+        str(profile.get("favorite_content") or ""),
+        " ".join(profile.get("preferred_channels", [])),
+    ]
+    avoid_parts = []
+    for line in ranking_hints.splitlines():
+        label_text = line.split("：", 1)[-1] if "：" in line else ""
+        if "回避" in line:
+            avoid_parts.append(label_text)
+        elif "偏好" in line:
+            parts.append(label_text)
+    return tokenize_for_bm25(" ".join(parts)), tokenize_for_bm25(" ".join(avoid_parts))
+
+
+def bm25_scores(documents: list[list[str]], query: list[str]) -> list[float]:
+    if not documents:
+        return []
+    doc_count = len(documents)
+    average_length = sum(len(doc) for doc in documents) / doc_count or 1.0
+    document_frequency = {}
+    for doc in documents:
+        for token in set(doc):
+            document_frequency[token] = document_frequency.get(token, 0) + 1
+
+    query_terms = set(query)
+    scores = []
+    for doc in documents:
+        term_frequency = {}
+        for token in doc:
+            if token in query_terms:
+                term_frequency[token] = term_frequency.get(token, 0) + 1
+        score = 0.0
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / average_length)
+        for token, tf in term_frequency.items():
+            df = document_frequency[token]
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            score += idf * tf * (BM25_K1 + 1) / (tf + length_norm)
+        scores.append(score)
+    return scores
+
+
+def prerank_candidates(candidates: list[dict], profile: dict, ranking_hints: str = "", top_k: int = RANK_PRERANK_TOP_K) -> list[dict]:
+    """按 BM25 相关度保留前 top_k 个候选（保持原有顺序），让 LLM 排序的 prompt 大小与当天候选量无关"""
+    if len(candidates) <= top_k:
+        return candidates
+    query, avoid = build_prerank_query(profile, ranking_hints)
+    documents = [
+        tokenize_for_bm25(f"{v['title']} {v['author']} {v.get('description') or ''}")
+        for v in candidates
+    ]
+    scores = bm25_scores(documents, query)
+    if avoid:
+        scores = [score - penalty for score, penalty in zip(scores, bm25_scores(documents, avoid))]
+    ranked = sorted(
+        range(len(candidates)),
+        key=lambda i: (scores[i], candidates[i].get("view_count", 0)),
+        reverse=True,
+    )
+    keep = set(ranked[:top_k])
+    return [v for i, v in enumerate(candidates) if i in keep]
 
 
 def rank_candidates(candidates: list[dict], top_n: int, profile: dict) -> list[dict]:
-    """用 LLM 从候选视频中挑选最值得深度观看的 Top N，返回 [{index, reason}]"""
+    """用 LLM 从候选视频中挑选最值得深度观看的 Top N，返回 [{index, reason}]
+
+    候选超过 RANK_GROUP_SIZE 时走分组淘汰赛，单次 prompt 大小有上限且各组并发排序。
+    """
+    group_size = max(RANK_GROUP_SIZE, top_n * 2)
+    if len(candidates) > group_size:
+        return tournament_rank_candidates(candidates, top_n, profile, group_size)
+    return rank_candidate_group(candidates, top_n, profile)
+
+
+def tournament_rank_candidates(candidates: list[dict], top_n: int, profile: dict, group_size: int) -> list[dict]:
+    """分组并发排序，每组晋级 top_n 个，再对晋级者排序（仍超限时继续下一轮）；index 对应原 candidates"""
+    group_count = math.ceil(len(candidates) / group_size)
+    # 交错分组，避免同一频道连续的视频挤在同一组
+    groups = [candidates[i::group_count] for i in range(group_count)]
+    print(f"   🏟️ 淘汰赛排序: {len(candidates)} 个候选分 {group_count} 组并发排序")
+    with ThreadPoolExecutor(max_workers=RANK_PARALLELISM, thread_name_prefix="rank") as pool:
+        group_results = list(pool.map(lambda group: rank_candidate_group(group, top_n, profile), groups))
+
+    winners = [group[r["index"]] for group, results in zip(groups, group_results) for r in results]
+    original_index = {id(video): i for i, video in enumerate(candidates)}
+    final = rank_candidates(winners, top_n, profile)
+    return [{"index": original_index[id(winners[r["index"]])], "reason": r["reason"]} for r in final]
+
+
+def parse_rank_response(raw: str, candidate_count: int, top_n: int) -> list[dict]:
+    """解析 LLM 返回的 "编号|理由" 格式，去重并丢弃越界编号"""
+    results = []
+    for line in raw.strip().splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        parts = line.split("|", 1)
+        nums = re.findall(r'\d+', parts[0])
+        if not nums:
+            continue
+        idx = int(nums[0]) - 1
+        reason = parts[1].strip() if len(parts) > 1 else ""
+        if 0 <= idx < candidate_count and idx not in [r["index"] for r in results]:
+            results.append({"index": idx, "reason": reason})
+        if len(results) >= top_n:
+            break
+    return results
+
+
+def rank_candidate_group(candidates: list[dict], top_n: int, profile: dict) -> list[dict]:
+    """单次 LLM 排序调用；失败时按播放量排序（会就地重排 candidates）"""
     video_list = []
     for i, v in enumerate(candidates):
         desc_snippet = (v.get("description") or "")[:300].replace("\n", " ").strip()
@@ -1101,18 +2369,7 @@ def rank_candidates(candidates: list[dict], top_n: int, profile: dict) -> list[d
         if ranking_hints:
             ranking_hints = f"\n\n动态偏好（基于近期反馈）：\n{ranking_hints}\n"
 
-    prompt = f"""你是一个视频筛选助手。请严格按照以下标准筛选。
-
-用户画像：
-- {profile.get("description", "科技行业从业者")}
-- 常看频道：{preferred}
-- 最喜欢的内容类型：{profile.get("favorite_content", "深度访谈、技术分享")}
-
-以下是今天的 {len(candidates)} 个候选视频：
-
-{chr(10).join(video_list)}
-
-请从中选出最多 {top_n} 个最值得深度观看的视频。宁缺毋滥：如果达不到标准，可以少选。
+    prompt = f"""你是一个视频筛选助手。请严格按照以下标准，从文末的候选视频中选出最多 {top_n} 个最值得深度观看的视频。宁缺毋滥：如果达不到标准，可以少选。
 
 必须优先选择：
 1. AI 产品设计、用户体验设计、产品增长与商业化案例、产品策略与竞品分析（优先级最高）
@@ -1130,10 +2387,8 @@ def rank_candidates(candidates: list[dict], top_n: int, profile: dict) -> list[d
 - 与 AI/科技行业无关的内容（情感、健身、烹饪等）
 - 播放量极低（<200）且频道不在用户常看列表中的视频
 - 低信息密度内容：纯开场致辞（welcome, opening）、纯 announcements、纯回顾/ recap、无实质观点的访谈预热
-{deprioritize_section}
+
 播放量参考规则：同类深度内容中播放量明显更高的优先，但绝不因为播放量高就选新闻速报。
-{channel_notes_section}
-{ranking_hints}
 
 请按推荐度从高到低输出，每行一个，格式为：
 编号|一句话推荐理由
@@ -1143,33 +2398,33 @@ def rank_candidates(candidates: list[dict], top_n: int, profile: dict) -> list[d
 7|创始人分享广告创意工作流变化，适合提炼智能体机会
 1|Claude Code 团队讨论开发者工作流，但重点在产品体验而非代码细节
 
-最多输出 {top_n} 行，不要其他文字。"""
+最多输出 {top_n} 行，不要其他文字。
+
+用户画像：
+- {profile.get("description", "科技行业从业者")}
+- 常看频道：{preferred}
+- 最喜欢的内容类型：{profile.get("favorite_content", "深度访谈、技术分享")}
+{deprioritize_section}{channel_notes_section}{ranking_hints}
+以下是今天的 {len(candidates)} 个候选视频：
+
+{chr(10).join(video_list)}"""
 
-    result = call_llm(prompt, max_tokens=500)
+    result = call_llm(
+        prompt,
+        max_tokens=500,
+        stage="rank",
+        validate=lambda raw: bool(parse_rank_response(raw, len(candidates), top_n)),
+    )
     if not result:
         print("  ⚠️ DeepSeek 排序失败，回退到播放量排序")
+        llm_client.record_fallback("rank")
         candidates.sort(key=lambda v: v["view_count"], reverse=True)
         return [{"index": i, "reason": ""} for i in range(min(top_n, len(candidates)))]
 
-    # 解析 LLM 返回的 "编号|理由" 格式
-    results = []
-    for line in result.strip().splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        parts = line.split("|", 1)
-        nums = re.findall(r'\d+', parts[0])
-        if not nums:
-            continue
-        idx = int(nums[0]) - 1
-        reason = parts[1].strip() if len(parts) > 1 else ""
-        if 0 <= idx < len(candidates) and idx not in [r["index"] for r in results]:
-            results.append({"index": idx, "reason": reason})
-        if len(results) >= top_n:
-            break
-
+    results = parse_rank_response(result, len(candidates), top_n)
     if not results:
         print("  ⚠️ LLM 返回解析失败，回退到播放量排序")
+        llm_client.record_fallback("rank")
         candidates.sort(key=lambda v: v["view_count"], reverse=True)
         return [{"index": i, "reason": ""} for i in range(min(top_n, len(candidates)))]
 
@@ -1517,6 +2772,21 @@ def send_status_to_feishu(title: str, message: str, template: str = "grey") -> b
 
 # ============ 主流程 ============
 def main():
+    llm_cache.load()
+    try:
+        run_digest()
+    finally:
+        llm_cache.save()
+        for note in (llm_cache.format_stats(), llm_client.format_cache_usage()):
+            if note:
+                print(f"   📊 {note}")
+        usage_table = llm_client.format_usage_table()
+        if usage_table:
+            print(f"   📊 LLM 用量（耗时单位秒）\n{usage_table}")
+            llm_client.write_usage_report(llm_client.LLM_USAGE_REPORT_FILE, "digest")
+
+
+def run_digest():
     print(f"🚀 YouTube Digest 启动 - {datetime.now(timezone.utc).isoformat()}")
 
     channels = load_channels()
@@ -1538,37 +2808,60 @@ def main():
         print(f"🔥 AI HOT 精选 {len(aihot_items)} 条，将合并到今日推送")
 
     # 第一阶段：并发拉取所有频道 RSS
-    print(f"📡 并发拉取 {len(channels)} 个频道 RSS...")
+    run_started = datetime.now(timezone.utc)
+    cadence = load_channel_cadence()
+    poll_channels = channels
+    if ADAPTIVE_POLLING_ENABLED:
+        poll_channels, deferred_channels = plan_channel_polls(channels, cadence, run_started)
+        if deferred_channels:
+            max_staleness = min(CHANNEL_MAX_STALENESS_HOURS, LOOKBACK_HOURS)
+            print(f"🗓️ 自适应轮询：{len(deferred_channels)} 个低频频道本次延后（最长 {max_staleness}h 内必然轮询）")
+
+    print(f"📡 并发拉取 {len(poll_channels)} 个频道 RSS...")
     all_rss_videos = {}  # channel_id → videos
     rss_failed_channel_ids = []
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_ch = {
-            executor.submit(fetch_rss_videos, ch["channel_id"]): ch
-            for ch in channels
-        }
-        for future in as_completed(future_to_ch):
-            ch = future_to_ch[future]
-            try:
-                videos, rss_ok = future.result()
-                if not rss_ok:
-                    rss_failed_channel_ids.append(ch["channel_id"])
-                if videos:
-                    all_rss_videos[ch["channel_id"]] = videos
-            except Exception as e:
-                print(f"  ⚠️ {ch.get('name', ch['channel_id'])}: {e}")
-                rss_failed_channel_ids.append(ch["channel_id"])
+    rss_cache = load_rss_cache()
+    rss_results = fetch_all_rss_videos([ch["channel_id"] for ch in poll_channels], rss_cache)
+    save_rss_cache(rss_cache)
+    record_channel_polls(cadence, rss_results, run_started)
+    save_channel_cadence(cadence)
+    for channel_id, (videos, rss_ok) in rss_results.items():
+        if not rss_ok:
+            rss_failed_channel_ids.append(channel_id)
+        if videos:
+            all_rss_videos[channel_id] = videos
 
     total_rss = sum(len(v) for v in all_rss_videos.values())
     print(f"   RSS 共发现 {total_rss} 个新视频（来自 {len(all_rss_videos)} 个频道，失败 {len(rss_failed_channel_ids)} 个）")
 
+    quota_ledger = load_quota_ledger()
+    quota_units_at_start = quota_units_used(quota_ledger)
+    video_details_cache = load_video_details_cache()
     fallback_channel_ids = rss_failed_channel_ids
+    if fallback_channel_ids and YOUTUBE_API_KEY:
+        rss_new_ids = {v["video_id"] for videos in all_rss_videos.values() for v in videos} - set(history)
+        quota_plan = plan_youtube_quota(
+            quota_ledger,
+            len(uncached_video_ids(rss_new_ids, video_details_cache)),
+            len(fallback_channel_ids),
+            len(stale_view_ids(rss_new_ids, video_details_cache)),
+        )
+        if quota_plan["fallback_channels"] < len(fallback_channel_ids):
+            print(
+                f"  ⚠️ YouTube quota 剩余 {quota_units_remaining(quota_ledger)} units，"
+                f"仅对 {quota_plan['fallback_channels']}/{len(fallback_channel_ids)} 个频道做 API 兜底"
+            )
+            fallback_channel_ids = fallback_channel_ids[:quota_plan["fallback_channels"]]
+
     if fallback_channel_ids and YOUTUBE_API_KEY:
         print(f"🔁 RSS 失败的 {len(fallback_channel_ids)} 个频道，使用 YouTube Data API 兜底...")
-        upload_playlists = fetch_channel_upload_playlists(fallback_channel_ids)
+        upload_playlist_cache = load_upload_playlist_cache()
+        upload_playlists = resolve_upload_playlists(fallback_channel_ids, upload_playlist_cache, quota_ledger)
+        save_upload_playlist_cache(upload_playlist_cache)
         api_fallback_videos = {}
         with ThreadPoolExecutor(max_workers=10) as executor:
             future_to_ch = {
-                executor.submit(fetch_upload_playlist_videos, channel_id, playlist_id): channel_id
+                executor.submit(fetch_upload_playlist_videos, channel_id, playlist_id, quota_ledger): channel_id
                 for channel_id, playlist_id in upload_playlists.items()
             }
             for future in as_completed(future_to_ch):
@@ -1582,7 +2875,7 @@ def main():
         all_rss_videos.update(api_fallback_videos)
         total_api_fallback = sum(len(v) for v in api_fallback_videos.values())
         print(f"   API 兜底发现 {total_api_fallback} 个新视频（来自 {len(api_fallback_videos)} 个频道）")
-    elif fallback_channel_ids:
+    elif rss_failed_channel_ids and not YOUTUBE_API_KEY:
         print("  ⚠️ 未配置 YOUTUBE_API_KEY，无法在 RSS 失败时兜底")
 
     total_rss = sum(len(v) for v in all_rss_videos.values())
@@ -1590,37 +2883,58 @@ def main():
 
     # 收集候选长视频（带 quota 保护）
     candidates = []
-    api_calls = 0
-    API_QUOTA_LIMIT = 3000  # 保守限制，留余量
-
+    pending_videos = {}
     for ch in channels:
-        channel_id = ch["channel_id"]
-        videos = all_rss_videos.get(channel_id, [])
-        if not videos:
-            continue
-
-        for video in videos:
+        for video in all_rss_videos.get(ch["channel_id"], []):
             vid = video["video_id"]
-            if vid in history:
-                continue
-
-            if api_calls >= API_QUOTA_LIMIT:
-                print(f"  ⚠️ YouTube API quota 接近上限 ({api_calls} calls)，停止获取详情")
-                break
-
-            details = get_video_details(vid)
-            api_calls += 1
-            duration_sec = details["duration"]
-            if duration_sec < MIN_DURATION_MINUTES * 60:
-                history[vid] = now_iso
-                continue
+            if vid not in history and vid not in pending_videos:
+                pending_videos[vid] = video
+
+    pending_ids = list(pending_videos)
+    max_views_refresh = None
+    if YOUTUBE_API_KEY:
+        uncached_ids = uncached_video_ids(pending_ids, video_details_cache)
+        stale_ids = stale_view_ids(pending_ids, video_details_cache)
+        details_plan = plan_youtube_quota(quota_ledger, len(uncached_ids), views_refresh_count=len(stale_ids))
+        max_ids = details_plan["details_videos"]
+        max_views_refresh = details_plan["views_refresh_videos"]
+        if len(uncached_ids) > max_ids:
+            print(f"  ⚠️ YouTube quota 接近当日上限，仅获取前 {max_ids}/{len(uncached_ids)} 个未缓存视频的详情")
+            skipped = set(uncached_ids[max_ids:])
+            pending_ids = [vid for vid in pending_ids if vid not in skipped]
+        if len(stale_ids) > max_views_refresh:
+            print(f"  ⚠️ YouTube quota 不足，仅刷新 {max_views_refresh}/{len(stale_ids)} 个缓存视频的播放量，其余沿用缓存")
+    if pending_ids:
+        print(f"🔎 批量获取 {len(pending_ids)} 个新视频详情...")
+    details_by_id = get_videos_details(pending_ids, quota_ledger, video_details_cache, max_views_refresh)
+    save_video_details_cache(video_details_cache)
+    save_quota_ledger(quota_ledger)
+    quota_note = (
+        f"YouTube quota 本次 {quota_units_used(quota_ledger) - quota_units_at_start} units，"
+        f"今日已用 {quota_units_used(quota_ledger)}/{YOUTUBE_DAILY_QUOTA_UNITS}"
+    )
+    print(f"   📊 {quota_note}")
+
+    lookup_failed = 0
+    for vid in pending_ids:
+        video = pending_videos[vid]
+        details = details_by_id[vid]
+        if details.get("lookup_failed"):
+            lookup_failed += 1
+            continue
+        duration_sec = details["duration"]
+        if duration_sec < MIN_DURATION_MINUTES * 60:
+            history[vid] = now_iso
+            continue
 
-            video["duration_sec"] = duration_sec
-            video["duration_str"] = format_duration(duration_sec)
-            video["description"] = details["description"]
-            video["view_count"] = details["view_count"]
-            candidates.append(video)
-            print(f"   🎬 候选: {video['title']} ({video['duration_str']}, {format_view_count(video['view_count'])} views)")
+        video["duration_sec"] = duration_sec
+        video["duration_str"] = format_duration(duration_sec)
+        video["description"] = details["description"]
+        video["view_count"] = details["view_count"]
+        candidates.append(video)
+        print(f"   🎬 候选: {video['title']} ({video['duration_str']}, {format_view_count(video['view_count'])} views)")
+    if lookup_failed:
+        print(f"   ⚠️ {lookup_failed} 个视频详情请求失败，未记入 history，下次运行重试")
 
     if not candidates:
         print("\n📭 没有新的长视频候选")
@@ -1634,69 +2948,7 @@ def main():
 
     # 第二阶段：预过滤 + LLM 智能筛选
     # 硬规则预过滤：剔除明显不符合的候选
-    preferred_channels = set(profile.get("preferred_channels", []))
-    exclude_patterns = profile.get("exclude_title_patterns", [])
-    exclude_re = re.compile(
-        r"(?i)(" + "|".join(re.escape(p) for p in exclude_patterns) + ")"
-    ) if exclude_patterns else None
-    exclude_content_patterns = profile.get("exclude_content_patterns", [])
-    exclude_content_re = re.compile(
-        r"(?i)(" + "|".join(re.escape(p) for p in exclude_content_patterns) + ")"
-    ) if exclude_content_patterns else None
-
-    channel_filters = profile.get("channel_filters", {})
-
-    filtered = []
-    for v in candidates:
-        # 排除教程、投资金融、纯技术实现等明确不感兴趣的标题
-        if exclude_re and exclude_re.search(v["title"]):
-            print(f"   ⛔ 预过滤（标题排除）: {v['title']}")
-            continue
-        # 排除标题/描述中明显偏投资或偏纯技术的内容
-        content_text = f"{v['title']}\n{v.get('description') or ''}"
-        if exclude_content_re and exclude_content_re.search(content_text):
-            print(f"   ⛔ 预过滤（不感兴趣主题）: {v['title']}")
-            continue
-        # 播放量极低且不是常看频道 → 排除
-        is_preferred = any(pc.lower() in v["author"].lower() for pc in preferred_channels)
-        if v["view_count"] < 200 and not is_preferred:
-            print(f"   ⛔ 预过滤（低播放量非常看频道）: {v['title']} ({format_view_count(v['view_count'])} views)")
-            continue
-        # 频道专属过滤规则
-        channel_skipped = False
-        for ch_name, ch_rule in channel_filters.items():
-            if ch_name.lower() not in v["author"].lower():
-                continue
-            min_duration = ch_rule.get("min_duration_seconds", 0)
-            duration_value = v.get("duration_sec", v.get("duration_seconds", 0))
-            if min_duration and duration_value < min_duration:
-                print(f"   ⛔ 预过滤（{ch_name} 时长过短）: {v['title']}")
-                channel_skipped = True
-                break
-            exclude_keywords = ch_rule.get("exclude_title_keywords", [])
-            if exclude_keywords:
-                kw_re = re.compile(r"(?i)(" + "|".join(re.escape(k) for k in exclude_keywords) + ")")
-                if kw_re.search(v["title"]):
-                    print(f"   ⛔ 预过滤（{ch_name} 排除主题）: {v['title']}")
-                    channel_skipped = True
-                    break
-            exclude_description_keywords = ch_rule.get("exclude_description_keywords", [])
-            if exclude_description_keywords:
-                kw_re = re.compile(r"(?i)(" + "|".join(re.escape(k) for k in exclude_description_keywords) + ")")
-                if kw_re.search(v.get("description") or ""):
-                    print(f"   ⛔ 预过滤（{ch_name} 描述排除主题）: {v['title']}")
-                    channel_skipped = True
-                    break
-            require_keywords = ch_rule.get("require_title_keywords", [])
-            if require_keywords:
-                kw_re = re.compile(r"(?i)(" + "|".join(re.escape(k) for k in require_keywords) + ")")
-                if not kw_re.search(v["title"]):
-                    print(f"   ⛔ 预过滤（{ch_name} 非目标内容）: {v['title']}")
-                    channel_skipped = True
-                    break
-        if channel_skipped:
-            continue
-        filtered.append(v)
+    filtered = prefilter_candidates(candidates, profile)
 
     if not filtered:
         print("\n📭 预过滤后没有候选视频")
@@ -1711,9 +2963,13 @@ def main():
     if len(filtered) < len(candidates):
         print(f"   📋 预过滤: {len(candidates)} → {len(filtered)} 个候选")
 
-    print(f"\n🤖 LLM 正在从 {len(filtered)} 个候选中筛选 Top {top_n}...")
-    ranked = rank_candidates(filtered, top_n, profile)
-    top_videos = [filtered[r["index"]] for r in ranked]
+    shortlisted = prerank_candidates(filtered, profile, load_ranking_hints(), RANK_PRERANK_TOP_K)
+    if len(shortlisted) < len(filtered):
+        print(f"   📐 BM25 预排序: {len(filtered)} → {len(shortlisted)} 个候选送入 LLM")
+
+    print(f"\n🤖 LLM 正在从 {len(shortlisted)} 个候选中筛选 Top {top_n}...")
+    ranked = rank_candidates(shortlisted, top_n, profile)
+    top_videos = [shortlisted[r["index"]] for r in ranked]
     # 把推荐理由挂到 video 上
     for r, v in zip(ranked, top_videos):
         v["reason"] = r["reason"]
@@ -1723,24 +2979,9 @@ def main():
         print(f"   {i}. [{v['author']}] {v['title']} ({v['duration_str']}, {format_view_count(v['view_count'])} views){reason}")
 
     # 第三阶段：生成摘要 + 合并推送
-    videos_with_summaries = []
+    videos_with_summaries = summarize_top_videos(top_videos)
     for video in top_videos:
-        # 摘要优先用字幕（内容最完整），fallback 到 description
-        print(f"   📝 生成摘要: {video['title']}")
-        transcript = get_transcript(video["video_id"])
-        if transcript:
-            result = summarize_with_llm(video["title"], video["author"], transcript, "字幕")
-            summary_text = result["summary"]
-        elif video["description"] and len(video["description"]) > 50:
-            print(f"      ⚠️ 无字幕，使用 description")
-            result = summarize_with_llm(video["title"], video["author"], video["description"], "描述")
-            summary_text = result["summary"]
-        else:
-            summary_text = "⚠️ 无字幕且描述信息不足，请直接观看"
-
-        videos_with_summaries.append({"video": video, "summary": summary_text})
         history[video["video_id"]] = now_iso
-        time.sleep(1)
 
     # 合并为一条日报推送。优先用飞书应用机器人，才支持卡片点击反馈；Webhook 仅兜底。
     send_combined_digest(videos_with_summaries, aihot_items)
@@ -1751,7 +2992,7 @@ def main():
 
     save_history(history)
     aihot_note = f"，AI HOT {len(aihot_items)} 条" if aihot_items else ""
-    print(f"\n✅ 完成，共推送 {len(top_videos)} 个视频{aihot_note}（候选 {len(candidates)} 个，API 调用 {api_calls} 次）")
+    print(f"\n✅ 完成，共推送 {len(top_videos)} 个视频{aihot_note}（候选 {len(candidates)} 个，{quota_note}）")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+import random
+import unittest
+
+import main
+
+
+def item(title, summary="", score=80, category="ai-products"):
+    return {"id": title, "title": title, "summary": summary, "source": "Example", "category": category, "score": score}
+
+
+class AihotFeatureTests(unittest.TestCase):
+    def test_keyword_hits_match_keyword_matches(self):
+        rng = random.Random(11)
+        vocabulary = list(main.AIHOT_FEATURE_KEYWORD_SET) + ["geometry", "ai-powered", "x", "2", " ", "-", "。", "Codex5", " vc "]
+        keywords = tuple(main.AIHOT_FEATURE_KEYWORD_SET) + (" Vibe Coding ", "", "AI", "c++")
+        for _ in range(300):
+            text = "".join(rng.choice(vocabulary) + rng.choice(["", " ", "x", "/"]) for _ in range(rng.randint(1, 8))).lower()
+            expected = {keyword for keyword in keywords if main.keyword_matches(text, keyword)}
+            self.assertEqual(main.aihot_keyword_hits(text, keywords), expected, text)
+
+    def test_ascii_keywords_need_word_boundaries(self):
+        features = main.aihot_text_features("geometry lessons for the ai-powered 海外市场 team")
+
+        self.assertEqual(features["interest:GEO"], frozenset())
+        self.assertEqual(features["exploration"], {"ai"})
+        self.assertEqual(features["interest:海外增长"], {"海外", "海外市场"})
+
+    def test_feature_record_drives_lane_and_gate(self):
+        agent = item("Claude Code 从零开始搭建 coding agent")
+        frontier = item("硅谷前沿趋势观察", category="industry")
+        stock = item("AI 产品公司估值与股票分析")
+
+        self.assertEqual(main.aihot_item_lane(agent), "agent")
+        self.assertEqual(main.aihot_item_lane(frontier), "frontier")
+        self.assertTrue(main.passes_aihot_quality_gate(agent))
+        self.assertFalse(main.passes_aihot_quality_gate(stock))
+        self.assertFalse(main.passes_aihot_quality_gate(agent | {"title": "Agentic 抽奖"}))
+
+    def test_profile_and_hint_keywords_score_like_before(self):
+        profile = {"aihot_boost_keywords": ["Cursor", "GEO"], "deprioritize_topics": ["融资", "代码实现"]}
+        hints = "基于近期一键反馈，额外调整：\n近期偏好：Cursor、产品策略\n近期回避：融资"
+        scored = main.score_aihot_item_for_profile(
+            item("Cursor 产品策略复盘", "团队完成新一轮融资，分享代码实现"), profile, hints
+        )
+
+        # 80 + 4（ai-products）+ 24（Agentic Engineering）+ 8（AI产品）+ 8（Cursor）
+        # - 16×2（静态融资、画像融资；Cursor 属于 Agent，代码实现不扣分）+ 8×2（偏好 Cursor、产品策略）- 12（回避 融资）
+        self.assertEqual(scored, (96.0, ["Agentic Engineering", "AI产品", "Cursor", "产品策略"]))
+
+
+class AihotBatchScoringTests(unittest.TestCase):
+    PROFILE = {"aihot_boost_keywords": ["Cursor", "出海"], "deprioritize_topics": ["融资", "教程"]}
+    HINTS = "近期偏好：产品策略、GEO\n近期回避：融资"
+
+    def random_items(self, count):
+        rng = random.Random(5)
+        vocabulary = list(main.AIHOT_FEATURE_KEYWORD_SET) + ["产品策略", "融资", "教程", "hello", "geometry"]
+        return [item(
+            " ".join(rng.choices(vocabulary, k=4)),
+            "".join(rng.choices(vocabulary, k=5)),
+            score=rng.choice([0, 70, 85, 87.3, 0.1, None]),
+            category=rng.choice(["ai-products", "industry", "paper", ""]),
+        ) for _ in range(count)]
+
+    def test_batch_scores_and_lanes_match_single_item_functions(self):
+        items = self.random_items(200)
+        batch = main.score_aihot_items_for_profile(items, self.PROFILE, self.HINTS)
+
+        for entry, (score, match_tags, lane) in zip(items, batch):
+            single = main.score_aihot_items_for_profile([entry], self.PROFILE, self.HINTS)[0]
+            self.assertEqual((score, match_tags, lane), single)
+            self.assertEqual(lane, main.aihot_item_lane(entry))
+
+    def test_rank_sorts_by_score_then_recency(self):
+        items = [
+            item("Cursor 实战", score=80) | {"publishedAt": "2026-01-01"},
+            item("Cursor 实战 2", score=80) | {"publishedAt": "2026-01-02"},
+            item("硅谷前沿趋势", score=90, category="industry"),
+        ]
+
+        ranked = main.rank_aihot_items_for_profile(items, self.PROFILE)
+
+        self.assertEqual([entry["title"] for entry in ranked], ["Cursor 实战 2", "Cursor 实战", "硅谷前沿趋势"])
+        self.assertEqual(ranked[0]["match_tags"], ["Agentic Engineering", "Cursor"])
+
+
+if __name__ == "__main__":
+    unittest.main()
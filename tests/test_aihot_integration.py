@@ -75,6 +75,27 @@ class AihotIntegrationTests(unittest.TestCase):
         self.assertTrue(kwargs["params"]["since"].endswith("Z"))
         self.assertIn("aihot-skill/0.2.0", kwargs["headers"]["User-Agent"])
 
+    def test_oversized_candidate_take_falls_back_to_safe_page(self):
+        payload = {"items": [{
+            "id": "agent-workflow",
+            "title": "Agentic Engineering workflow for coding agents",
+            "summary": "A practical workflow for AI product teams.",
+            "source": "Example",
+            "category": "ai-products",
+            "score": 88,
+            "url": "https://example.com/agent-workflow",
+        }]}
+        rejected = mock.Mock()
+        rejected.raise_for_status.side_effect = main.requests.HTTPError("400 Client Error: take too large")
+
+        with mock.patch.object(main, "AIHOT_CANDIDATE_TAKE", 1000), \
+             mock.patch.object(main, "DEEPSEEK_API_KEY", ""), \
+             mock.patch.object(main.requests, "get", side_effect=[rejected, FakeResponse(payload)]) as get:
+            items = main.fetch_aihot_items(hours=24, take=3, profile={"description": "AI 产品"})
+
+        self.assertEqual([call.kwargs["params"]["take"] for call in get.call_args_list], [1000, 100])
+        self.assertEqual([item["id"] for item in items], ["agent-workflow"])
+
     def test_fetch_aihot_items_reranks_for_user_interests_and_geo_research(self):
         payload = {
             "items": [
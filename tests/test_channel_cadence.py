@@ -0,0 +1,83 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import main
+
+
+NOW = datetime(2026, 7, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def iso(dt):
+    return dt.isoformat()
+
+
+def cadence_with(records, run_gap_hours=3):
+    runs = [iso(NOW - timedelta(hours=run_gap_hours * i)) for i in range(3, 0, -1)]
+    return {"channels": records, "runs": runs}
+
+
+class ChannelCadenceTests(unittest.TestCase):
+    def test_new_and_recently_added_channels_are_always_polled(self):
+        cadence = cadence_with({
+            "UCrecent": {
+                "first_seen": iso(NOW - timedelta(days=2)),
+                "uploads": [],
+                "last_polled": iso(NOW - timedelta(hours=1)),
+            },
+        })
+        channels = [{"channel_id": "UCnew"}, {"channel_id": "UCrecent"}]
+
+        due, deferred = main.plan_channel_polls(channels, cadence, NOW)
+
+        self.assertEqual(due, channels)
+        self.assertEqual(deferred, [])
+
+    def test_rarely_uploading_channel_is_deferred_within_max_staleness(self):
+        record = {
+            "first_seen": iso(NOW - timedelta(days=200)),
+            "uploads": [iso(NOW - timedelta(days=180)), iso(NOW - timedelta(days=90))],
+        }
+        channel = {"channel_id": "UCrare"}
+
+        with mock.patch.object(main, "CHANNEL_MAX_STALENESS_HOURS", 12):
+            self.assertEqual(main.channel_poll_interval_hours(record, NOW), 12)
+
+            polled_recently = cadence_with({"UCrare": {**record, "last_polled": iso(NOW - timedelta(hours=4))}})
+            self.assertEqual(main.plan_channel_polls([channel], polled_recently, NOW), ([], [channel]))
+
+            # 预计 3h 后才会再运行：10h + 3h 超过 12h 上限，因此本次必须拉取
+            polled_long_ago = cadence_with({"UCrare": {**record, "last_polled": iso(NOW - timedelta(hours=10))}})
+            self.assertEqual(main.plan_channel_polls([channel], polled_long_ago, NOW), ([channel], []))
+
+    def test_interval_never_exceeds_lookback_window(self):
+        record = {"first_seen": iso(NOW - timedelta(days=400)), "uploads": []}
+
+        with mock.patch.object(main, "CHANNEL_MAX_STALENESS_HOURS", 72), \
+             mock.patch.object(main, "LOOKBACK_HOURS", 24):
+            self.assertEqual(main.channel_poll_interval_hours(record, NOW), 24)
+
+    def test_frequent_uploader_gets_short_interval(self):
+        uploads = [iso(NOW - timedelta(hours=4 * i)) for i in range(1, 11)]
+        record = {"first_seen": iso(NOW - timedelta(days=30)), "uploads": uploads}
+
+        self.assertEqual(main.channel_poll_interval_hours(record, NOW), 1.0)
+
+    def test_records_successful_polls_and_deduplicates_uploads(self):
+        published = "2026-07-01T08:00:00+00:00"
+        cadence = {"channels": {"UCok": {"first_seen": iso(NOW - timedelta(days=10)), "uploads": [published]}}, "runs": []}
+        rss_results = {
+            "UCok": ([{"video_id": "a", "published": published}, {"video_id": "b", "published": "2026-07-01T10:00:00Z"}], True),
+            "UCfailed": ([], False),
+        }
+
+        main.record_channel_polls(cadence, rss_results, NOW)
+
+        self.assertEqual(cadence["channels"]["UCok"]["uploads"], [published, "2026-07-01T10:00:00+00:00"])
+        self.assertEqual(cadence["channels"]["UCok"]["last_polled"], iso(NOW))
+        self.assertNotIn("UCfailed", cadence["channels"])
+        self.assertEqual(cadence["runs"], [iso(NOW)])
+
+
+if __name__ == "__main__":
+    unittest.main()
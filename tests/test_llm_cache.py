@@ -0,0 +1,104 @@
+import json
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import llm_cache
+import main
+import update_preferences
+
+
+def chat_response(content):
+    response = Mock()
+    response.status_code = 200
+    response.json.return_value = {"choices": [{"message": {"content": content}}]}
+    return response
+
+
+class LlmCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "llm_cache.json"
+        llm_cache.load(self.path)
+        self.addCleanup(llm_cache.disable)
+
+    def test_identical_prompt_is_served_from_cache_across_runs(self):
+        with (
+            patch.object(main, "DEEPSEEK_API_KEY", "test-key"),
+            patch.object(main, "DEEPSEEK_MODEL", "test-model"),
+            patch.object(main.llm_client.http_session(), "post", return_value=chat_response("结论：值得看。")) as post,
+        ):
+            self.assertEqual(main.call_llm("prompt", stage="summary"), "结论：值得看。")
+            llm_cache.save(self.path)
+            llm_cache.load(self.path)
+            self.assertEqual(main.call_llm("prompt", stage="summary"), "结论：值得看。")
+            main.call_llm("prompt", max_tokens=500, stage="summary")
+
+        self.assertEqual(post.call_count, 2)
+        self.assertEqual(llm_cache.stats(), {"summary": {"hits": 1, "misses": 1}})
+        self.assertEqual(llm_cache.format_stats(), "LLM 缓存命中 summary 1/2")
+
+    def test_failed_calls_are_not_cached(self):
+        failed = Mock(status_code=400)
+        failed.json.return_value = {}
+        with (
+            patch.object(main, "DEEPSEEK_API_KEY", "test-key"),
+            patch.object(main.llm_client.http_session(), "post", return_value=failed) as post,
+        ):
+            self.assertIsNone(main.call_llm("prompt", stage="rank"))
+            self.assertIsNone(main.call_llm("prompt", stage="rank"))
+
+        self.assertEqual(post.call_count, 2)
+
+    def test_responses_rejected_by_the_caller_are_not_cached(self):
+        candidates = [{"title": f"video {i}", "author": "a", "view_count": 10 * i, "duration_str": "30m"} for i in range(3)]
+        with (
+            patch.object(main, "DEEPSEEK_API_KEY", "test-key"),
+            patch.object(
+                main.llm_client.http_session(), "post", return_value=chat_response("格式要求：……\n视频标题：title")
+            ) as post,
+        ):
+            main.rank_candidate_group(list(candidates), 2, {})
+            main.rank_candidate_group(list(candidates), 2, {})
+            main.summarize_with_llm("title", "author", "字幕内容")
+            main.summarize_with_llm("title", "author", "字幕内容")
+
+        self.assertEqual(post.call_count, 4)
+        self.assertEqual(llm_cache.stats(), {"rank": {"hits": 0, "misses": 2}, "summary": {"hits": 0, "misses": 2}})
+
+    def test_bad_env_values_fall_back_to_defaults(self):
+        with patch.dict("os.environ", {"LLM_CACHE_TTL_HOURS": "1d"}):
+            self.assertEqual(llm_cache._env_int("LLM_CACHE_TTL_HOURS", 24, min_value=1), 24)
+
+    def test_preference_classification_shares_the_cache(self):
+        with (
+            patch.object(update_preferences, "DEEPSEEK_API_KEY", "test-key"),
+            patch.object(update_preferences.llm_client.http_session(), "post", return_value=chat_response('{"events":[]}')) as post,
+        ):
+            update_preferences.call_llm("prompt")
+            update_preferences.call_llm("prompt")
+
+        post.assert_called_once()
+        self.assertEqual(llm_cache.stats()["preference"], {"hits": 1, "misses": 1})
+
+    def test_load_drops_expired_entries_and_caps_size(self):
+        now = datetime(2026, 7, 1, tzinfo=timezone.utc)
+        entries = {
+            f"key{i}": {"model": "m", "created_at": (now - timedelta(hours=i)).isoformat(), "response": f"r{i}"}
+            for i in range(5)
+        }
+        entries["expired"] = {"model": "m", "created_at": (now - timedelta(days=30)).isoformat(), "response": "old"}
+        self.path.write_text(json.dumps({"entries": entries}))
+
+        with patch.object(llm_cache, "LLM_CACHE_TTL_HOURS", 24), patch.object(llm_cache, "LLM_CACHE_MAX_ENTRIES", 3):
+            llm_cache.load(self.path, now=now)
+            llm_cache.save(self.path)
+
+        self.assertEqual(sorted(json.loads(self.path.read_text())["entries"]), ["key0", "key1", "key2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import llm_client
+import requests
+
+
+def response(status_code=200, payload=None, headers=None):
+    resp = Mock()
+    resp.status_code = status_code
+    resp.headers = headers or {}
+    resp.json.return_value = payload if payload is not None else {}
+    return resp
+
+
+def ok(content="结论：值得看。"):
+    return response(payload={"choices": [{"message": {"content": content}}]})
+
+
+def complete(prompt="prompt", **kwargs):
+    return llm_client.chat_completion(
+        prompt, api_base="https://api.example.test", api_key="test-key", model="test-model", **kwargs
+    )
+
+
+class LlmClientRetryTests(unittest.TestCase):
+    def test_retries_rate_limit_and_honors_retry_after(self):
+        throttled = response(429, headers={"Retry-After": "7"})
+
+        with (
+            patch.object(llm_client.http_session(), "post", side_effect=[throttled, ok()]) as post,
+            patch.object(llm_client.time, "sleep") as sleep,
+        ):
+            self.assertEqual(complete(), "结论：值得看。")
+
+        self.assertEqual(post.call_count, 2)
+        self.assertGreaterEqual(sleep.call_args.args[0], 7)
+
+    def test_retries_timeouts_with_bounded_jittered_backoff(self):
+        with (
+            patch.object(llm_client, "LLM_MAX_RETRIES", 2),
+            patch.object(llm_client, "LLM_BACKOFF_BASE_SECONDS", 1.0),
+            patch.object(llm_client.http_session(), "post", side_effect=requests.Timeout("slow")) as post,
+            patch.object(llm_client.time, "sleep") as sleep,
+        ):
+            self.assertIsNone(complete())
+
+        self.assertEqual(post.call_count, 3)
+        delays = [call.args[0] for call in sleep.call_args_list]
+        self.assertTrue(0.5 <= delays[0] <= 1.0)
+        self.assertTrue(1.0 <= delays[1] <= 2.0)
+
+    def test_client_errors_are_not_retried(self):
+        with (
+            patch.object(llm_client.http_session(), "post", return_value=response(401, {"error": {"message": "bad key"}})) as post,
+            patch.object(llm_client.time, "sleep") as sleep,
+        ):
+            self.assertIsNone(complete())
+
+        post.assert_called_once()
+        sleep.assert_not_called()
+
+    def test_retry_after_accepts_http_dates(self):
+        self.assertEqual(llm_client.retry_after_seconds(response(headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})), 0.0)
+        self.assertIsNone(llm_client.retry_after_seconds(response(headers={})))
+
+
+class LlmClientCacheUsageTests(unittest.TestCase):
+    def setUp(self):
+        for name, value in (("_call_records", []), ("_fallbacks", {})):
+            patcher = patch.object(llm_client, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_records_prefix_cache_hits_per_stage(self):
+        deepseek = ok()
+        deepseek.json.return_value["usage"] = {"prompt_cache_hit_tokens": 768, "prompt_cache_miss_tokens": 256}
+        openai_style = ok()
+        openai_style.json.return_value["usage"] = {"prompt_tokens": 1000, "prompt_tokens_details": {"cached_tokens": 0}}
+
+        with patch.object(llm_client.http_session(), "post", side_effect=[deepseek, openai_style, ok()]):
+            complete(stage="rank")
+            complete(stage="summary")
+            complete(stage="summary")
+
+        self.assertEqual(llm_client.cache_usage_stats(), {
+            "rank": {"hit_tokens": 768, "miss_tokens": 256},
+            "summary": {"hit_tokens": 0, "miss_tokens": 1000},
+        })
+        self.assertEqual(llm_client.format_cache_usage(), "前缀缓存命中 rank 768/1024 tokens（75%），summary 0/1000 tokens（0%）")
+
+    def test_usage_summary_counts_tokens_retries_failures_and_fallbacks(self):
+        summarized = ok()
+        summarized.json.return_value["usage"] = {"prompt_tokens": 900, "completion_tokens": 120}
+
+        with (
+            patch.object(llm_client, "LLM_MAX_RETRIES", 1),
+            patch.object(llm_client.http_session(), "post", side_effect=[response(503), summarized, response(400)]),
+            patch.object(llm_client.time, "sleep"),
+        ):
+            complete(stage="summary")
+            complete(stage="rank")
+        llm_client.record_call("summary", "response_cache")
+        llm_client.record_fallback("rank")
+
+        summary = llm_client.usage_summary()
+        self.assertEqual(
+            {key: summary["summary"][key] for key in ("calls", "response_cache_hits", "failures", "retries", "prompt_tokens", "completion_tokens")},
+            {"calls": 2, "response_cache_hits": 1, "failures": 0, "retries": 1, "prompt_tokens": 900, "completion_tokens": 120},
+        )
+        self.assertEqual((summary["rank"]["calls"], summary["rank"]["failures"], summary["rank"]["fallbacks"]), (1, 1, 1))
+        self.assertEqual([record["outcome"] for record in llm_client.call_records()], ["ok", "http_error", "response_cache"])
+        table = llm_client.format_usage_table()
+        self.assertIn("rank", table.splitlines()[1])
+        self.assertIn("summary", table.splitlines()[2])
+
+    def test_usage_report_keeps_other_runs(self):
+        llm_client.record_call("preference", "ok", usage={"prompt_tokens": 10, "completion_tokens": 5}, latency_ms=250)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "llm_usage_report.json"
+            path.write_text(json.dumps({"runs": {"digest": {"stages": {}}}}))
+            llm_client.write_usage_report(path, "preferences")
+            report = json.loads(path.read_text())
+
+        self.assertEqual(set(report["runs"]), {"digest", "preferences"})
+        self.assertEqual(report["runs"]["preferences"]["stages"]["preference"]["total_latency_ms"], 250)
+        self.assertEqual(report["runs"]["preferences"]["calls"][0]["completion_tokens"], 5)
+
+
+class LlmClientLimitTests(unittest.TestCase):
+    def test_token_bucket_allows_burst_then_waits_for_refill(self):
+        bucket = llm_client.TokenBucket(capacity=2, rate=10)
+
+        with patch.object(llm_client.time, "sleep") as sleep:
+            bucket.acquire()
+            bucket.acquire()
+            sleep.assert_not_called()
+            bucket.acquire()
+
+        sleep.assert_called_once()
+        self.assertAlmostEqual(sleep.call_args.args[0], 0.1, delta=0.02)
+
+    def test_requests_charge_the_provider_token_bucket(self):
+        requests_bucket = Mock()
+        tokens_bucket = Mock()
+
+        with (
+            patch.object(llm_client, "provider_limits", return_value=(requests_bucket, tokens_bucket)),
+            patch.object(llm_client.http_session(), "post", return_value=ok()),
+        ):
+            complete("a" * 400, max_tokens=50)
+
+        requests_bucket.acquire.assert_called_once_with()
+        tokens_bucket.acquire.assert_called_once_with(150)
+
+    def test_estimate_tokens_counts_cjk_characters_individually(self):
+        self.assertEqual(llm_client.estimate_tokens("结论值得看"), 5)
+        self.assertEqual(llm_client.estimate_tokens("abcdefgh"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
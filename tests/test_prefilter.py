@@ -0,0 +1,108 @@
+import contextlib
+import io
+import random
+import re
+import unittest
+
+import main
+from keyword_matcher import KeywordMatcher
+
+
+PROFILE = {
+    "preferred_channels": ["Lenny's Podcast", "AI Engineer"],
+    "exclude_title_patterns": ["for beginners", "入门教程"],
+    "exclude_content_patterns": ["stock"],
+    "channel_filters": {
+        "AI Engineer": {"exclude_title_keywords": ["Workshop"], "require_title_keywords": ["agent", "eval"]},
+        "Engineer": {"min_duration_seconds": 1200},
+        "Lenny": {"exclude_description_keywords": ["sponsored"]},
+    },
+}
+
+
+def candidate(title, author="Conference", description="", view_count=1000, duration_sec=1800):
+    return {
+        "title": title,
+        "author": author,
+        "description": description,
+        "view_count": view_count,
+        "duration_sec": duration_sec,
+    }
+
+
+class KeywordMatcherTests(unittest.TestCase):
+    def test_matches_like_case_insensitive_regex_alternation(self):
+        rng = random.Random(7)
+        alphabet = "abAB中文 "
+        for _ in range(300):
+            keywords = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 5))]
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+            matcher = KeywordMatcher(keywords)
+            pattern = re.compile(r"(?i)(" + "|".join(re.escape(k) for k in keywords) + ")")
+
+            self.assertEqual(matcher.search(text), pattern.search(text) is not None, (keywords, text))
+            self.assertEqual(
+                matcher.matches(text),
+                {i for i, k in enumerate(keywords) if k.lower() in text.lower()},
+                (keywords, text),
+            )
+
+    def test_empty_keyword_lists_never_match_and_empty_keywords_always_do(self):
+        self.assertFalse(KeywordMatcher([]).search("anything"))
+        self.assertTrue(KeywordMatcher(["", "zzz"]).search("anything"))
+
+
+class PrefilterTests(unittest.TestCase):
+    def run_prefilter(self, candidates, profile=PROFILE):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            filtered = main.prefilter_candidates(candidates, profile)
+        return [v["title"] for v in filtered], output.getvalue()
+
+    def test_rejections_keep_reasons_and_channel_rule_order(self):
+        titles, log = self.run_prefilter([
+            candidate("Prompting for Beginners"),
+            candidate("Market update", description="Which STOCK to buy"),
+            candidate("Quiet upload", view_count=50),
+            candidate("Agent Workshop", author="AI Engineer", duration_sec=600),
+            candidate("Scaling evals", author="AI Engineer", duration_sec=600),
+            candidate("Keynote", author="AI Engineer"),
+            candidate("Agents in production", author="AI Engineer"),
+            candidate("Growth", author="Lenny's Podcast", description="This episode is Sponsored", view_count=10),
+            candidate("Pricing", author="Lenny's Podcast", view_count=10),
+        ])
+
+        self.assertEqual(titles, ["Agents in production", "Pricing"])
+        self.assertEqual(re.findall(r"预过滤（([^）]*)）", log), [
+            "标题排除",
+            "不感兴趣主题",
+            "低播放量非常看频道",
+            "AI Engineer 排除主题",
+            "Engineer 时长过短",
+            "AI Engineer 非目标内容",
+            "Lenny 描述排除主题",
+        ])
+
+    def test_overlapping_channel_rules_apply_in_profile_order(self):
+        profile = {"channel_filters": {
+            "Zeta Labs": {"exclude_title_keywords": ["roadmap"]},
+            "Labs": {"require_title_keywords": ["agent"]},
+        }}
+
+        titles, log = self.run_prefilter([candidate("Product roadmap", author="Zeta Labs")], profile)
+
+        self.assertEqual(titles, [])
+        self.assertEqual(re.findall(r"预过滤（([^）]*)）", log), ["Zeta Labs 排除主题"])
+
+    def test_compiles_each_profile_version_once(self):
+        main._compile_profile_filters.cache_clear()
+        changed = {**PROFILE, "exclude_title_patterns": ["keynote"]}
+
+        first = main.compile_profile_filters(PROFILE)
+        self.assertIs(main.compile_profile_filters(dict(PROFILE)), first)
+        self.assertIsNot(main.compile_profile_filters(changed), first)
+        self.assertEqual(self.run_prefilter([candidate("Keynote")], changed)[0], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
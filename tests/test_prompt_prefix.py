@@ -0,0 +1,82 @@
+import os
+import unittest
+from unittest import mock
+
+import main
+
+
+PROFILE = {
+    "description": "AI 产品经理",
+    "favorite_content": "AI 产品案例",
+    "preferred_channels": ["Lenny's Podcast"],
+    "deprioritize_topics": ["股票"],
+}
+
+
+def candidate(title):
+    return {"title": title, "author": "Channel", "description": "desc", "duration_str": "30m00s", "view_count": 1000}
+
+
+def captured_prompts(func, *calls):
+    prompts = []
+
+    def fake_call_llm(prompt, max_tokens=1024, stage="default", validate=None):
+        prompts.append(prompt)
+        return None
+
+    with mock.patch.object(main, "DEEPSEEK_API_KEY", "test-key"), \
+         mock.patch.object(main, "call_llm", side_effect=fake_call_llm):
+        for args in calls:
+            func(*args)
+    return prompts
+
+
+class PromptPrefixTests(unittest.TestCase):
+    def test_rank_prompt_keeps_instructions_and_profile_before_candidates(self):
+        first, second = captured_prompts(
+            main.rank_candidates,
+            ([candidate("Monday talk")], 3, PROFILE),
+            ([candidate("Tuesday talk"), candidate("Another talk")], 3, PROFILE),
+        )
+
+        shared = os.path.commonprefix([first, second])
+        self.assertIn("编号|一句话推荐理由", shared)
+        self.assertIn("AI 产品经理", shared)
+        self.assertIn("股票", shared)
+        self.assertNotIn("talk", shared)
+        self.assertTrue(first.endswith("Monday talk (30m00s, 1.0K views)\n   描述: desc"))
+
+    def test_summary_prompt_puts_video_content_last(self):
+        first, second = captured_prompts(
+            main.summarize_with_llm,
+            ("Title A", "Author A", "transcript a " * 20, "字幕"),
+            ("Title B", "Author B", "description b " * 20, "描述"),
+        )
+
+        shared = os.path.commonprefix([first, second])
+        self.assertIn(main.SUMMARY_FORMAT_RULES, shared)
+        self.assertTrue(shared.endswith("视频标题：Title "))
+        # 摘要泄露检测依赖这些提示词片段
+        for marker in ("根据以下视频", "格式要求", "视频标题："):
+            self.assertIn(marker, first)
+
+    def test_aihot_prompt_keeps_candidates_last(self):
+        items = [{
+            "id": "agent-workflow",
+            "title": "Agentic Engineering workflow for coding agents",
+            "summary": "A practical workflow for AI product teams.",
+            "source": "Example",
+            "category": "ai-products",
+            "score": 88,
+            "url": "https://example.com/agent-workflow",
+        }]
+
+        prompts = captured_prompts(main.select_aihot_items_for_profile, (items, PROFILE))
+
+        self.assertTrue(prompts)
+        self.assertLess(prompts[0].index('"selected_ids"'), prompts[0].index("用户画像"))
+        self.assertTrue(prompts[0].rstrip().split("\n")[-1].startswith("候选："))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+import main
+
+
+PROFILE = {
+    "description": "AI 产品经理，关注 AI 产品设计、商业化和 Agentic Engineering",
+    "favorite_content": "AI 产品/UX 案例、Coding Agent、产品策略",
+    "preferred_channels": ["Lenny's Podcast"],
+}
+
+
+def candidate(title, author="Conference", description="", view_count=1000):
+    return {"title": title, "author": author, "description": description, "view_count": view_count}
+
+
+class Bm25PrerankTests(unittest.TestCase):
+    def test_tokenizer_mixes_english_words_and_cjk_bigrams(self):
+        self.assertEqual(main.tokenize_for_bm25("The Coding Agent 产品设计"), ["coding", "agent", "产品", "品设", "设计"])
+
+    def test_keeps_top_k_relevant_candidates_in_original_order(self):
+        candidates = [
+            candidate("Kubernetes networking deep dive"),
+            candidate("How we built a coding agent for product teams"),
+            candidate("Weekly crypto market wrap", view_count=90000),
+            candidate("AI 产品设计与商业化复盘"),
+            candidate("Growth chat", author="Lenny's Podcast"),
+        ]
+
+        shortlisted = main.prerank_candidates(candidates, PROFILE, top_k=3)
+
+        self.assertEqual([v["title"] for v in shortlisted], [
+            "How we built a coding agent for product teams",
+            "AI 产品设计与商业化复盘",
+            "Growth chat",
+        ])
+
+    def test_avoid_hints_push_candidates_down(self):
+        candidates = [candidate("AI 产品 入门教程"), candidate("AI 产品 深度访谈")]
+        hints = "基于近期一键反馈，额外调整：\n近期回避：入门教程"
+
+        shortlisted = main.prerank_candidates(candidates, PROFILE, hints, top_k=1)
+
+        self.assertEqual([v["title"] for v in shortlisted], ["AI 产品 深度访谈"])
+
+    def test_small_pools_are_untouched(self):
+        candidates = [candidate("a"), candidate("b")]
+        self.assertIs(main.prerank_candidates(candidates, PROFILE, top_k=5), candidates)
+
+
+if __name__ == "__main__":
+    unittest.main()
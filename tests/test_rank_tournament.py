@@ -0,0 +1,60 @@
+import re
+import unittest
+from unittest import mock
+
+import main
+
+
+def candidate(i, title):
+    return {"title": title, "author": f"Channel {i % 7}", "description": "", "duration_str": "30m00s", "view_count": i}
+
+
+def fake_rank_llm(prompt, max_tokens=1024, stage="default", validate=None):
+    """挑出标题带 gold 的候选，按标题里的分数从高到低输出"""
+    picks = []
+    for number, title in re.findall(r"^(\d+)\. \[[^\]]+\] (.+?) \(", prompt, flags=re.M):
+        if "gold" in title:
+            picks.append((int(title.rsplit(" ", 1)[1]), number))
+    picks.sort(reverse=True)
+    return "\n".join(f"{number}|理由 {score}" for score, number in picks)
+
+
+class TournamentRankingTests(unittest.TestCase):
+    def test_groups_are_ranked_then_winners_reranked_with_original_indexes(self):
+        candidates = [candidate(i, f"video {i}") for i in range(100)]
+        for i, score in [(3, 90), (41, 99), (77, 95), (98, 80)]:
+            candidates[i]["title"] = f"gold talk {score}"
+
+        with mock.patch.object(main, "RANK_GROUP_SIZE", 20), \
+             mock.patch.object(main, "call_llm", side_effect=fake_rank_llm) as call_llm:
+            ranked = main.rank_candidates(candidates, 3, {})
+
+        self.assertEqual([r["index"] for r in ranked], [41, 77, 3])
+        self.assertEqual([r["reason"] for r in ranked], ["理由 99", "理由 95", "理由 90"])
+        self.assertEqual(call_llm.call_count, 5 + 1)
+        for call in call_llm.call_args_list:
+            self.assertIn("编号|一句话推荐理由", call.args[0])
+            self.assertLessEqual(len(re.findall(r"^\d+\. \[", call.args[0], flags=re.M)), 20)
+
+    def test_failed_group_falls_back_to_view_count_within_group(self):
+        candidates = [candidate(i, f"video {i}") for i in range(12)]
+
+        with mock.patch.object(main, "RANK_GROUP_SIZE", 4), \
+             mock.patch.object(main, "call_llm", return_value=None):
+            ranked = main.rank_candidates(candidates, 2, {})
+
+        self.assertEqual([r["index"] for r in ranked], [11, 10])
+        self.assertEqual([v["view_count"] for v in candidates], list(range(12)))
+
+    def test_small_pool_uses_single_call(self):
+        candidates = [candidate(i, f"gold talk {i}") for i in range(5)]
+
+        with mock.patch.object(main, "call_llm", side_effect=fake_rank_llm) as call_llm:
+            ranked = main.rank_candidates(candidates, 2, {})
+
+        call_llm.assert_called_once()
+        self.assertEqual([r["index"] for r in ranked], [4, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,6 @@
+import asyncio
+import threading
+import time
 import unittest
 from unittest import mock
 
@@ -25,11 +28,22 @@ VIDEO_FEED = """<?xml version="1.0" encoding="UTF-8"?>
 </feed>
 """
 
+def entry(video_id, published):
+    return f"""
+  <entry>
+    <yt:videoId>{video_id}</yt:videoId>
+    <title>Video {video_id}</title>
+    <published>{published}</published>
+  </entry>"""
+
 
 class FakeResponse:
-    def __init__(self, text="", error=None):
+    def __init__(self, text="", error=None, status_code=200, headers=None):
         self.text = text
+        self.content = text.encode("utf-8")
         self.error = error
+        self.status_code = status_code
+        self.headers = headers or {}
 
     def raise_for_status(self):
         if self.error:
@@ -67,5 +81,184 @@ class RssFetchTests(unittest.TestCase):
         self.assertIn("channel_id=UCLKPca3kwwd-B59HNr-_lvA", get.call_args.args[0])
 
 
+class RssParserTests(unittest.TestCase):
+    def test_parses_bytes_into_same_video_dicts(self):
+        videos = main.parse_rss_videos(VIDEO_FEED.encode("utf-8"))
+
+        self.assertEqual(videos, [{
+            "video_id": "abc123",
+            "title": "Fallback RSS Video",
+            "author": "Example Channel",
+            "published": "2099-01-01T00:00:00+00:00",
+            "url": "https://www.youtube.com/watch?v=abc123",
+        }])
+
+    def test_stops_at_first_entry_outside_lookback_window(self):
+        feed = (
+            EMPTY_FEED.replace("</feed>", "")
+            + entry("new1", "2099-01-02T00:00:00+00:00")
+            + entry("new2", "2099-01-01T00:00:00+00:00")
+            + entry("old", "2000-01-01T00:00:00+00:00")
+            + "<entry><broken"
+        )
+
+        videos = main.parse_rss_videos(feed.encode("utf-8"))
+
+        self.assertEqual([video["video_id"] for video in videos], ["new1", "new2"])
+
+    def test_malformed_feed_raises_parse_error(self):
+        with self.assertRaises(main.RSS_PARSE_ERRORS):
+            main.parse_rss_videos(b"<feed><title>broken")
+
+
+class RssConditionalCacheTests(unittest.TestCase):
+    def test_stores_validators_and_reuses_recent_entries_on_304(self):
+        channel_id = "UCLKPca3kwwd-B59HNr-_lvA"
+        cache = {}
+        first = FakeResponse(text=VIDEO_FEED, headers={"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2099 00:00:00 GMT"})
+
+        with mock.patch.object(main, "RSS_RETRY_ATTEMPTS", 1), \
+             mock.patch.object(main, "build_rss_session", return_value=FakeSession(lambda url: first)):
+            results = main.fetch_all_rss_videos([channel_id], cache)
+
+        self.assertEqual(results[channel_id][0][0]["video_id"], "abc123")
+        feed_url = next(iter(cache))
+        self.assertIn("channel_id=", feed_url)
+        self.assertEqual(cache[feed_url]["etag"], '"v1"')
+
+        cache[feed_url]["videos"].append({
+            "video_id": "old",
+            "title": "Old",
+            "author": "Example Channel",
+            "published": "2000-01-01T00:00:00+00:00",
+            "url": "https://www.youtube.com/watch?v=old",
+        })
+        session = FakeSession(lambda url: FakeResponse(status_code=304))
+        with mock.patch.object(main, "RSS_RETRY_ATTEMPTS", 1), \
+             mock.patch.object(session, "get", wraps=session.get) as get, \
+             mock.patch.object(main, "build_rss_session", return_value=session):
+            results = main.fetch_all_rss_videos([channel_id], cache)
+
+        videos, rss_ok = results[channel_id]
+        self.assertTrue(rss_ok)
+        self.assertEqual([video["video_id"] for video in videos], ["abc123"])
+        headers = get.call_args.kwargs["headers"]
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+        self.assertEqual(headers["If-Modified-Since"], "Wed, 01 Jan 2099 00:00:00 GMT")
+        self.assertEqual(get.call_count, 1)
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = responses
+        self.urls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self.lock:
+            self.urls.append(url)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.01)
+        with self.lock:
+            self.in_flight -= 1
+        return self.responses(url)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class RssEngineTests(unittest.TestCase):
+    def test_fetches_all_channels_through_shared_session_with_host_limit(self):
+        channel_ids = [f"UCchannel{i:02d}" for i in range(12)]
+
+        def responses(url):
+            if "UCchannel03" in url:
+                return FakeResponse(error=requests.HTTPError("500 Server Error"))
+            return FakeResponse(text=VIDEO_FEED)
+
+        session = FakeSession(responses)
+        with mock.patch.object(main, "RSS_RETRY_ATTEMPTS", 1), \
+             mock.patch.object(main, "RSS_MAX_PER_HOST", 3), \
+             mock.patch.object(main, "build_rss_session", return_value=session):
+            results = main.fetch_all_rss_videos(channel_ids)
+
+        self.assertEqual(list(results), channel_ids)
+        self.assertEqual(results["UCchannel00"][0][0]["video_id"], "abc123")
+        self.assertTrue(results["UCchannel00"][1])
+        self.assertTrue(results["UCchannel03"][1])
+        self.assertIn("playlist_id=UUchannel03", "".join(session.urls))
+        self.assertLessEqual(session.max_in_flight, 3)
+
+
+class RssHedgingTests(unittest.TestCase):
+    channel_id = "UCLKPca3kwwd-B59HNr-_lvA"
+
+    def fetch(self, session):
+        client = main.RssHttpClient(session)
+        with mock.patch.object(main, "RSS_RETRY_ATTEMPTS", 1), \
+             mock.patch.object(main, "RSS_HEDGE_DELAY_SECONDS", 0.05):
+            result = asyncio.run(main.fetch_rss_videos_async(self.channel_id, client))
+        return result, client
+
+    def test_slow_channel_feed_is_hedged_with_uploads_playlist(self):
+        def responses(url):
+            if "channel_id=" in url:
+                time.sleep(0.5)
+                return FakeResponse(text=EMPTY_FEED)
+            return FakeResponse(text=VIDEO_FEED)
+
+        session = FakeSession(responses)
+        (videos, rss_ok), client = self.fetch(session)
+
+        self.assertTrue(rss_ok)
+        self.assertEqual(videos[0]["video_id"], "abc123")
+        self.assertEqual(client.hedged, 1)
+        self.assertEqual(len(session.urls), 2)
+
+    def test_abandoned_hedge_loser_keeps_its_host_slot(self):
+        lock = threading.Lock()
+        state = {"in_flight": 0, "max_in_flight": 0}
+        slow_started = threading.Event()
+
+        def responses(url):
+            with lock:
+                state["in_flight"] += 1
+                state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+            if "channel_id=" in url:
+                slow_started.set()
+                time.sleep(0.2)
+            with lock:
+                state["in_flight"] -= 1
+            return FakeResponse(text=VIDEO_FEED)
+
+        async def run():
+            client = main.RssHttpClient(FakeSession(responses), max_per_host=1)
+            loser = asyncio.create_task(client.get(f"https://www.youtube.com/feeds/videos.xml?channel_id={self.channel_id}"))
+            await asyncio.to_thread(slow_started.wait, 1)
+            loser.cancel()  # 与对冲赢家返回后放弃输家相同
+            await client.get("https://www.youtube.com/feeds/videos.xml?playlist_id=UU1")
+            with self.assertRaises(asyncio.CancelledError):
+                await loser
+
+        asyncio.run(run())
+
+        self.assertEqual(state["max_in_flight"], 1)
+
+    def test_fast_channel_feed_does_not_fire_hedge(self):
+        session = FakeSession(lambda url: FakeResponse(text=EMPTY_FEED))
+        (videos, rss_ok), client = self.fetch(session)
+
+        self.assertTrue(rss_ok)
+        self.assertEqual(videos, [])
+        self.assertEqual(client.hedged, 0)
+        self.assertEqual(len(session.urls), 1)
+
+
 if __name__ == "__main__":
     unittest.main()
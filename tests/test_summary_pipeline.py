@@ -0,0 +1,157 @@
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+import main
+
+
+def video(video_id, description=""):
+    return {"video_id": video_id, "title": f"title {video_id}", "author": "author", "description": description}
+
+
+class SummaryPipelineTests(unittest.TestCase):
+    def test_results_keep_rank_order_when_transcripts_finish_out_of_order(self):
+        videos = [video("slow"), video("fast"), video("none", "d" * 60), video("empty")]
+        delays = {"slow": 0.2, "fast": 0.0, "none": 0.05, "empty": 0.0}
+        transcripts = {"slow": "slow transcript", "fast": "fast transcript"}
+
+        def fake_transcript(video_id):
+            time.sleep(delays[video_id])
+            return transcripts.get(video_id)
+
+        def fake_summarize(title, author, content, content_type):
+            return {"summary": f"{content_type}:{content[:4]}", "error": None}
+
+        with mock.patch.object(main, "TRANSCRIPT_WORKERS", 4), \
+             mock.patch.object(main, "get_transcript", side_effect=fake_transcript), \
+             mock.patch.object(main, "summarize_with_llm", side_effect=fake_summarize):
+            results = main.summarize_top_videos(videos)
+
+        self.assertEqual([item["video"]["video_id"] for item in results], ["slow", "fast", "none", "empty"])
+        self.assertEqual([item["summary"] for item in results], [
+            "字幕:slow",
+            "字幕:fast",
+            "描述:dddd",
+            "⚠️ 无字幕且描述信息不足，请直接观看",
+        ])
+
+    def test_summaries_start_while_other_transcripts_are_still_fetching(self):
+        release_slow = threading.Event()
+        fast_summarized = threading.Event()
+
+        def fake_transcript(video_id):
+            if video_id == "slow":
+                release_slow.wait(2)
+            return f"{video_id} transcript"
+
+        def fake_summarize(title, author, content, content_type):
+            if title == "title fast":
+                fast_summarized.set()
+            return {"summary": title, "error": None}
+
+        def release_after_fast_summary():
+            fast_summarized.wait(2)
+            release_slow.set()
+
+        watcher = threading.Thread(target=release_after_fast_summary)
+        watcher.start()
+        with mock.patch.object(main, "TRANSCRIPT_WORKERS", 2), \
+             mock.patch.object(main, "get_transcript", side_effect=fake_transcript), \
+             mock.patch.object(main, "summarize_with_llm", side_effect=fake_summarize):
+            results = main.summarize_top_videos([video("slow"), video("fast")])
+        watcher.join()
+
+        self.assertTrue(fast_summarized.is_set())
+        self.assertEqual([item["summary"] for item in results], ["title slow", "title fast"])
+
+    def test_failed_transcript_or_summary_does_not_drop_the_video(self):
+        def fake_summarize(title, author, content, content_type):
+            raise RuntimeError("llm down")
+
+        with mock.patch.object(main, "get_transcript", side_effect=RuntimeError("yt-dlp crashed")), \
+             mock.patch.object(main, "summarize_with_llm", side_effect=fake_summarize):
+            results = main.summarize_top_videos([video("a", "d" * 60)])
+
+        self.assertEqual(results[0]["summary"], "摘要生成失败")
+
+
+class BatchedSummaryTests(unittest.TestCase):
+    def run_pipeline(self, videos, transcripts, call_llm):
+        with mock.patch.object(main, "DEEPSEEK_API_KEY", "test-key"), \
+             mock.patch.object(main, "SUMMARY_BATCH_ENABLED", True), \
+             mock.patch.object(main, "SUMMARY_BATCH_MAX_CONTENT_TOKENS", 100), \
+             mock.patch.object(main, "get_transcript", side_effect=lambda video_id: transcripts.get(video_id)), \
+             mock.patch.object(main, "call_llm", side_effect=call_llm) as mocked:
+            results = main.summarize_top_videos(videos)
+        return [item["summary"] for item in results], mocked
+
+    def test_cheap_videos_share_one_json_request(self):
+        videos = [video("long"), video("short"), video("desc", "d" * 60)]
+        transcripts = {"long": "long transcript " * 200, "short": "short transcript"}
+
+        def fake_call_llm(prompt, max_tokens=1024, stage="default", validate=None):
+            if stage == "summary_batch":
+                return '```json\n{"summaries": {"short": "结论：短字幕", "desc": "结论：描述"}}\n```'
+            return "结论：长字幕"
+
+        summaries, call_llm = self.run_pipeline(videos, transcripts, fake_call_llm)
+
+        self.assertEqual(summaries, ["结论：长字幕", "结论：短字幕", "结论：描述"])
+        self.assertEqual(sorted(call.kwargs["stage"] for call in call_llm.call_args_list), ["summary", "summary_batch"])
+        batch_prompt = next(call.args[0] for call in call_llm.call_args_list if call.kwargs["stage"] == "summary_batch")
+        self.assertIn("视频 ID：short", batch_prompt)
+        self.assertIn("视频 ID：desc", batch_prompt)
+        self.assertNotIn("视频 ID：long", batch_prompt)
+
+    def test_batch_prompt_follows_rank_order_not_completion_order(self):
+        videos = [video(name, name * 60) for name in ("a", "b", "c")]
+        delays = {"a": 0.1, "b": 0.05, "c": 0.0}
+
+        def fake_transcript(video_id):
+            time.sleep(delays[video_id])
+            return None
+
+        def fake_call_llm(prompt, max_tokens=1024, stage="default", validate=None):
+            return json.dumps({"summaries": {name: f"结论：{name}" for name in delays}})
+
+        with mock.patch.object(main, "DEEPSEEK_API_KEY", "test-key"), \
+             mock.patch.object(main, "SUMMARY_BATCH_ENABLED", True), \
+             mock.patch.object(main, "TRANSCRIPT_WORKERS", 3), \
+             mock.patch.object(main, "get_transcript", side_effect=fake_transcript), \
+             mock.patch.object(main, "call_llm", side_effect=fake_call_llm) as call_llm:
+            main.summarize_top_videos(videos)
+
+        batch_prompt = call_llm.call_args.args[0]
+        positions = [batch_prompt.index(f"视频 ID：{name}") for name in ("a", "b", "c")]
+        self.assertEqual(positions, sorted(positions))
+
+    def test_unparseable_or_missing_batch_entries_fall_back_per_video(self):
+        videos = [video("a", "a" * 60), video("b", "b" * 60), video("c", "c" * 60)]
+        leaked = "{'thinking': 'The user asks me to generate a quick judgment summary.', 'signature': 'abc'}"
+
+        def fake_call_llm(prompt, max_tokens=1024, stage="default", validate=None):
+            if stage == "summary_batch":
+                return json.dumps({"summaries": {"a": "结论：批量 a", "b": leaked}})
+            return f"结论：单条 {prompt.split('视频标题：', 1)[1][:7]}"
+
+        summaries, call_llm = self.run_pipeline(videos, {}, fake_call_llm)
+
+        self.assertEqual(summaries, ["结论：批量 a", "结论：单条 title b", "结论：单条 title c"])
+        self.assertEqual(call_llm.call_count, 3)
+
+    def test_parse_failure_falls_back_for_every_video(self):
+        videos = [video("a", "a" * 60), video("b", "b" * 60)]
+
+        def fake_call_llm(prompt, max_tokens=1024, stage="default", validate=None):
+            return "not json" if stage == "summary_batch" else "结论：单条"
+
+        summaries, call_llm = self.run_pipeline(videos, {}, fake_call_llm)
+
+        self.assertEqual(summaries, ["结论：单条", "结论：单条"])
+        self.assertEqual(call_llm.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+import main
+
+
+def record(video_id, text="word " * 40, source="subtitles"):
+    return {
+        "video_id": video_id,
+        "lang": "en",
+        "source": source,
+        "events": [[0, text], [1500, "second line"]],
+        "fetched_at": "2026-07-01T00:00:00+00:00",
+    }
+
+
+class TranscriptCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = mock.patch.object(main, "TRANSCRIPT_CACHE_DIR", self.tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_second_lookup_is_served_from_compressed_cache(self):
+        with mock.patch.object(main, "fetch_transcript_record", return_value=record("vid")) as fetch:
+            first = main.get_transcript("vid")
+            second = main.get_transcript("vid")
+
+        fetch.assert_called_once_with("vid")
+        self.assertEqual(first, second)
+        self.assertTrue(first.endswith("second line"))
+        path = main.transcript_cache_path("vid")
+        self.assertEqual(path.suffixes, [".json", ".gz"])
+        self.assertEqual(path.read_bytes()[:2], b"\x1f\x8b")
+        self.assertEqual(main.load_cached_transcript("vid")["source"], "subtitles")
+
+    def test_missing_captions_are_not_cached(self):
+        with mock.patch.object(main, "fetch_transcript_record", return_value=None) as fetch:
+            self.assertIsNone(main.get_transcript("none"))
+            self.assertIsNone(main.get_transcript("none"))
+
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual(list(Path(self.tmp.name).glob("*.json.gz")), [])
+
+    def test_eviction_removes_least_recently_used_entries_first(self):
+        times = iter(datetime(2026, 7, 1, hour, tzinfo=timezone.utc) for hour in range(10))
+        with mock.patch.object(main, "datetime", wraps=datetime) as fake_datetime:
+            fake_datetime.now.side_effect = lambda tz=None: next(times)
+            for video_id in ["old", "used", "new"]:
+                main.save_cached_transcript(record(video_id, text=os.urandom(2000).hex()))
+            self.assertIsNotNone(main.load_cached_transcript("old"))  # 命中刷新最近使用时间
+        entry_size = main.transcript_cache_path("used").stat().st_size
+
+        main.evict_transcript_cache(max_bytes=entry_size * 2 + 100)
+
+        remaining = {p.name for p in Path(self.tmp.name).glob("*.json.gz")}
+        self.assertEqual(remaining, {main.transcript_cache_path("old").name, main.transcript_cache_path("new").name})
+        index = json.loads((Path(self.tmp.name) / main.TRANSCRIPT_CACHE_INDEX).read_text())
+        self.assertEqual(set(index), remaining)
+
+    def test_eviction_ignores_mtimes_reset_by_checkout(self):
+        for video_id in ["kept", "dropped"]:
+            main.save_cached_transcript(record(video_id, text=os.urandom(2000).hex()))
+        main.load_cached_transcript("kept")
+        # CI 从 data 分支 checkout 后所有文件 mtime 相同，甚至最久未用的反而更新
+        os.utime(main.transcript_cache_path("kept"), (1000, 1000))
+        os.utime(main.transcript_cache_path("dropped"), (2000, 2000))
+        entry_size = main.transcript_cache_path("kept").stat().st_size
+
+        main.evict_transcript_cache(max_bytes=entry_size + 100)
+
+        self.assertEqual([p.name for p in Path(self.tmp.name).glob("*.json.gz")], [main.transcript_cache_path("kept").name])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,237 @@
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+import llm_client
+import main
+from transcript_processing import (
+    compact_caption_events,
+    compression_ratio,
+    fit_transcript_to_budget,
+    format_chapter_transcript,
+    split_into_chunks,
+    split_segments,
+)
+
+
+def long_transcript(minutes=180):
+    return " ".join(f"Minute {i} we discuss topic number {i} in some depth." for i in range(minutes))
+
+
+class TranscriptBudgetTests(unittest.TestCase):
+    def test_short_text_is_returned_unchanged(self):
+        text = "A short transcript."
+        self.assertEqual(fit_transcript_to_budget(text, 100), text)
+
+    def test_sampled_excerpt_fits_budget_and_spans_whole_video(self):
+        text = long_transcript()
+        excerpt = fit_transcript_to_budget(text, 1000, segment_tokens=100)
+
+        self.assertLessEqual(llm_client.estimate_tokens(excerpt), 1000)
+        self.assertIn("Minute 0 ", excerpt)
+        self.assertIn("Minute 179 ", excerpt)
+        self.assertIn("[...]", excerpt)
+
+    def test_segments_follow_sentence_boundaries(self):
+        segments = split_segments(long_transcript(20), segment_tokens=30)
+
+        self.assertTrue(all(segment.endswith(".") for segment in segments))
+        self.assertEqual(" ".join(segments), long_transcript(20))
+
+    def test_summary_prompt_uses_budgeted_transcript(self):
+        with mock.patch.object(main, "DEEPSEEK_API_KEY", "test-key"), \
+             mock.patch.object(main, "SUMMARY_TRANSCRIPT_TOKEN_BUDGET", 800), \
+             mock.patch.object(main, "call_llm", return_value="结论：值得看。") as call_llm:
+            main.summarize_with_llm("title", "author", long_transcript())
+
+        prompt = call_llm.call_args.args[0]
+        self.assertLess(llm_client.estimate_tokens(prompt), 800 + 400)
+        self.assertIn("Minute 179 ", prompt)
+
+
+class CaptionCompactionTests(unittest.TestCase):
+    def test_removes_rolling_duplicates_cues_and_fillers(self):
+        events = [
+            [0, "so um today we're going"],
+            [1000, "today we're going to talk about"],
+            [2000, "[Music]"],
+            [2500, "0:15"],
+            [3000, "talk about agents, you know, and uh products"],
+            [4000, ">>"],
+        ]
+
+        self.assertEqual(compact_caption_events(events), [
+            [0, "so today we're going"],
+            [1000, "to talk about"],
+            [3000, "agents, and products"],
+        ])
+
+    def test_keeps_meaningful_phrases_and_repeated_words(self):
+        events = [[0, "the the best part"], [1000, "I mean it works"], [2000, "part of the plan"]]
+
+        self.assertEqual(compact_caption_events(events), events)
+
+    def test_get_transcript_returns_compacted_text(self):
+        record = {
+            "video_id": "vid",
+            "lang": "en",
+            "source": "automatic_captions",
+            "events": [[i * 1000, f"um line {i} of the talk line {i + 1} of the talk"] for i in range(20)],
+        }
+
+        with mock.patch.object(main, "TRANSCRIPT_CACHE_DIR", ""), \
+             mock.patch.object(main, "fetch_transcript_record", return_value=record):
+            text = main.get_transcript("vid")
+
+        raw = main.transcript_text(record)
+        self.assertNotIn("um ", text)
+        self.assertEqual(text.count("line 5 of the talk"), 1)
+        self.assertGreater(compression_ratio(raw, text), 0.3)
+
+
+class ChapterSamplingTests(unittest.TestCase):
+    def chaptered_text(self):
+        # 第一章很短，第三章很长：预算应按章节平衡，而不是按字幕时长比例分配
+        events = [[0, "Intro: welcome to the show."]]
+        events += [[60_000 + i * 1000, f"Pricing detail {i} for enterprise customers."] for i in range(150)]
+        events += [[1_000_000 + i * 1000, f"Agents deep dive point {i} with examples."] for i in range(600)]
+        chapters = [
+            {"start_ms": 0, "title": "Intro"},
+            {"start_ms": 60_000, "title": "Pricing"},
+            {"start_ms": 1_000_000, "title": "Agents"},
+        ]
+        return format_chapter_transcript(events, chapters)
+
+    def test_events_are_aligned_under_chapter_headings(self):
+        text = self.chaptered_text()
+
+        self.assertTrue(text.startswith("【章节 00:00｜Intro】\nIntro: welcome"))
+        self.assertIn("【章节 01:00｜Pricing】\nPricing detail 0 ", text)
+        self.assertIn("【章节 16:40｜Agents】\nAgents deep dive point 0 ", text)
+
+    def test_budget_is_balanced_across_chapters(self):
+        excerpt = fit_transcript_to_budget(self.chaptered_text(), 1200)
+        sections = excerpt.split("【章节 ")[1:]
+
+        self.assertLessEqual(llm_client.estimate_tokens(excerpt), 1200)
+        self.assertEqual([section.split("】", 1)[0] for section in sections], ["00:00｜Intro", "01:00｜Pricing", "16:40｜Agents"])
+        self.assertIn("Intro: welcome to the show.", sections[0])
+        pricing, agents = (llm_client.estimate_tokens(section) for section in sections[1:])
+        self.assertLess(abs(pricing - agents), 150)
+
+    def many_chapters_text(self, chapters=15, events_per_chapter=200):
+        events, chapter_marks = [], []
+        for c in range(chapters):
+            start = c * 600_000
+            chapter_marks.append({"start_ms": start, "title": f"Part {c}"})
+            events += [[start + i * 1000, f"Chapter {c} point {i} covers a detail."] for i in range(events_per_chapter)]
+        return format_chapter_transcript(events, chapter_marks)
+
+    def test_many_chapters_use_most_of_the_budget(self):
+        excerpt = fit_transcript_to_budget(self.many_chapters_text(), 6000)
+
+        self.assertLessEqual(llm_client.estimate_tokens(excerpt), 6000)
+        self.assertGreater(llm_client.estimate_tokens(excerpt), 6000 * 0.9)
+        self.assertEqual(excerpt.count("【章节 "), 15)
+
+    def test_small_budget_is_a_hard_limit(self):
+        for budget in (500, 200, 30):
+            excerpt = fit_transcript_to_budget(self.many_chapters_text(), budget)
+
+            self.assertLessEqual(llm_client.estimate_tokens(excerpt), budget)
+            self.assertGreater(llm_client.estimate_tokens(excerpt), budget * 0.8)
+        self.assertIn("【章节 ", fit_transcript_to_budget(self.many_chapters_text(), 500))
+
+    def test_get_transcript_emits_chapter_structure(self):
+        record = {
+            "video_id": "vid",
+            "lang": "en",
+            "source": "subtitles",
+            "events": [[0, "opening remarks " * 10], [90_000, "main discussion " * 10]],
+            "chapters": [{"start_ms": 0, "title": "Opening"}, {"start_ms": 60_000, "title": "Main"}],
+        }
+
+        with mock.patch.object(main, "TRANSCRIPT_CACHE_DIR", ""), \
+             mock.patch.object(main, "fetch_transcript_record", return_value=record):
+            text = main.get_transcript("vid")
+
+        self.assertIn("【章节 01:00｜Main】\nmain discussion", text)
+
+
+class MapReduceSummaryTests(unittest.TestCase):
+    def test_chunks_cover_full_text_within_limits(self):
+        text = long_transcript()
+        chunks = split_into_chunks(text, chunk_tokens=500, max_chunks=20)
+
+        self.assertTrue(all(llm_client.estimate_tokens(chunk) <= 500 for chunk in chunks))
+        self.assertEqual(" ".join(chunks), text)
+        self.assertLessEqual(len(split_into_chunks(text, chunk_tokens=500, max_chunks=3)), 3)
+
+    def test_long_transcript_is_mapped_concurrently_then_reduced(self):
+        def fake_call_llm(prompt, max_tokens=1024, stage="default", validate=None):
+            if stage == "summary_map":
+                index = prompt.split("字幕的第 ", 1)[1].split("/", 1)[0]
+                return f"- 第 {index} 段要点"
+            return "结论：值得看。\n（1）要点\n适合：通勤"
+
+        with mock.patch.object(main, "DEEPSEEK_API_KEY", "test-key"), \
+             mock.patch.object(main, "SUMMARY_MAP_REDUCE_MIN_TOKENS", 1000), \
+             mock.patch.object(main, "SUMMARY_MAP_CHUNK_TOKENS", 500), \
+             mock.patch.object(main, "call_llm", side_effect=fake_call_llm) as call_llm:
+            result = main.summarize_with_llm("title", "author", long_transcript())
+
+        stages = [call.kwargs["stage"] for call in call_llm.call_args_list]
+        self.assertEqual(stages[-1], "summary")
+        self.assertGreater(stages.count("summary_map"), 3)
+        reduce_prompt = call_llm.call_args_list[-1].args[0]
+        self.assertIn("视频分段笔记", reduce_prompt)
+        self.assertLess(reduce_prompt.index("- 第 1 段要点"), reduce_prompt.index("- 第 2 段要点"))
+        self.assertEqual(result["summary"], "结论：值得看。\n（1）要点\n适合：通勤")
+
+    def run_with_failed_chunks(self, failed_indexes):
+        def fake_call_llm(prompt, max_tokens=1024, stage="default", validate=None):
+            if stage == "summary_map":
+                index = int(prompt.split("字幕的第 ", 1)[1].split("/", 1)[0])
+                return None if index in failed_indexes else f"- 第 {index} 段要点"
+            return "结论：值得看。"
+
+        output = io.StringIO()
+        with mock.patch.object(main, "DEEPSEEK_API_KEY", "test-key"), \
+             mock.patch.object(main, "SUMMARY_MAP_REDUCE_MIN_TOKENS", 1000), \
+             mock.patch.object(main, "SUMMARY_MAP_CHUNK_TOKENS", 500), \
+             mock.patch.object(main, "SUMMARY_MAP_MAX_FAILED_PERCENT", 25), \
+             mock.patch.object(main.llm_client, "record_fallback") as record_fallback, \
+             mock.patch.object(main, "call_llm", side_effect=fake_call_llm) as call_llm, \
+             contextlib.redirect_stdout(output):
+            main.summarize_with_llm("title", "author", long_transcript())
+        return call_llm.call_args_list[-1].args[0], output.getvalue(), record_fallback
+
+    def test_failed_chunks_are_logged_and_reduce_keeps_the_rest(self):
+        prompt, log, record_fallback = self.run_with_failed_chunks({2})
+
+        self.assertIn("第 2/6 段提炼失败，已跳过", log)
+        self.assertIn("视频分段笔记", prompt)
+        self.assertNotIn("- 第 2 段要点", prompt)
+        record_fallback.assert_not_called()
+
+    def test_too_many_failed_chunks_fall_back_to_single_pass(self):
+        prompt, log, record_fallback = self.run_with_failed_chunks({2, 5})
+
+        self.assertEqual(log.count("段提炼失败，已跳过"), 2)
+        self.assertIn("2/6 段提炼失败，超过 25%", log)
+        self.assertNotIn("视频分段笔记", prompt)
+        self.assertNotIn("段要点", prompt)
+        record_fallback.assert_called_once_with("summary_map")
+
+    def test_short_transcript_uses_single_shot_path(self):
+        with mock.patch.object(main, "DEEPSEEK_API_KEY", "test-key"), \
+             mock.patch.object(main, "call_llm", return_value="结论：值得看。") as call_llm:
+            main.summarize_with_llm("title", "author", long_transcript(20))
+
+        call_llm.assert_called_once()
+        self.assertEqual(call_llm.call_args.kwargs["stage"], "summary")
+
+
+if __name__ == "__main__":
+    unittest.main()
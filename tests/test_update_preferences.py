@@ -46,7 +46,7 @@ class PreferenceClassificationTests(unittest.TestCase):
             patch.object(update_preferences, "DEEPSEEK_API_KEY", "test-key"),
             patch.object(update_preferences, "DEEPSEEK_API_BASE", "https://api.example.test"),
             patch.object(update_preferences, "DEEPSEEK_MODEL", "deepseek-v4-flash"),
-            patch.object(update_preferences.requests, "post", return_value=response) as post,
+            patch.object(update_preferences.llm_client.http_session(), "post", return_value=response) as post,
         ):
             self.assertEqual(call_llm("prompt"), '{"events":[]}')
 
@@ -0,0 +1,49 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import main
+
+
+def days_ago(days):
+    return (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
+
+class UploadPlaylistCacheTests(unittest.TestCase):
+    def test_fresh_verified_entries_skip_channels_list(self):
+        cache = {"UCfresh": {"playlist_id": "UUfresh", "verified_at": days_ago(3)}}
+
+        with mock.patch.object(main, "fetch_channel_upload_playlists") as fetch:
+            playlists = main.resolve_upload_playlists(["UCfresh"], cache)
+
+        fetch.assert_not_called()
+        self.assertEqual(playlists, {"UCfresh": "UUfresh"})
+
+    def test_new_and_expired_entries_are_confirmed_by_api(self):
+        cache = {"UCstale": {"playlist_id": "UUstale", "verified_at": days_ago(365)}}
+
+        with mock.patch.object(main, "UPLOAD_PLAYLIST_TTL_DAYS", 90), \
+             mock.patch.object(main, "fetch_channel_upload_playlists", return_value={
+                 "UCstale": "UUstale",
+                 "UCnew": "UUnew-from-api",
+             }) as fetch:
+            playlists = main.resolve_upload_playlists(["UCstale", "UCnew"], cache)
+
+        fetch.assert_called_once_with(["UCstale", "UCnew"], None)
+        self.assertEqual(playlists, {"UCstale": "UUstale", "UCnew": "UUnew-from-api"})
+        self.assertEqual(cache["UCnew"]["playlist_id"], "UUnew-from-api")
+        self.assertIsNotNone(cache["UCnew"]["verified_at"])
+        self.assertGreater(cache["UCstale"]["verified_at"], days_ago(1))
+
+    def test_falls_back_to_derived_seed_when_api_cannot_confirm(self):
+        cache = {}
+
+        with mock.patch.object(main, "fetch_channel_upload_playlists", return_value={}):
+            playlists = main.resolve_upload_playlists(["UCabc"], cache)
+
+        self.assertEqual(playlists, {"UCabc": "UUabc"})
+        self.assertEqual(cache["UCabc"], {"playlist_id": "UUabc", "verified_at": None})
+
+
+if __name__ == "__main__":
+    unittest.main()
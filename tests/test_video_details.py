@@ -0,0 +1,174 @@
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+import main
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+def video_item(video_id, duration="PT12M3S", views="1500"):
+    return {
+        "id": video_id,
+        "contentDetails": {"duration": duration},
+        "snippet": {"description": f"description {video_id}"},
+        "statistics": {"viewCount": views},
+    }
+
+
+class VideoDetailsBatchTests(unittest.TestCase):
+    def test_batches_ids_into_pages_of_fifty(self):
+        video_ids = [f"vid{i:03d}" for i in range(120)]
+
+        def fake_get(url, params, timeout):
+            ids = params["id"].split(",")
+            return FakeResponse({"items": [video_item(vid) for vid in ids]})
+
+        with mock.patch.object(main, "YOUTUBE_API_KEY", "test-key"), \
+             mock.patch.object(main.requests, "get", side_effect=fake_get) as get:
+            details = main.get_videos_details(video_ids)
+
+        self.assertEqual(get.call_count, 3)
+        page_sizes = sorted(len(call.kwargs["params"]["id"].split(",")) for call in get.call_args_list)
+        self.assertEqual(page_sizes, [20, 50, 50])
+        self.assertEqual(list(details), video_ids)
+        self.assertEqual(details["vid007"], {
+            "duration": 723,
+            "description": "description vid007",
+            "view_count": 1500,
+        })
+
+    def test_missing_and_failed_videos_keep_single_lookup_shape(self):
+        with mock.patch.object(main, "YOUTUBE_API_KEY", "test-key"), \
+             mock.patch.object(main.requests, "get", return_value=FakeResponse({"items": [video_item("kept")]})):
+            details = main.get_videos_details(["kept", "deleted"])
+
+        self.assertEqual(details["kept"]["duration"], 723)
+        self.assertEqual(details["deleted"], {"duration": 0, "description": "", "view_count": 0})
+
+        with mock.patch.object(main, "YOUTUBE_API_KEY", "test-key"), \
+             mock.patch.object(main.requests, "get", side_effect=RuntimeError("boom")):
+            self.assertEqual(main.get_video_details("any")["duration"], 0)
+
+    def test_failed_page_marks_its_ids_for_retry(self):
+        video_ids = [f"vid{i:03d}" for i in range(60)]
+
+        def fake_get(url, params, timeout):
+            ids = params["id"].split(",")
+            if "vid000" in ids:
+                return FakeResponse({"error": {"message": "quotaExceeded"}})
+            return FakeResponse({"items": [video_item(vid) for vid in ids[1:]]})
+
+        cache = {}
+        with mock.patch.object(main, "YOUTUBE_API_KEY", "test-key"), \
+             mock.patch.object(main.requests, "get", side_effect=fake_get) as get:
+            details = main.get_videos_details(video_ids, cache=cache)
+
+        self.assertTrue(all("maxResults" not in call.kwargs["params"] for call in get.call_args_list))
+        self.assertTrue(all(details[vid]["lookup_failed"] for vid in video_ids[:50]))
+        self.assertEqual(details["vid050"], {"duration": 0, "description": "", "view_count": 0})
+        self.assertEqual(details["vid051"]["duration"], 723)
+        self.assertEqual(sorted(cache), video_ids[51:])
+
+    def test_without_api_key_skips_requests(self):
+        with mock.patch.object(main, "YOUTUBE_API_KEY", ""), \
+             mock.patch.object(main.requests, "get") as get:
+            details = main.get_videos_details(["a", "b"])
+
+        get.assert_not_called()
+        self.assertEqual(details["a"]["duration"], 9999)
+
+
+class VideoDetailsCacheTests(unittest.TestCase):
+    def fake_get(self, url, params, timeout):
+        ids = params["id"].split(",")
+        if params["part"] == "statistics":
+            return FakeResponse({"items": [{"id": vid, "statistics": {"viewCount": "9000"}} for vid in ids]})
+        return FakeResponse({"items": [video_item(vid) for vid in ids]})
+
+    def test_reuses_immutable_fields_and_refreshes_only_stale_view_counts(self):
+        now = datetime.now(timezone.utc)
+        cached = {"duration": 45, "description": "cached short", "view_count": 10}
+        cache = {
+            "fresh": {**cached, "fetched_at": now.isoformat(), "views_fetched_at": now.isoformat()},
+            "stale": {
+                **cached,
+                "fetched_at": (now - timedelta(days=2)).isoformat(),
+                "views_fetched_at": (now - timedelta(days=2)).isoformat(),
+            },
+        }
+        ledger = main.new_quota_ledger()
+
+        with mock.patch.object(main, "YOUTUBE_API_KEY", "test-key"), \
+             mock.patch.object(main, "VIDEO_VIEWS_TTL_HOURS", 6), \
+             mock.patch.object(main.requests, "get", side_effect=self.fake_get) as get:
+            details = main.get_videos_details(["fresh", "stale", "new"], ledger, cache)
+
+        parts = sorted((call.kwargs["params"]["part"], call.kwargs["params"]["id"]) for call in get.call_args_list)
+        self.assertEqual(parts, [("contentDetails,snippet,statistics", "new"), ("statistics", "stale")])
+        self.assertEqual(details["fresh"], cached)
+        self.assertEqual(details["stale"], {**cached, "view_count": 9000})
+        self.assertEqual(details["new"]["duration"], 723)
+        self.assertEqual(cache["stale"]["view_count"], 9000)
+        self.assertEqual(cache["new"]["description"], "description new")
+        self.assertEqual(ledger["units"], {"videos.list": 2})
+
+    def test_view_refresh_without_budget_serves_cached_counts(self):
+        old = (datetime.now(timezone.utc) - timedelta(days=2)).isoformat()
+        cached = {"duration": 600, "description": "", "view_count": 10}
+        cache = {vid: {**cached, "fetched_at": old, "views_fetched_at": old} for vid in ("a", "b")}
+        ledger = main.new_quota_ledger()
+
+        with mock.patch.object(main, "YOUTUBE_API_KEY", "test-key"), \
+             mock.patch.object(main.requests, "get", side_effect=self.fake_get) as get:
+            none_left = main.get_videos_details(["a", "b"], ledger, cache, max_views_refresh=0)
+            get.assert_not_called()
+            main.get_videos_details(["a", "b"], ledger, cache, max_views_refresh=1)
+
+        self.assertEqual(none_left["a"], cached)
+        self.assertEqual(get.call_args.kwargs["params"]["id"], "a")
+        self.assertEqual((cache["a"]["view_count"], cache["b"]["view_count"]), (9000, 10))
+        self.assertEqual(ledger["units"], {"videos.list": 1})
+
+    def test_eviction_follows_last_use_not_first_fetch(self):
+        now = datetime.now(timezone.utc)
+        old = (now - timedelta(days=40)).isoformat()
+        cache = {
+            "in_rotation": {"duration": 600, "description": "", "view_count": 5, "fetched_at": old, "views_fetched_at": now.isoformat()},
+            "gone": {"duration": 600, "description": "", "view_count": 5, "fetched_at": old, "views_fetched_at": old},
+        }
+
+        with tempfile.TemporaryDirectory() as directory, \
+             mock.patch.object(main, "VIDEO_DETAILS_CACHE_FILE", str(Path(directory) / "cache.json")), \
+             mock.patch.object(main, "YOUTUBE_API_KEY", "test-key"), \
+             mock.patch.object(main.requests, "get") as get:
+            main.get_videos_details(["in_rotation"], cache=cache)
+            main.save_video_details_cache(cache)
+            saved = main.load_video_details_cache()
+
+        get.assert_not_called()
+        self.assertEqual(list(saved), ["in_rotation"])
+        self.assertGreater(saved["in_rotation"]["used_at"], old)
+
+    def test_fully_cached_videos_make_no_requests(self):
+        now = datetime.now(timezone.utc).isoformat()
+        cache = {"vid": {"duration": 600, "description": "", "view_count": 5, "fetched_at": now, "views_fetched_at": now}}
+
+        with mock.patch.object(main, "YOUTUBE_API_KEY", "test-key"), \
+             mock.patch.object(main.requests, "get") as get:
+            details = main.get_videos_details(["vid"], cache=cache)
+
+        get.assert_not_called()
+        self.assertEqual(details["vid"]["duration"], 600)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+import main
+
+
+class YoutubeQuotaLedgerTests(unittest.TestCase):
+    def test_quota_day_follows_pacific_midnight(self):
+        self.assertEqual(main.youtube_quota_day(datetime(2026, 7, 1, 6, 59, tzinfo=timezone.utc)), "2026-06-30")
+        self.assertEqual(main.youtube_quota_day(datetime(2026, 7, 1, 7, 1, tzinfo=timezone.utc)), "2026-07-01")
+
+    def test_persists_usage_within_day_and_resets_on_next_day(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "youtube_quota.json"
+            morning = datetime(2026, 7, 1, 16, 0, tzinfo=timezone.utc)
+            with mock.patch.object(main, "YOUTUBE_QUOTA_FILE", str(path)):
+                ledger = main.load_quota_ledger(morning)
+                main.record_quota_usage(ledger, "videos.list", 3)
+                main.record_quota_usage(ledger, "playlistItems.list")
+                main.save_quota_ledger(ledger)
+
+                evening = main.load_quota_ledger(datetime(2026, 7, 2, 2, 0, tzinfo=timezone.utc))
+                next_day = main.load_quota_ledger(datetime(2026, 7, 2, 8, 0, tzinfo=timezone.utc))
+
+            self.assertEqual(json.loads(path.read_text())["calls"], {"videos.list": 3, "playlistItems.list": 1})
+
+        self.assertEqual(main.quota_units_used(evening), 4)
+        self.assertEqual(main.quota_units_used(next_day), 0)
+        self.assertEqual(next_day["day"], "2026-07-02")
+
+    def test_planner_prioritizes_details_over_fallback(self):
+        ledger = main.new_quota_ledger()
+        ledger["units"] = {"videos.list": 9500}
+
+        with mock.patch.object(main, "YOUTUBE_DAILY_QUOTA_UNITS", 10000), \
+             mock.patch.object(main, "YOUTUBE_QUOTA_RESERVE_UNITS", 490):
+            tight = main.plan_youtube_quota(ledger, details_video_count=600, fallback_channel_count=5)
+            roomy = main.plan_youtube_quota(main.new_quota_ledger(), details_video_count=600, fallback_channel_count=5)
+
+        self.assertEqual(tight["details_videos"], 500)
+        self.assertEqual(tight["fallback_channels"], 0)
+        self.assertEqual(roomy["details_videos"], 600)
+        self.assertEqual(roomy["fallback_channels"], 5)
+
+    def test_cached_videos_do_not_reserve_details_quota(self):
+        ledger = main.new_quota_ledger()
+        ledger["units"] = {"videos.list": 9500}
+        video_ids = [f"vid{i}" for i in range(600)]
+        cache = {vid: {"duration": 600} for vid in video_ids[:550]}
+
+        uncached = main.uncached_video_ids(video_ids + video_ids[:10], cache)
+        with mock.patch.object(main, "YOUTUBE_DAILY_QUOTA_UNITS", 10000), \
+             mock.patch.object(main, "YOUTUBE_QUOTA_RESERVE_UNITS", 487):
+            plan = main.plan_youtube_quota(ledger, details_video_count=len(uncached), fallback_channel_count=1)
+            all_videos = main.plan_youtube_quota(ledger, details_video_count=len(video_ids), fallback_channel_count=1)
+
+        self.assertEqual(uncached, video_ids[550:])
+        self.assertEqual(plan["details_videos"], 50)
+        self.assertEqual(plan["fallback_channels"], 1)
+        self.assertEqual(all_videos["fallback_channels"], 0)
+
+    def test_view_refreshes_are_budgeted_after_details(self):
+        ledger = main.new_quota_ledger()
+        ledger["units"] = {"videos.list": 9500}
+
+        with mock.patch.object(main, "YOUTUBE_DAILY_QUOTA_UNITS", 10000), \
+             mock.patch.object(main, "YOUTUBE_QUOTA_RESERVE_UNITS", 497):
+            plan = main.plan_youtube_quota(ledger, details_video_count=100, views_refresh_count=120)
+            exhausted = main.plan_youtube_quota(ledger, details_video_count=150, views_refresh_count=120)
+
+        self.assertEqual((plan["details_videos"], plan["views_refresh_videos"]), (100, 50))
+        self.assertEqual((exhausted["details_videos"], exhausted["views_refresh_videos"]), (150, 0))
+        self.assertEqual(exhausted["remaining_units"], 0)
+
+    def test_details_lookup_records_one_unit_per_page(self):
+        ledger = main.new_quota_ledger()
+
+        with mock.patch.object(main, "YOUTUBE_API_KEY", "test-key"), \
+             mock.patch.object(main, "fetch_video_details_page", return_value={}):
+            main.get_videos_details([f"vid{i}" for i in range(101)], ledger)
+
+        self.assertEqual(ledger["units"], {"videos.list": 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,264 @@
+"""Transcript shaping before summarization: caption compaction, chapter alignment, token budgeting and map-reduce chunking."""
+
+from __future__ import annotations
+
+import re
+
+from llm_client import estimate_tokens
+
+
+TRANSCRIPT_SEGMENT_TOKENS = 300  # 采样的最小单位，约 1 分钟口播
+TRANSCRIPT_GAP_MARKER = " [...] "
+SENTENCE_BREAK_RE = re.compile(r"(?<=[.!?。！？])\s+|\s*\n+\s*")
+CHAPTER_HEADING_RE = re.compile(r"^【章节 [^】\n]*】$", re.M)
+CAPTION_OVERLAP_MAX_WORDS = 40
+CHAPTER_MIN_TOKENS = 40  # 每个保留章节至少分到的正文预算
+# 只删除独立出现的语气词；"you know"/"I mean" 必须紧跟逗号，避免误删正常语句
+FILLER_RE = re.compile(
+    r"(?i)(?<![\w'-])(?:u+m+|u+h+|e+r+m+|uh-huh|mm-hmm|hmm+)(?![\w'-])[,.]?\s*"
+    r"|(?<![\w'-])(?:you know|i mean),\s*"
+)
+SOUND_CUE_RE = re.compile(r"(?i)\[(?:music|applause|laughter|laughs|inaudible|silence|noise|__)\]")
+TIMESTAMP_ONLY_RE = re.compile(r"^\d{1,2}:\d{2}(?::\d{2})?$")
+CONTENT_CHAR_RE = re.compile(r"[^\W_]")
+
+
+def compact_caption_text(text: str) -> str:
+    text = SOUND_CUE_RE.sub(" ", text)
+    text = FILLER_RE.sub("", text)
+    return " ".join(text.split())
+
+
+def _overlap_words(previous: list[str], current: list[str]) -> int:
+    """previous 结尾与 current 开头重叠的词数（自动字幕的滚动重复）"""
+    limit = min(len(previous), len(current), CAPTION_OVERLAP_MAX_WORDS)
+    for size in range(limit, 0, -1):
+        if [w.lower() for w in previous[-size:]] == [w.lower() for w in current[:size]]:
+            return size
+    return 0
+
+
+def compact_caption_events(events: list) -> list[list]:
+    """去掉自动字幕里的滚动重复、纯时间/音效片段和口头语，保留 [start_ms, text] 结构"""
+    compacted = []
+    previous_words: list[str] = []
+    for start_ms, text in events:
+        text = compact_caption_text(str(text))
+        if not text or TIMESTAMP_ONLY_RE.match(text) or not CONTENT_CHAR_RE.search(text):
+            continue
+        words = text.split()
+        overlap = _overlap_words(previous_words, words)
+        # 单个词的重叠可能只是巧合（如 "the the"），只在整句重复时才去掉
+        if overlap == 1 and len(words) > 1:
+            overlap = 0
+        words = words[overlap:]
+        if not words:
+            continue
+        compacted.append([start_ms, " ".join(words)])
+        previous_words = (previous_words + words)[-CAPTION_OVERLAP_MAX_WORDS:]
+    return compacted
+
+
+def compression_ratio(original: str, compacted: str) -> float:
+    """压缩掉的比例，0.3 表示少了 30% 字符"""
+    if not original:
+        return 0.0
+    return 1 - len(compacted) / len(original)
+
+
+def split_segments(text: str, segment_tokens: int = TRANSCRIPT_SEGMENT_TOKENS) -> list[str]:
+    """按句子边界把文本切成约 segment_tokens 的片段；超长句子按词再切"""
+    units = []
+    for sentence in SENTENCE_BREAK_RE.split(text.strip()):
+        if estimate_tokens(sentence) <= segment_tokens:
+            units.append(sentence)
+            continue
+        units.extend(re.findall(r"\S+\s*", sentence))
+
+    segments, current, current_tokens = [], [], 0
+    for unit in units:
+        unit_tokens = estimate_tokens(unit)
+        if current and current_tokens + unit_tokens > segment_tokens:
+            segments.append(" ".join(part.strip() for part in current))
+            current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += unit_tokens
+    if current:
+        segments.append(" ".join(part.strip() for part in current))
+    return [segment for segment in segments if segment]
+
+
+def format_timestamp(ms: int) -> str:
+    hours, remainder = divmod(max(0, int(ms)) // 1000, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+def format_chapter_transcript(events: list, chapters: list[dict]) -> str:
+    """按章节起始时间对齐字幕事件，输出带【章节 时间｜标题】小标题的结构化文本"""
+    chapters = sorted(chapters, key=lambda chapter: chapter.get("start_ms", 0))
+    starts = [chapter.get("start_ms", 0) for chapter in chapters]
+    bodies: list[list[str]] = [[] for _ in chapters]
+    position = 0
+    for start_ms, text in events:
+        while position + 1 < len(starts) and start_ms >= starts[position + 1]:
+            position += 1
+        bodies[position].append(text)
+    sections = []
+    for chapter, body in zip(chapters, bodies):
+        if not body:
+            continue
+        title = " ".join(str(chapter.get("title") or "").split()) or "未命名"
+        sections.append(f"【章节 {format_timestamp(chapter.get('start_ms', 0))}｜{title}】\n{' '.join(body)}")
+    return "\n".join(sections)
+
+
+def split_chapter_sections(text: str) -> list[tuple[str, str]]:
+    """拆出 (小标题, 正文)；没有章节标记时整篇作为一个无标题段落"""
+    headings = list(CHAPTER_HEADING_RE.finditer(text))
+    if not headings:
+        return [("", text)]
+    sections = []
+    if text[:headings[0].start()].strip():
+        sections.append(("", text[:headings[0].start()].strip()))
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        sections.append((heading.group(0), text[heading.end():end].strip()))
+    return sections
+
+
+def allocate_budget(sizes: list[int], budget_tokens: int) -> list[int]:
+    """按章节平分预算；用不完份额的短章节把余量让给长章节"""
+    allocations = [0] * len(sizes)
+    pending = [i for i, size in enumerate(sizes) if size > 0]
+    remaining = max(0, budget_tokens)
+    while pending and remaining > 0:
+        share = remaining // len(pending)
+        if share <= 0:
+            break
+        small = [i for i in pending if sizes[i] <= share]
+        if not small:
+            for i in pending:
+                allocations[i] = share
+            break
+        for i in small:
+            allocations[i] = sizes[i]
+            remaining -= sizes[i]
+        pending = [i for i in pending if i not in small]
+    return allocations
+
+
+def fit_transcript_to_budget(
+    text: str,
+    budget_tokens: int,
+    segment_tokens: int = TRANSCRIPT_SEGMENT_TOKENS,
+) -> str:
+    """把字幕压到 budget_tokens 以内：有章节时按章节分配预算，否则在全片范围内均匀抽取片段"""
+    if estimate_tokens(text) <= budget_tokens:
+        return text
+    sections = split_chapter_sections(text)
+    if len(sections) == 1:
+        excerpt = _sample_evenly(text, budget_tokens, segment_tokens)
+    else:
+        excerpt = _fit_chapters(sections, budget_tokens, segment_tokens)
+    return _truncate_to_budget(excerpt, budget_tokens)
+
+
+def _fit_chapters(sections: list[tuple[str, str]], budget_tokens: int, segment_tokens: int) -> str:
+    # 预算连小标题加最少正文都放不下时，均匀保留一部分章节
+    overheads = [estimate_tokens(heading) + 2 if heading else 1 for heading, _ in sections]
+    average_overhead = sum(overheads) / len(sections)
+    keep = max(1, min(len(sections), int(budget_tokens // (average_overhead + CHAPTER_MIN_TOKENS))))
+    if keep < len(sections):
+        picked = [len(sections) // 2] if keep == 1 else sorted({
+            round(i * (len(sections) - 1) / (keep - 1)) for i in range(keep)
+        })
+        sections = [sections[i] for i in picked]
+        overheads = [overheads[i] for i in picked]
+
+    allocations = allocate_budget([estimate_tokens(body) for _, body in sections], budget_tokens - sum(overheads))
+    parts = []
+    for (heading, body), allocation in zip(sections, allocations):
+        if allocation <= 0:
+            continue
+        # 片段切细到份额的 1/4 以内，章节份额基本能用满
+        excerpt = _sample_evenly(body, allocation, max(1, min(segment_tokens, allocation // 4)))
+        if excerpt:
+            parts.append(f"{heading}\n{excerpt}" if heading else excerpt)
+    return "\n".join(parts)
+
+
+def _render_picked(segments: list[str], picked: list[int]) -> str:
+    parts, previous = [], None
+    for index in picked:
+        if previous is not None and index != previous + 1:
+            parts.append(TRANSCRIPT_GAP_MARKER.strip())
+        parts.append(segments[index])
+        previous = index
+    return " ".join(parts)
+
+
+def _sample_evenly(text: str, budget_tokens: int, segment_tokens: int) -> str:
+    """在全文范围内均匀抽取尽可能多的片段，结果不超过 budget_tokens"""
+    if estimate_tokens(text) <= budget_tokens:
+        return text
+    segments = split_segments(text, segment_tokens)
+    if not segments:
+        return ""
+
+    def render(keep: int) -> str:
+        if keep == 1:
+            return _render_picked(segments, [len(segments) // 2])
+        return _render_picked(segments, sorted({round(i * (len(segments) - 1) / (keep - 1)) for i in range(keep)}))
+
+    # 保留片段数越多越长：二分找出放得下的最大片段数
+    low, high, best = 1, len(segments), ""
+    while low <= high:
+        keep = (low + high) // 2
+        excerpt = render(keep)
+        if estimate_tokens(excerpt) <= budget_tokens:
+            best, low = excerpt, keep + 1
+        else:
+            high = keep - 1
+    return best or _truncate_to_budget(render(1), budget_tokens)
+
+
+def _truncate_to_budget(text: str, budget_tokens: int) -> str:
+    """最后的硬上限：超出时按词从末尾截断"""
+    if estimate_tokens(text) <= budget_tokens:
+        return text
+    words = re.findall(r"\S+\s*", text)
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens("".join(words[:middle])) <= budget_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return "".join(words[:low]).rstrip()
+
+
+def split_into_chunks(text: str, chunk_tokens: int, max_chunks: int) -> list[str]:
+    """map-reduce 摘要的分段：每段不超过 chunk_tokens，总段数超限时先对全文均匀抽样"""
+    budget = chunk_tokens * max_chunks
+    while True:
+        if estimate_tokens(text) > budget:
+            text = fit_transcript_to_budget(text, budget)
+        chunks = _pack_segments(split_segments(text, max(1, min(TRANSCRIPT_SEGMENT_TOKENS, chunk_tokens // 5))), chunk_tokens)
+        if len(chunks) <= max_chunks:
+            return chunks
+        budget = int(budget * 0.9)
+
+
+def _pack_segments(segments: list[str], chunk_tokens: int) -> list[str]:
+    chunks, current, current_tokens = [], [], 0
+    for segment in segments:
+        segment_tokens = estimate_tokens(segment)
+        if current and current_tokens + segment_tokens > chunk_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(segment)
+        current_tokens += segment_tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
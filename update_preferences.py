@@ -6,11 +6,12 @@ import argparse
 import json
 import os
 import re
-import requests
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Callable
 
+import llm_cache
+import llm_client
 from preference_learning import (
     FACET_GROUPS,
     apply_daily_feedback,
@@ -172,34 +173,25 @@ def _classification_prompt(events: list[dict]) -> str:
 """
 
 
-def call_llm(prompt: str) -> str | None:
+def call_llm(prompt: str, validate: Callable[[str], bool] | None = None) -> str | None:
+    """validate 返回 False 的响应不写入缓存，重跑时重新请求"""
     if not DEEPSEEK_API_KEY:
         return None
-    try:
-        response = requests.post(
-            f"{DEEPSEEK_API_BASE}/chat/completions",
-            headers={
-                "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": DEEPSEEK_MODEL,
-                "max_tokens": 1024,
-                "messages": [{"role": "user", "content": prompt}],
-            },
-            timeout=60,
-        )
-        data = response.json()
-        if data.get("error") or response.status_code >= 400:
-            return None
-        choices = data.get("choices", [])
-        if not choices:
-            return None
-        content = choices[0].get("message", {}).get("content")
-        return content.strip() if isinstance(content, str) else None
-    except Exception as error:
-        print(f"  ⚠️ DeepSeek 偏好分类失败，使用本地兜底: {error}")
-        return None
+    cached = llm_cache.get(DEEPSEEK_MODEL, 1024, prompt, "preference")
+    if cached is not None:
+        llm_client.record_call("preference", "response_cache", prompt=prompt)
+        return cached
+    result = llm_client.chat_completion(
+        prompt,
+        api_base=DEEPSEEK_API_BASE,
+        api_key=DEEPSEEK_API_KEY,
+        model=DEEPSEEK_MODEL,
+        max_tokens=1024,
+        stage="preference",
+    )
+    if result and (validate is None or validate(result)):
+        llm_cache.put(DEEPSEEK_MODEL, 1024, prompt, result)
+    return result
 
 
 def classify_events(
@@ -208,8 +200,10 @@ def classify_events(
 ) -> list[dict]:
     if not events:
         return []
-    model_call = model_call or call_llm
     expected_ids = {str(event.get("event_id") or "") for event in events}
+    model_call = model_call or (
+        lambda prompt: call_llm(prompt, validate=lambda raw: bool(parse_classification_response(raw, expected_ids)))
+    )
     try:
         raw = model_call(_classification_prompt(events))
     except Exception as error:
@@ -220,7 +214,10 @@ def classify_events(
     classified = []
     for event in events:
         event_id = str(event.get("event_id") or "")
-        facets = model_facets.get(event_id) or deterministic_classify_event(event)
+        facets = model_facets.get(event_id)
+        if not facets:
+            llm_client.record_fallback("preference")
+            facets = deterministic_classify_event(event)
         classified.append({**event, **facets})
     return classified
 
@@ -299,7 +296,18 @@ def main() -> None:
     parser.add_argument("--local", action="store_true", help="保留兼容参数")
     parser.parse_args()
 
-    result = run_preference_update()
+    llm_cache.load()
+    try:
+        result = run_preference_update()
+    finally:
+        llm_cache.save()
+    for note in (llm_cache.format_stats(), llm_client.format_cache_usage()):
+        if note:
+            print(f"📊 {note}")
+    usage_table = llm_client.format_usage_table()
+    if usage_table:
+        print(f"📊 LLM 用量（耗时单位秒）\n{usage_table}")
+        llm_client.write_usage_report(llm_client.LLM_USAGE_REPORT_FILE, "preferences")
     print(
         f"📊 共读取 {result['feedback_count']} 次反馈，"
         f"本次处理 {result['new_event_count']} 次新反馈"